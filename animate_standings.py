@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import bar_chart_race as bcr
 import json
@@ -12,6 +13,14 @@ Generates an MP4 animation of the Formula 1 Championship standings for a given y
 - Uses `bar_chart_race` to visualize points progression.
 - Applies team colors (from data or fallback map) and custom styling.
 - Outputs video to `animations/`.
+- Supports a fast `--draft` preview (lower DPI, fewer interpolation steps),
+  a subset of rounds (`--rounds 10-15`), step decimation (`--every N`) and
+  single still images (`--still N`) for checking data fixes quickly.
+- `--export-keyframes` writes compact per-period keyframes to `data/` so the
+  canvas player (`player.html`) can replay the animation without an MP4.
+- Once the title is clinched (`titleStatus` from `championship_math.py`) the
+  step label names the champion.
+- `--constructors` animates `data/constructors_history_{year}.json` instead.
 """
 
 # Suppress FutureWarning from bar_chart_race regarding fillna(method='ffill')
@@ -20,20 +29,97 @@ warnings.simplefilter(action='ignore', category=FutureWarning)
 import matplotlib.font_manager as fm
 
 import argparse
+import base64
+import os
+import shutil
+import subprocess
 import sys
+import time
 
-def animate(year):
-    # 1. Load Data
-    filename = f'data/standings_history_{year}.json'
+from perf_utils import add_profile_args, profiled, record, timed
+from team_colors import get_resolver, API_COLOR_FIRST_YEAR
+
+# Render profiles. The figure is always 19.2 x 10.8 inches so every font and
+# margin keeps its proportions; the output resolution is set by the DPI alone.
+RENDER_PROFILES = {
+    'full': {
+        'dpi': 100,              # 1920x1080
+        'steps_per_period': 20,
+        'period_length': 750,    # 0.75s animation
+        'end_period_pause': 100, # 0.1s pause between steps
+    },
+    'draft': {
+        'dpi': 50,               # 960x540
+        'steps_per_period': 5,
+        'period_length': 750,
+        'end_period_pause': 0,
+    },
+}
+
+# Figure layouts. `axes` is [left, bottom, width, height] in figure fractions,
+# `title` the (x, y) of the suptitle and `font_scale` multiplies every font size.
+FIGURE_LAYOUTS = {
+    # 16:9 (the original MP4 layout)
+    'landscape': {'figsize': (19.2, 10.8), 'axes': [0.15, 0.05, 0.80, 0.78], 'title': (0.15, 0.95), 'font_scale': 1.0},
+    # 9:16 vertical social video
+    'vertical': {'figsize': (10.8, 19.2), 'axes': [0.30, 0.04, 0.62, 0.82], 'title': (0.05, 0.96), 'font_scale': 1.0},
+    # 1:1
+    'square': {'figsize': (10.8, 10.8), 'axes': [0.30, 0.05, 0.62, 0.74], 'title': (0.05, 0.95), 'font_scale': 0.85},
+    # 9:16 still of the full final standings (20 rows)
+    'poster': {'figsize': (10.8, 19.2), 'axes': [0.30, 0.03, 0.62, 0.86], 'title': (0.05, 0.97), 'font_scale': 0.75},
+}
+
+FIGSIZE = FIGURE_LAYOUTS['landscape']['figsize']
+N_BARS = 10
+BAR_SIZE = .70
+
+def parse_round_range(text):
+    """
+    Parses a round selection such as "10-15" or "7" into an inclusive (start, end) tuple.
+    """
+    try:
+        if '-' in text:
+            start, end = text.split('-', 1)
+            start, end = int(start), int(end)
+        else:
+            start = end = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid round range '{text}' (expected e.g. 10-15)")
+
+    if start > end:
+        raise argparse.ArgumentTypeError(f"Invalid round range '{text}': start is after end")
+    return (start, end)
+
+def load_history(year, constructors=False):
+    filename = f'data/{"constructors" if constructors else "standings"}_history_{year}.json'
     try:
         with open(filename, 'r') as f:
-            history = json.load(f)
+            return json.load(f)
     except FileNotFoundError:
-        print(f"{filename} not found. Run prepare_web_data.py --year {year} first.")
-        return
+        script = 'constructors_history.py --years' if constructors else 'prepare_web_data.py --year'
+        print(f"{filename} not found. Run {script} {year} first.")
+        return None
 
-    print(f"Loaded {len(history)} steps from history for {year}.")
+def select_steps(history, rounds=None, every=1):
+    """
+    Returns the indices of the history steps to render.
+    - `rounds`: optional inclusive (start, end) round range.
+    - `every`: keep every Nth step (the last selected step is always kept).
+    """
+    indices = list(range(len(history)))
+    if rounds:
+        start, end = rounds
+        indices = [i for i in indices if start <= int(history[i]['round']) <= end]
 
+    if every > 1 and indices:
+        decimated = indices[::every]
+        if decimated[-1] != indices[-1]:
+            decimated.append(indices[-1])
+        indices = decimated
+
+    return indices
+
+def load_fonts():
     # Register Custom Google Fonts
     try:
         fm.fontManager.addfont('fonts/Outfit-Regular.ttf')
@@ -42,140 +128,189 @@ def animate(year):
     except Exception as e:
         print(f"Error loading custom fonts: {e}")
 
-    # 2. Process into DataFrame for bar_chart_race
-    # Structure: Index = Time Steps, Columns = Drivers, Values = Points
-    
+def step_label(step):
+    # "Event Name | Session\nDate | Location", plus the champion once the title is clinched
+    label = f"{step['eventName']} | {step['session']}\n{step['date']} | {step['location']}"
+    champion = next((d['name'] for d in step['standings'] if d.get('titleStatus') == 'clinched'), None)
+    return f"{label} | {champion} Champion" if champion else label
+
+@timed('frame data')
+def build_frame_data(history, year, indices):
+    """
+    Builds the step x driver points matrix for the selected history steps.
+
+    Returns a dict of NumPy-backed frame data:
+    - `drivers`: sorted driver names (matrix columns).
+    - `teams` / `colors`: last seen team and JSON color per driver (None if missing
+      or filled from the fallback map, so it is re-resolved for `year`).
+    - `step_points`: (n_steps + 1, n_drivers) float matrix; row 0 is the season start.
+    - `step_labels`: period label for each step row.
+    - `period_points` / `period_labels`: index arrays mapping each animation period
+      onto a step row. Every step gets two periods: a "pre-animation" hold that shows
+      the NEW label with the OLD points, then the NEW points. Hold periods reference
+      the previous step row instead of copying it.
+    """
     # Collect all unique driver names first
     all_drivers = set()
-    for step in history:
-        for driver in step['standings']:
+    for i in indices:
+        for driver in history[i]['standings']:
             all_drivers.add(driver['name'])
-    
-    sorted_drivers = sorted(list(all_drivers))
-    
-    # Build data rows
-    # Initialize with Step 0 (Season Start)
-    # To prevent visual jumping, we seed Step 0 with "epsilon points" 
+
+    sorted_drivers = sorted(all_drivers)
+    column = {name: j for j, name in enumerate(sorted_drivers)}
+
+    n_steps = len(indices)
+    step_points = np.zeros((n_steps + 1, len(sorted_drivers)), dtype=np.float64)
+    teams = [""] * len(sorted_drivers)
+    colors = [None] * len(sorted_drivers)
+
+    def fill_row(row, standings):
+        cols = np.fromiter((column.get(d['name'], -1) for d in standings), dtype=np.intp, count=len(standings))
+        points = np.fromiter((d['points'] for d in standings), dtype=np.float64, count=len(standings))
+        known = cols >= 0
+        step_points[row, cols[known]] = points[known]
+
+    # Row 0 (Season Start)
+    # To prevent visual jumping, we seed Step 0 with "epsilon points"
     # based on the first race (Step 1) results. This pre-sorts the bars.
-    step0_row = {}
-    
-    # Get Step 1 points (first entry in history)
-    if len(history) > 0:
-        step1_standings = {d['name']: d['points'] for d in history[0]['standings']}
+    # When rendering a later subset of rounds, Step 0 is instead the real
+    # standings just before the first selected step.
+    first_index = indices[0] if indices else 0
+    if first_index > 0:
+        prev = history[first_index - 1]
+        fill_row(0, prev['standings'])
+        start_label = step_label(prev)
     else:
-        step1_standings = {}
-
-    for driver in sorted_drivers:
-        p1 = step1_standings.get(driver, 0)
-        # Use a tiny fraction so it sorts correctly but displays as 0 (due to integer formatting)
-        step0_row[driver] = p1 * 0.0001
-        
-    data_rows = [step0_row]
-    period_labels = [f"Season Start\n{year}"]
-    
-    # We need to map driver names to their teams/colors
-    driver_team_map = {} # Name -> Team
-    driver_color_map = {} # Name -> HexColor
-
-    # Track last row for the "pause/label switch" step
-    last_row = step0_row
-
-    for i, step in enumerate(history):
-        # Create a label for this step: "Event Name - Session\nDate | Location"
-        label = f"{step['eventName']} | {step['session']}\n{step['date']} | {step['location']}"
-        
-        # 1. Add "Pre-Animation" Step:
-        # Show the NEW label, but keep the OLD points.
-        # This allows the viewer to see "Race X" before the bars start moving.
-        period_labels.append(label)
-        data_rows.append(last_row)
-        
-        # 2. Add "Animation" Step:
-        # Show the NEW label and NEW points.
-        period_labels.append(label)
-        
-        row = {driver: 0 for driver in sorted_drivers}
+        if len(history) > 0:
+            fill_row(0, history[0]['standings'])
+            # Use a tiny fraction so it sorts correctly but displays as 0 (due to integer formatting)
+            step_points[0] *= 0.0001
+        start_label = f"Season Start\n{year}"
+
+    step_labels = [start_label]
+
+    for row, i in enumerate(indices, 1):
+        step = history[i]
+        step_labels.append(step_label(step))
+        fill_row(row, step['standings'])
+
         for driver_data in step['standings']:
-            name = driver_data['name']
-            points = driver_data['points']
-            
-            # [FIX] 1997 Exception: Michael Schumacher DSQ
-            # Force points to 0 in the final step so he strictly "falls off" the chart
-            if year == 1997 and name == "Michael Schumacher" and i == len(history) - 1:
-                points = 0
-            
-            row[name] = points
-            
-            # Update maps
-            driver_team_map[name] = driver_data['team']
-            # Use color from JSON if available
-            if 'color' in driver_data and driver_data['color']:
-                 driver_color_map[name] = driver_data['color']
-            
-        data_rows.append(row)
-        last_row = row
-
-    # Explicitly set columns to ensure order matches color list
-    df = pd.DataFrame(data_rows, index=period_labels, columns=sorted_drivers)
-
-    # [NEW] Rename columns to include Team Name (e.g. "Name\nTEAM")
+            j = column[driver_data['name']]
+            teams[j] = driver_data['team']
+            # Use color from JSON if available (API colors only)
+            if driver_data.get('color') and driver_data.get('colorSource') != 'fallback':
+                colors[j] = driver_data['color']
+
+        # [FIX] 1997 Exception: Michael Schumacher DSQ
+        # Force points to 0 in the final step so he strictly "falls off" the chart
+        if year == 1997 and i == len(history) - 1 and "Michael Schumacher" in column:
+            step_points[row, column["Michael Schumacher"]] = 0
+
+    # Period p shows label (p + 1) // 2 with points p // 2:
+    # 0 -> start, 2k - 1 -> hold (new label, old points), 2k -> settled step k
+    periods = np.arange(2 * n_steps + 1)
+
+    return {
+        'year': year,
+        'drivers': sorted_drivers,
+        'teams': teams,
+        'colors': colors,
+        'step_points': step_points,
+        'step_labels': step_labels,
+        'period_points': periods // 2,
+        'period_labels': (periods + 1) // 2,
+    }
+
+def bar_label(name, team):
+    # "Name\nTEAM" (the team under the driver name); constructors only show the team
+    return name if name == team else f"{name}\n{team.upper()}"
+
+def frames_to_dataframe(frames):
+    """
+    Materializes the bar_chart_race DataFrame.
+    Structure: Index = Periods, Columns = "Name\nTEAM", Values = Points.
+    """
+    # [NEW] Columns include Team Name (e.g. "Name\nTEAM")
     # This displays the team under the driver name on the Y-axis
-    rename_map = {}
-    for driver in sorted_drivers:
-        team = driver_team_map.get(driver, "").upper()
-        rename_map[driver] = f"{driver}\n{team}"
-    
-    df.rename(columns=rename_map, inplace=True)
-    
-    # 3. Define Colors
-    # Fallback Map (for years where API provides no color, or gaps)
-    # Includes 2024/2025 teams plus historical ones.
-    # Load Fallback Colors
-    try:
-        with open('fallback_teams.json', 'r') as f:
-            fallback_team_colors = json.load(f)
-    except FileNotFoundError:
-        print("fallback_teams.json not found. Using empty fallback.")
-        fallback_team_colors = {}
+    columns = [bar_label(driver, team) for driver, team in zip(frames['drivers'], frames['teams'])]
+    labels = [frames['step_labels'][k] for k in frames['period_labels']]
+    # Single gather: the only point at which hold periods are copied
+    return pd.DataFrame(frames['step_points'][frames['period_points']], index=labels, columns=columns)
+
+def bar_positions(points, n_bars=N_BARS):
+    """
+    Vectorized bar_chart_race ranking for a (..., n_drivers) points array.
+    Ranks by points (desc) with ties going to the earlier column, then maps them to
+    y positions: n_bars is the top bar, 0 is off the chart.
+    """
+    order = np.argsort(-points, axis=-1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, points.shape[-1] + 1), axis=-1)
+    return n_bars + 1 - np.minimum(ranks, n_bars + 1)
+
+@timed('frame interpolation')
+def interpolate_frames(frames, steps_per_period, n_bars=N_BARS):
+    """
+    Precomputes every animation frame in one pass, matching bar_chart_race's
+    linear interpolation of both values and bar positions.
+    Returns (values, positions, labels): two (n_frames, n_drivers) arrays and the
+    step label index of each frame.
+    """
+    period_values = frames['step_points'][frames['period_points']]
+    period_positions = bar_positions(period_values, n_bars).astype(np.float64)
 
-    # Build color list aligned with sorted_drivers
+    t = (np.arange(steps_per_period) / steps_per_period)[None, :, None]
+
+    def lerp(arr):
+        head = arr[:-1, None, :] + (arr[1:] - arr[:-1])[:, None, :] * t
+        return np.concatenate([head.reshape(-1, arr.shape[1]), arr[-1:]])
+
+    labels = np.append(np.repeat(frames['period_labels'][:-1], steps_per_period), frames['period_labels'][-1])
+    return lerp(period_values), lerp(period_positions), labels
+
+def resolve_bar_colors(frames):
+    # Fallback colors (for years where API provides no color, or gaps) come from
+    # the shared team_colors resolver, the same one used to patch the data files.
+    resolver = get_resolver()
+    year = frames.get('year')
+    pre_api = year is not None and year < API_COLOR_FIRST_YEAR
+
+    # Build color list aligned with the driver columns
     bar_colors = []
-    for driver in sorted_drivers:
+    for team, color in zip(frames['teams'], frames['colors']):
         # Priority 1: Color from JSON (API)
-        color = driver_color_map.get(driver)
-        
-        # If API returns grey #555555, treat it as missing to use fallback
-        if color == "#555555":
+        # If API returns grey #555555, treat it as missing to use fallback.
+        # Untagged legacy fallback fills (every pre-API season) are re-resolved
+        # for the season's era.
+        if color == "#555555" or pre_api or resolver.is_fallback(team or "Unknown", color):
             color = None
-        
-        # Priority 2: Fallback map based on Team Name
+
+        # Priority 2: Fallback based on Team Name (and era)
         if not color:
-            team = driver_team_map.get(driver, "Unknown")
-            color = fallback_team_colors.get(team)
-            if color:
-                 pass # print(f"Using fallback color {color} for {driver} ({team})")
-        
+            color = resolver.resolve(team or "Unknown", year)
+
         # Priority 3: Grey
         if not color:
             color = "#555555"
-            
+
         bar_colors.append(color)
+    return bar_colors
+
+def create_figure(year, dpi, max_points, layout='landscape', title=None):
+    geometry = FIGURE_LAYOUTS[layout]
+    scale = geometry['font_scale']
 
-    print("Generating animation (1920x1080)... this will take a moment.")
-    
-    # 4. Generate Animation
     # Set global dark mode style (handles ticks, spines, etc.)
     plt.style.use('dark_background')
-    
-    # [FIX] Full HD 1920x1080
-    fig = plt.figure(figsize=(19.2, 10.8), dpi=100, facecolor='black')
-    
-    # Add axes with explicit margins (Adjusted for 16:9)
+
+    # [FIX] Full HD 1920x1080 at dpi=100 (draft renders just lower the DPI)
+    fig = plt.figure(figsize=geometry['figsize'], dpi=dpi, facecolor='black')
+
     # Add axes with explicit margins (Adjusted for 16:9)
     # Left margin needs to be wide enough for "Long Name + Team"
     # [FIX] Reduced height from 0.83 to 0.78 to make room at the top
-    ax = fig.add_axes([0.15, 0.05, 0.80, 0.78], facecolor='black')
-    
+    ax = fig.add_axes(geometry['axes'], facecolor='black')
+
     # Hide X-axis ticks and labels (clean look)
     ax.tick_params(axis='x', which='both', bottom=False, top=False, labelbottom=False)
     # Hide Y-axis ticks but keep labels
@@ -183,57 +318,280 @@ def animate(year):
     # Hide axis spines (lines)
     for spine in ax.spines.values():
         spine.set_visible(False)
-        
+
     # Force X-Axis scale to be fixed
-    max_points = df.max().max()
     # Increase buffer to 15% to prevent cutting off labels (e.g. 408)
-    ax.set_xlim(0, max_points * 1.15) 
-    
+    ax.set_xlim(0, max_points * 1.15)
+
     # Add Static Title manually
     # Switched to Outfit Bold (Loaded from fonts/)
     # Align Title with the Axes Left Edge (x=0.15)
     # [FIX] Moved up to 0.95 and aligned right to 0.15 to match chart margin
-    fig.suptitle(f'F1 {year} Championship Standings', fontsize=36, fontweight='bold', y=0.95, x=0.15, ha='left', fontfamily='Outfit', color='white')
-    
-    # Ensure output directory exists
-    import os
-    if not os.path.exists('animations'):
-        os.makedirs('animations')
-    
-    output_filename = f'animations/f1_{year}_standings.mp4'
-    
+    title_x, title_y = geometry['title']
+    fig.suptitle(title or f'F1 {year} Championship Standings', fontsize=36 * scale, fontweight='bold', y=title_y, x=title_x, ha='left', fontfamily='Outfit', color='white')
+    return fig, ax
+
+class FrameRenderer:
+    """
+    Draws standings frames onto a reusable figure with the bar_chart_race look.
+    Artists are created once and updated in place, so a frame costs one
+    `update` (layout) plus one canvas draw.
+    """
+    def __init__(self, frames, bar_colors, year, dpi, layout='landscape', n_bars=N_BARS):
+        self.colors = bar_colors
+        self.n_bars = n_bars
+        self.font_size = 18 * FIGURE_LAYOUTS[layout]['font_scale']
+        self.tick_labels = [bar_label(driver, team) for driver, team in zip(frames['drivers'], frames['teams'])]
+
+        self.fig, self.ax = create_figure(year, dpi, frames['step_points'].max(), layout, frames.get('title'))
+        self.ax.set_ylim(.5, n_bars + .5)
+        self.x_pad = .01 * self.ax.get_xlim()[1]
+
+        self.bars = list(self.ax.barh(np.arange(1, n_bars + 1), np.zeros(n_bars), height=BAR_SIZE,
+                                      alpha=.9, ec='whitesmoke', lw=1))
+        self.value_texts = [self.ax.text(0, 0, '', ha='left', va='center', fontsize=self.font_size,
+                                         family='Outfit', color='white') for _ in range(n_bars)]
+        self.period_text = self.ax.text(0.0, 1.00, '', transform=self.ax.transAxes, ha='left', va='bottom',
+                                        size=self.font_size, weight='bold', family='Outfit', color='white')
+        self.width, self.height = self.fig.canvas.get_width_height()
+
+    @timed('frame layout')
+    def update(self, values, positions, label):
+        # Visible bars: 0 < position < n_bars + 1, top bar first
+        visible = np.flatnonzero((positions > 0) & (positions < self.n_bars + 1))
+        visible = visible[np.argsort(-positions[visible], kind='stable')]
+
+        for k, (bar, text) in enumerate(zip(self.bars, self.value_texts)):
+            if k < len(visible):
+                j = visible[k]
+                bar.set_y(positions[j] - BAR_SIZE / 2)
+                bar.set_width(values[j])
+                bar.set_facecolor(self.colors[j])
+                bar.set_visible(True)
+                text.set_position((values[j] + self.x_pad, positions[j]))
+                text.set_text(f'{values[j]:,.0f}')
+                text.set_visible(True)
+            else:
+                bar.set_visible(False)
+                text.set_visible(False)
+
+        self.ax.set_yticks(positions[visible], [self.tick_labels[j] for j in visible],
+                           fontsize=self.font_size, fontfamily='Outfit', color='white')
+        self.period_text.set_text(label)
+
+    @timed('frame draw')
+    def render(self):
+        """Rasterizes the current frame and returns its RGBA buffer."""
+        self.fig.canvas.draw()
+        return self.fig.canvas.buffer_rgba()
+
+    def close(self):
+        plt.close(self.fig)
+
+class VideoSink:
+    """
+    Pipes raw RGBA frames into ffmpeg.
+    With `filename=None` frames go to a null sink: ffmpeg's null muxer when
+    ffmpeg is installed (so encoding is still exercised), otherwise /dev/null.
+    """
+    def __init__(self, filename, width, height, fps):
+        self.proc = None
+        if shutil.which('ffmpeg') is None:
+            if filename is not None:
+                raise RuntimeError("ffmpeg not found; cannot write video")
+            self.stream = open(os.devnull, 'wb')
+            return
+
+        cmd = ['ffmpeg', '-loglevel', 'error', '-y',
+               '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{width}x{height}', '-r', f'{fps:g}', '-i', '-']
+        if filename is None:
+            cmd += ['-f', 'null', '-']
+        else:
+            cmd += ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', filename]
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        self.stream = self.proc.stdin
+
+    def write(self, buffer):
+        self.stream.write(buffer)
+
+    def close(self):
+        self.stream.close()
+        if self.proc is not None and self.proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with status {self.proc.returncode}")
+
+def save_still(frames, step, bar_colors, year, dpi, filename):
+    """
+    Renders a single step as a PNG, mirroring the bar_chart_race styling.
+    `step` 0 is the season start; step N is the standings after the Nth rendered step.
+    """
+    values = frames['step_points'][step]
+    renderer = FrameRenderer(frames, bar_colors, year, dpi)
+    renderer.update(values, bar_positions(values), frames['step_labels'][step])
+    renderer.fig.savefig(filename, dpi=dpi, facecolor='black')
+    renderer.close()
+
+def encode_typed_array(arr, dtype):
+    """Little-endian bytes of `arr` as base64, decodable into a JS typed array."""
+    return base64.b64encode(np.ascontiguousarray(arr, dtype=dtype).tobytes()).decode('ascii')
+
+@timed('keyframe export')
+def export_keyframes(frames, bar_colors, year, profile, filename):
+    """
+    Writes the per-period keyframes for the canvas player (`player.html`).
+    Only period boundaries are stored; the player interpolates values and bar
+    positions between them exactly like bar_chart_race, at display frame rate.
+
+    Arrays are (n_periods x n_drivers), row-major, base64 little-endian:
+    - `points`: Float32 points per period.
+    - `ranks`: Uint8 championship position (1 = leader) per period.
+    - `positions`: Uint8 bar slot (n_bars = top bar, 0 = off the chart) per period.
+    - `labels`: Uint16 index into `stepLabels` per period.
+    """
+    period_values = frames['step_points'][frames['period_points']]
+    positions = bar_positions(period_values, N_BARS)
+    ranks = bar_positions(period_values, len(frames['drivers']))
+    ranks = len(frames['drivers']) + 1 - ranks
+
+    keyframes = {
+        'year': year,
+        'version': 1,
+        'nBars': N_BARS,
+        'periodLength': profile['period_length'],
+        'endPeriodPause': profile['end_period_pause'],
+        'maxPoints': float(frames['step_points'].max()),
+        'periods': int(period_values.shape[0]),
+        'drivers': [
+            {'name': name, 'team': team, 'color': color}
+            for name, team, color in zip(frames['drivers'], frames['teams'], bar_colors)
+        ],
+        'stepLabels': frames['step_labels'],
+        'points': encode_typed_array(period_values, '<f4'),
+        'ranks': encode_typed_array(ranks, 'u1'),
+        'positions': encode_typed_array(positions, 'u1'),
+        'labels': encode_typed_array(frames['period_labels'], '<u2'),
+    }
+
+    with open(filename, 'w') as f:
+        json.dump(keyframes, f, separators=(',', ':'))
+
+def render_bar_chart_race(frames, bar_colors, year, profile, filename, writer='ffmpeg'):
+    """
+    Renders the MP4 through `bar_chart_race` (the shipped video path).
+    `profile`: render profile (dpi, steps_per_period, period_length, end_period_pause).
+    `writer`: matplotlib movie writer name or instance (the benchmark passes a null sink).
+    """
+    df = frames_to_dataframe(frames)
+    fig, ax = create_figure(year, profile['dpi'], frames['step_points'].max(), title=frames.get('title'))
+
     bcr.bar_chart_race(
         df=df,
-        filename=output_filename,
+        filename=filename,
         orientation='h',
         sort='desc',
-        n_bars=10,
+        n_bars=N_BARS,
         fixed_order=False,
-        fixed_max=True, 
-        steps_per_period=20, 
-        period_length=750, # 0.75s animation
-        end_period_pause=100, # 0.1s pause between steps
-        interpolate_period=False, 
-        bar_size=.70, # Thinner bars (0.7)
+        fixed_max=True,
+        steps_per_period=profile['steps_per_period'],
+        period_length=profile['period_length'],
+        end_period_pause=profile['end_period_pause'],
+        interpolate_period=False,
+        bar_size=BAR_SIZE, # Thinner bars (0.7)
         # Position metadata (Race Name)
         # [FIX] Position label lower (1.00 instead of 1.02)
-        period_label={'x': 0.0, 'y': 1.00, 'ha': 'left', 'va': 'bottom', 'size': 18, 'weight': 'bold', 'family': 'Outfit', 'color': 'white'}, 
-        period_template='{x}', 
-        colors=bar_colors, 
-        filter_column_colors=False, 
-        title=None, 
+        period_label={'x': 0.0, 'y': 1.00, 'ha': 'left', 'va': 'bottom', 'size': 18, 'weight': 'bold', 'family': 'Outfit', 'color': 'white'},
+        period_template='{x}',
+        colors=bar_colors,
+        filter_column_colors=False,
+        title=None,
         bar_label_font=18, # Larger point values
         # Explicitly set font family and color for driver names
-        tick_label_font={'size': 18, 'family': 'Outfit', 'color': 'white'}, 
+        tick_label_font={'size': 18, 'family': 'Outfit', 'color': 'white'},
         # Shared font dict for bar labels
         shared_fontdict={'family': 'Outfit', 'weight': 'normal', 'color': 'white'},
         scale='linear',
-        writer='ffmpeg',
-        fig=fig, 
+        writer=writer,
+        fig=fig,
         # White edges for bars
-        bar_kwargs={'alpha': .9, 'ec': 'whitesmoke', 'lw': 1} 
+        bar_kwargs={'alpha': .9, 'ec': 'whitesmoke', 'lw': 1}
     )
-    
+
+def animate(year, draft=False, dpi=None, steps_per_period=None, rounds=None, every=1, still=None, export=False,
+            constructors=False):
+    """
+    Renders the standings animation for `year`.
+    - `draft`: use the low-resolution, low-step preview profile.
+    - `dpi` / `steps_per_period`: override the chosen profile.
+    - `rounds`: optional inclusive (start, end) round range to render.
+    - `every`: keep every Nth step only.
+    - `still`: render only this step as a PNG instead of a video.
+    - `export`: write keyframes for the canvas player instead of a video.
+    - `constructors`: animate the constructors' standings instead of the drivers'.
+    """
+    # 1. Load Data
+    history = load_history(year, constructors)
+    if history is None:
+        return
+
+    print(f"Loaded {len(history)} steps from history for {year}.")
+
+    profile = dict(RENDER_PROFILES['draft' if draft else 'full'])
+    if dpi:
+        profile['dpi'] = dpi
+    if steps_per_period:
+        profile['steps_per_period'] = steps_per_period
+
+    indices = select_steps(history, rounds, every)
+    if not indices:
+        print(f"No steps match rounds {rounds} for {year}.")
+        return
+
+    load_fonts()
+
+    # 2. Build the step x driver points matrix
+    frames = build_frame_data(history, year, indices)
+    if constructors:
+        frames['title'] = f"F1 {year} Constructors' Standings"
+
+    # 3. Define Colors
+    bar_colors = resolve_bar_colors(frames)
+
+    if export:
+        suffix = '_constructors' if constructors else ''
+        suffix += f'_r{rounds[0]}-{rounds[1]}' if rounds else ''
+        output_filename = f'data/keyframes_{year}{suffix}.json'
+        export_keyframes(frames, bar_colors, year, profile, output_filename)
+        print(f"Keyframes saved to {output_filename}")
+        return
+
+    # Ensure output directory exists
+    if not os.path.exists('animations'):
+        os.makedirs('animations')
+
+    suffix = '_constructors' if constructors else ''
+    if rounds:
+        suffix += f'_r{rounds[0]}-{rounds[1]}'
+    if draft:
+        suffix += '_draft'
+
+    if still is not None:
+        if still < 0 or still > len(indices):
+            print(f"Still step {still} out of range (0-{len(indices)}).")
+            return
+        output_filename = f'animations/f1_{year}_standings{suffix}_step{still}.png'
+        save_still(frames, still, bar_colors, year, profile['dpi'], output_filename)
+        print(f"Still saved to {output_filename}")
+        return
+
+    width = int(FIGSIZE[0] * profile['dpi'])
+    height = int(FIGSIZE[1] * profile['dpi'])
+    print(f"Generating animation ({width}x{height}, {profile['steps_per_period']} steps/period)... this will take a moment.")
+
+    # 4. Generate Animation
+    output_filename = f'animations/f1_{year}_standings{suffix}.mp4'
+
+    render_start = time.perf_counter()
+    render_bar_chart_race(frames, bar_colors, year, profile, output_filename)
+    record('bar chart race (draw + encode)', render_start)
     print(f"Animation saved to {output_filename}")
 
 if __name__ == "__main__":
@@ -242,6 +600,30 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Animate F1 standings")
     parser.add_argument("--year", type=int, default=current_year, help=f"Season year to animate (default: {current_year})")
+    parser.add_argument("--draft", action="store_true", help="Fast preview: 960x540, 5 steps per period")
+    parser.add_argument("--dpi", type=int, help="Override output DPI (100 = 1920x1080)")
+    # Both set the steps per period, so only one may be given
+    smoothness = parser.add_mutually_exclusive_group()
+    smoothness.add_argument("--steps", type=int, help="Override interpolation steps per period")
+    smoothness.add_argument("--fps", type=float, help="Target frame rate (sets steps per period from the period length)")
+    parser.add_argument("--rounds", type=parse_round_range, help="Only render these rounds, e.g. 10-15")
+    parser.add_argument("--every", type=int, default=1, help="Keep every Nth step (default: 1)")
+    parser.add_argument("--export-keyframes", action="store_true", help="Write data/keyframes_{year}.json for the canvas player instead of a video")
+    parser.add_argument("--still", type=int, help="Render a single PNG of this step (0 = season start) instead of a video")
+    parser.add_argument("--constructors", action="store_true", help="Animate the constructors' standings (data/constructors_history_{year}.json)")
+    add_profile_args(parser)
     args = parser.parse_args()
-    
-    animate(args.year)
+
+    steps = args.steps
+    if args.fps:
+        period_length = RENDER_PROFILES['draft' if args.draft else 'full']['period_length']
+        steps = max(1, round(args.fps * period_length / 1000))
+
+    if args.every < 1:
+        print("Error: --every must be at least 1")
+        sys.exit(1)
+
+    with profiled(args, f'animate_standings_{args.year}'):
+        animate(args.year, draft=args.draft, dpi=args.dpi, steps_per_period=steps,
+                rounds=args.rounds, every=args.every, still=args.still,
+                export=args.export_keyframes, constructors=args.constructors)
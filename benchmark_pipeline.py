@@ -0,0 +1,289 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+"""
+benchmark_pipeline.py
+
+One number for "how long does a full rebuild take", per stage, per commit.
+- Runs the whole chain offline in a scratch directory (`--workdir`), each stage
+  as its own processes, on one of two inputs:
+  - `synthetic` (default): the season comes from `synth_season.py` at the given
+    scale (drivers, rounds, sprints), so runs are reproducible anywhere.
+  - `recorded`: `prepare_web_data.py` rebuilds a real season from copies of the
+    HTTP and FastF1 caches (no network on a warm cache); the existing season file
+    is seeded first, so later stages still run when the prepare stage cannot.
+- Stages: prepare, colors (`update_colors.py`), verify (`verify_integrity.py`),
+  web (constructors' history, chart series, player keyframes) and a draft
+  animation (`animate_standings.py --draft`; without ffmpeg the draft profile is
+  rendered to a null sink through `benchmark_render.py`, recorded as a `proxy`
+  stage and never compared with a run that encoded the MP4).
+- The work directory is emptied before each run, so it must be a directory this
+  tool created (it holds a `.benchmark_pipeline` marker), an empty one or a new
+  path; the repository and its parents are refused.
+- Per stage: wall time, CPU time (user + system, children included, from
+  `wait4`), peak RSS, block I/O read/written (0 when served from the page cache)
+  and the bytes of files the stage wrote. `--repeat` keeps the median.
+- Writes `logs/benchmarks/pipeline_{commit}.json`. `--baseline REF` compares the
+  run with an earlier one (a results file or a commit) and `--compare BASE HEAD`
+  compares two saved runs; a stage metric that grew by more than `--threshold`
+  (and by more than the noise floor) is a regression, and the exit status is 1.
+"""
+
+from perf_utils import load_results, write_results
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WORKDIR = 'logs/pipeline_work'
+DEFAULT_THRESHOLD = 0.10
+STAGES = ['prepare', 'colors', 'verify', 'web', 'animation']
+# Metrics compared between runs, with the absolute change below which they are noise
+COMPARED = {'wall_s': 0.05, 'cpu_s': 0.05, 'peak_rss_mb': 5.0}
+METRICS = ['wall_s', 'cpu_s', 'user_s', 'sys_s', 'peak_rss_mb', 'read_mb', 'write_mb', 'output_mb']
+BLOCK_BYTES = 512 # ru_inblock / ru_oublock unit
+RECORDED_CACHES = ['f1_http_cache.sqlite', 'f1_cache']
+WORKDIR_MARKER = '.benchmark_pipeline'
+
+def script(name, *args):
+    return [sys.executable, os.path.join(REPO, name), *[str(a) for a in args]]
+
+def stage_commands(args):
+    """Stage -> commands (run in order, in the work directory)."""
+    year = args.year
+    if args.input == 'synthetic':
+        prepare = [script('synth_season.py', '--out', '.', '--year', year, '--drivers', args.drivers,
+                          '--rounds', args.rounds, '--sprint-every', args.sprint_every, '--seed', args.seed)]
+    else:
+        prepare = [script('prepare_web_data.py', '--year', year)]
+    if shutil.which('ffmpeg'):
+        animation = [script('animate_standings.py', '--year', year, '--draft')]
+    else:
+        animation = [script('benchmark_render.py', '--years', year, '--modes', 'draft', '--output', 'render.json')]
+    return {
+        'prepare': prepare,
+        'colors': [script('update_colors.py', '--workers', 1, '--quiet')],
+        'verify': [script('verify_integrity.py', '--quiet', '--years', year)],
+        'web': [script('constructors_history.py', '--years', year),
+                script('season_series.py', '--years', year),
+                script('animate_standings.py', '--year', year, '--export-keyframes')],
+        'animation': animation,
+    }
+
+def proxy_stages():
+    """Stage -> note, for stages that stand in for the production command here."""
+    if shutil.which('ffmpeg'):
+        return {}
+    return {'animation': 'no ffmpeg: draft frames drawn to a null sink by benchmark_render.py, no MP4 encode'}
+
+def workdir_problem(workdir):
+    """Why `workdir` must not be emptied, or None if it is safe to."""
+    path, repo = os.path.realpath(workdir), os.path.realpath(REPO)
+    if path == repo or repo.startswith(path.rstrip(os.sep) + os.sep):
+        return f"--workdir {workdir} is the repository or one of its parents"
+    if os.path.exists(path):
+        if not os.path.isdir(path):
+            return f"--workdir {workdir} is not a directory"
+        own = path == os.path.join(repo, DEFAULT_WORKDIR) or os.path.exists(os.path.join(path, WORKDIR_MARKER))
+        if os.listdir(path) and not own:
+            return f"--workdir {workdir} is not empty and was not created by benchmark_pipeline.py"
+    return None
+
+def prepare_workdir(args):
+    """Empties the work directory and puts the inputs the stages start from in it."""
+    workdir = args.workdir
+    problem = workdir_problem(workdir)
+    if problem:
+        raise RuntimeError(problem)
+    if os.path.exists(workdir):
+        shutil.rmtree(workdir)
+    os.makedirs(os.path.join(workdir, 'data'))
+    open(os.path.join(workdir, WORKDIR_MARKER), 'w').close()
+    for name in ['fallback_teams.json', 'fonts']:
+        source = os.path.join(REPO, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(workdir, name))
+        elif os.path.exists(source):
+            shutil.copyfile(source, os.path.join(workdir, name))
+    if args.input == 'recorded':
+        season = os.path.join(REPO, f'data/standings_history_{args.year}.json')
+        if os.path.exists(season):
+            shutil.copyfile(season, os.path.join(workdir, 'data', os.path.basename(season)))
+        for name in RECORDED_CACHES:
+            source = os.path.join(REPO, name)
+            if os.path.isdir(source):
+                shutil.copytree(source, os.path.join(workdir, name))
+            elif os.path.exists(source):
+                shutil.copyfile(source, os.path.join(workdir, name))
+
+def snapshot(directory):
+    """path -> (size, mtime_ns) of every file under `directory`."""
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+def run_command(command, workdir, log):
+    """Runs one command to completion. Returns (exit code, wall seconds, rusage incl. its children)."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO, os.environ.get('PYTHONPATH')])),
+               MPLBACKEND='Agg')
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, wall, usage
+
+def run_stage(name, commands, workdir):
+    """Runs a stage's commands in order (stopping at the first failure) and measures them together."""
+    log_path = os.path.join(workdir, f'stage_{name}.log')
+    before = snapshot(workdir)
+    result = {'status': 'ok', 'commands': [' '.join(os.path.basename(c) for c in command[1:]) for command in commands]}
+    totals = dict.fromkeys(METRICS, 0.0)
+    with open(log_path, 'w') as log:
+        for command in commands:
+            code, wall, usage = run_command(command, workdir, log)
+            totals['wall_s'] += wall
+            totals['user_s'] += usage.ru_utime
+            totals['sys_s'] += usage.ru_stime
+            totals['peak_rss_mb'] = max(totals['peak_rss_mb'], usage.ru_maxrss / 1024) # KB on Linux
+            totals['read_mb'] += usage.ru_inblock * BLOCK_BYTES / 1e6
+            totals['write_mb'] += usage.ru_oublock * BLOCK_BYTES / 1e6
+            if code != 0:
+                result['status'] = f'failed (exit {code})'
+                break
+    totals['cpu_s'] = totals['user_s'] + totals['sys_s']
+    after = snapshot(workdir)
+    totals['output_mb'] = sum(size for path, (size, mtime) in after.items()
+                              if before.get(path) != (size, mtime) and path != log_path) / 1e6
+    result.update({metric: round(value, 3) for metric, value in totals.items()})
+    if result['status'] != 'ok':
+        with open(log_path, 'r', errors='replace') as f:
+            result['log_tail'] = f.read().strip().splitlines()[-5:]
+    return result
+
+def median_runs(runs):
+    """One result per stage: the median of each metric over the repeats (status of the worst run)."""
+    merged = {}
+    for name in runs[0]:
+        stage = [run[name] for run in runs]
+        merged[name] = dict(stage[-1])
+        merged[name]['status'] = next((s['status'] for s in stage if s['status'] != 'ok'), 'ok')
+        for metric in METRICS:
+            merged[name][metric] = round(statistics.median(s[metric] for s in stage), 3)
+        if len(runs) > 1:
+            merged[name]['wall_runs'] = [s['wall_s'] for s in stage]
+    return merged
+
+def print_stages(stages):
+    print(f"\n{'Stage':<10} | {'Wall':>8} | {'CPU':>8} | {'Peak RSS':>9} | {'Read':>8} | {'Write':>8} | {'Output':>8} | Status")
+    print("-" * 90)
+    for name, s in stages.items():
+        print(f"{name:<10} | {s['wall_s']:>7.2f}s | {s['cpu_s']:>7.2f}s | {s['peak_rss_mb']:>6.0f} MB | "
+              f"{s['read_mb']:>5.1f} MB | {s['write_mb']:>5.1f} MB | {s['output_mb']:>5.1f} MB | {s['status']}"
+              + (" (proxy)" if s.get('proxy') else ''))
+    total_wall = sum(s['wall_s'] for s in stages.values())
+    total_cpu = sum(s['cpu_s'] for s in stages.values())
+    print("-" * 90)
+    print(f"{'total':<10} | {total_wall:>7.2f}s | {total_cpu:>7.2f}s |")
+
+def benchmark(args):
+    commands = stage_commands(args)
+    proxies = proxy_stages()
+    selected = [s for s in STAGES if s in (args.stages or STAGES)]
+    runs = []
+    for i in range(args.repeat):
+        prepare_workdir(args)
+        run = {}
+        for name in selected:
+            run[name] = run_stage(name, commands[name], args.workdir)
+            if name in proxies:
+                run[name]['proxy'] = proxies[name]
+            print(f"[{i + 1}/{args.repeat}] {name}: {run[name]['wall_s']:.2f}s {run[name]['status']}")
+        runs.append(run)
+
+    stages = median_runs(runs)
+    print_stages(stages)
+    results = {
+        'input': {'mode': args.input, 'year': args.year, **({'drivers': args.drivers, 'rounds': args.rounds,
+                  'sprint_every': args.sprint_every, 'seed': args.seed} if args.input == 'synthetic' else {})},
+        'repeat': args.repeat,
+        'stages': stages,
+        'total': {'wall_s': round(sum(s['wall_s'] for s in stages.values()), 3),
+                  'cpu_s': round(sum(s['cpu_s'] for s in stages.values()), 3)},
+    }
+    path = write_results('pipeline', results, args.output)
+    print(f"\nResults saved to {path}")
+    return path
+
+def compare(base, head, threshold=DEFAULT_THRESHOLD):
+    """
+    Prints the stage-by-stage change from `base` to `head` (payloads of `write_results`).
+    Returns the regressions: (stage, metric, base value, head value).
+    """
+    base_results, head_results = base['results'], head['results']
+    if base_results['input'] != head_results['input']:
+        print(f"Warning: different inputs ({base_results['input']} vs {head_results['input']})")
+
+    print(f"\n{base['commit']} -> {head['commit']} (threshold {threshold:.0%})")
+    print(f"{'Stage':<10} | {'Metric':<12} | {'Base':>9} | {'Head':>9} | {'Change':>8}")
+    print("-" * 62)
+    regressions = []
+    for name, stage in head_results['stages'].items():
+        before = base_results['stages'].get(name)
+        if before is None:
+            continue
+        if before.get('commands') != stage.get('commands'):
+            print(f"{name:<10} | commands differ, skipped")
+            continue
+        if bool(before.get('proxy')) != bool(stage.get('proxy')):
+            print(f"{name:<10} | proxy vs production run, skipped")
+            continue
+        for metric, noise in COMPARED.items():
+            old, new = before[metric], stage[metric]
+            change = (new - old) / old if old else 0.0
+            regressed = new - old > noise and new > old * (1 + threshold)
+            flag = '  REGRESSION' if regressed else ''
+            print(f"{name:<10} | {metric:<12} | {old:>9.3f} | {new:>9.3f} | {change:>+7.1%}{flag}")
+            if regressed:
+                regressions.append((name, metric, old, new))
+    print(f"\n{len(regressions)} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the full offline pipeline per stage and track regressions")
+    parser.add_argument("--input", choices=['synthetic', 'recorded'], default='synthetic', help="Season input (default: synthetic)")
+    parser.add_argument("--year", type=int, default=2024, help="Season year (default: 2024)")
+    parser.add_argument("--drivers", type=int, default=20, help="Synthetic: race seats (default: 20)")
+    parser.add_argument("--rounds", type=int, default=24, help="Synthetic: rounds (default: 24)")
+    parser.add_argument("--sprint-every", type=int, default=4, help="Synthetic: sprint weekend every N rounds (default: 4)")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic: RNG seed (default: 0)")
+    parser.add_argument("--stages", nargs='+', choices=STAGES, help="Only run these stages (default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs to take the median of (default: 1)")
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR, help=f"Scratch directory, emptied first; must be new, empty or made by this tool (default: {DEFAULT_WORKDIR})")
+    parser.add_argument("--output", help="Results path (default: logs/benchmarks/pipeline_{commit}.json)")
+    parser.add_argument("--baseline", help="Compare this run with saved results (a file or a commit)")
+    parser.add_argument("--compare", nargs=2, metavar=('BASE', 'HEAD'), help="Only compare two saved results (files or commits)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help=f"Relative growth flagged as a regression (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(load_results('pipeline', args.compare[0]), load_results('pipeline', args.compare[1]), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if workdir_problem(args.workdir):
+        parser.error(workdir_problem(args.workdir))
+    baseline = load_results('pipeline', args.baseline) if args.baseline else None # Fail before the run
+    path = benchmark(args)
+    if baseline is not None:
+        sys.exit(1 if compare(baseline, load_results('pipeline', path), args.threshold) else 0)
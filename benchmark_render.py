@@ -0,0 +1,128 @@
+import argparse
+import multiprocessing
+import time
+
+from matplotlib.animation import AbstractMovieWriter
+
+"""
+benchmark_render.py
+
+Measures the rendering path of `animate_standings` without writing a video.
+- Renders each requested season in each render profile (draft/full) through
+  `render_bar_chart_race`, the `bar_chart_race` path `animate()` writes the MP4s
+  with, handing every frame to a null-sink movie writer instead of ffmpeg's mp4.
+- Splits the time into layout (frame data, the bar_chart_race DataFrame and its
+  per-frame bar plotting), draw (canvas rasterization) and encode (ffmpeg null
+  muxer, or /dev/null when ffmpeg is not installed).
+- Reports frames/sec and peak RSS; every case runs in a fresh process so peak
+  memory is not polluted by earlier cases.
+- Writes JSON to `logs/benchmarks/render_{commit}.json` for comparison across commits.
+"""
+
+from perf_utils import peak_rss_mb, write_results
+
+# Densest grid (1992) and the sprint-heavy modern calendar (2024)
+DEFAULT_YEARS = [1992, 2024]
+
+class NullSinkWriter(AbstractMovieWriter):
+    """Movie writer that rasterizes each frame into a `VideoSink` null sink, timing draw and encode."""
+    def __init__(self, fps, timings):
+        super().__init__(fps=fps)
+        self.timings = timings
+        self.frames = 0
+        self.sink = None
+
+    def setup(self, fig, outfile, dpi=None):
+        import animate_standings
+        self.fig, self.outfile, self.dpi = fig, outfile, dpi or fig.dpi
+        width, height = fig.canvas.get_width_height()
+        self.sink = animate_standings.VideoSink(None, width, height, self.fps)
+
+    def grab_frame(self, **savefig_kwargs):
+        t0 = time.perf_counter()
+        self.fig.canvas.draw()
+        buffer = self.fig.canvas.buffer_rgba()
+        t1 = time.perf_counter()
+        self.sink.write(buffer)
+        self.timings['draw'] += t1 - t0
+        self.timings['encode'] += time.perf_counter() - t1
+        self.frames += 1
+
+    def finish(self):
+        self.sink.close()
+
+def run_case(case):
+    year, mode, max_steps = case
+
+    # Imported here so each worker process pays its own import cost, outside the timings
+    import animate_standings
+
+    history = animate_standings.load_history(year)
+    if history is None:
+        return {'year': year, 'mode': mode, 'error': 'missing data'}
+
+    profile = animate_standings.RENDER_PROFILES[mode]
+    indices = animate_standings.select_steps(history)
+    if max_steps:
+        indices = indices[:max_steps]
+
+    animate_standings.load_fonts()
+
+    timings = {'layout': 0.0, 'draw': 0.0, 'encode': 0.0}
+    fps = profile['steps_per_period'] * 1000 / profile['period_length']
+    writer = NullSinkWriter(fps, timings)
+
+    # The shipped path of animate(), with the null-sink writer instead of ffmpeg's mp4
+    start = time.perf_counter()
+    frames = animate_standings.build_frame_data(history, year, indices)
+    bar_colors = animate_standings.resolve_bar_colors(frames)
+    animate_standings.render_bar_chart_race(frames, bar_colors, year, profile, 'null.mp4', writer=writer)
+    total = time.perf_counter() - start
+    # Everything outside rasterizing and piping: frame data and bar_chart_race's per-frame layout
+    timings['layout'] = total - timings['draw'] - timings['encode']
+    width, height = (int(size * profile['dpi']) for size in animate_standings.FIGSIZE)
+
+    return {
+        'year': year,
+        'mode': mode,
+        'resolution': f"{width}x{height}",
+        'steps': len(indices),
+        'frames': writer.frames,
+        'seconds': round(total, 3),
+        'fps': round(writer.frames / total, 2) if total > 0 else None,
+        'layout_s': round(timings['layout'], 3),
+        'draw_s': round(timings['draw'], 3),
+        'encode_s': round(timings['encode'], 3),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+def benchmark(years, modes, max_steps=None, output=None):
+    cases = [(year, mode, max_steps) for year in years for mode in modes]
+
+    # One fresh process per case so peak RSS is per season/mode
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(processes=1, maxtasksperchild=1) as pool:
+        results = pool.map(run_case, cases, chunksize=1)
+
+    print(f"\n{'Year':<6} | {'Mode':<6} | {'Frames':>6} | {'FPS':>7} | {'Layout':>7} | {'Draw':>7} | {'Encode':>7} | {'Peak RSS':>9}")
+    print("-" * 78)
+    for r in results:
+        if 'error' in r:
+            print(f"{r['year']:<6} | {r['mode']:<6} | {r['error']}")
+            continue
+        print(f"{r['year']:<6} | {r['mode']:<6} | {r['frames']:>6} | {r['fps']:>7} | "
+              f"{r['layout_s']:>6}s | {r['draw_s']:>6}s | {r['encode_s']:>6}s | {r['peak_rss_mb']:>6} MB")
+
+    path = write_results('render', results, output)
+    print(f"\nResults saved to {path}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the standings render path")
+    parser.add_argument("--years", type=int, nargs='+', default=DEFAULT_YEARS, help=f"Seasons to render (default: {DEFAULT_YEARS})")
+    parser.add_argument("--modes", nargs='+', choices=['draft', 'full'], default=['draft', 'full'], help="Render profiles to run")
+    parser.add_argument("--max-steps", type=int, help="Only render the first N steps of each season")
+    parser.add_argument("--output", help="Results path (default: logs/benchmarks/render_{commit}.json)")
+    args = parser.parse_args()
+
+    benchmark(args.years, args.modes, args.max_steps, args.output)
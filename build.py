@@ -0,0 +1,404 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+"""
+build.py
+
+Make-like build of every pipeline artifact, rebuilding only what is stale.
+- The graph per season: data (downloaded `standings_history_{year}.json`) ->
+  patch (team colors applied in place) -> constructors / keyframes / animation,
+  constructors -> series (the per-driver chart series of both views).
+  Every patch also depends on the shared fallback map (`fallback_teams.json`); the manifest
+  (`data/seasons.json`, exported from `state_store.py`) depends on the set of
+  downloaded seasons.
+- Each built node records in `.build/state.json` the content hashes of its inputs,
+  the hash of the code that produces it and the hash of its output. A node is
+  stale when any of these changed or its output is missing.
+- Team colors enter patch/render nodes as a per-season signature (the resolved
+  color of every team in that season), so editing one team's color only
+  re-patches and re-renders the seasons that team raced in.
+- Independent stale nodes run in parallel worker processes.
+- Downloaded data is a source: it is only fetched when missing (or `--refresh`).
+"""
+
+from build_fallbacks import load_fallbacks, base_fallbacks, resolve_new_team, save_fallbacks
+from perf_utils import add_profile_args, profiled
+from team_colors import HISTORICAL_COLORS, TeamColorResolver
+
+STATE_PATH = '.build/state.json'
+
+# Bump to invalidate every recorded artifact (e.g. after changing the build rules)
+BUILD_VERSION = 1
+
+# Code that shapes each kind of artifact. Team color *data* is deliberately not
+# listed; it reaches patch/render nodes through their color signature instead.
+CODE_FILES = {
+    'data': [],
+    'fallbacks': ['build_fallbacks.py', 'update_colors.py'],
+    'patch': ['update_colors.py'],
+    'constructors': ['constructors_history.py'],
+    'series': ['season_series.py'],
+    'manifest': ['state_store.py'],
+    'keyframes': ['animate_standings.py'],
+    'animation': ['animate_standings.py'],
+}
+KINDS = list(CODE_FILES)
+
+def data_path(year):
+    return f'data/standings_history_{year}.json'
+
+def output_path(kind, year=None):
+    if kind in ('data', 'patch'):
+        return data_path(year)
+    if kind == 'fallbacks':
+        return 'fallback_teams.json'
+    if kind == 'manifest':
+        return 'data/seasons.json'
+    if kind == 'constructors':
+        return f'data/constructors_history_{year}.json'
+    if kind == 'series':
+        return f'data/series_{year}.json'
+    if kind == 'keyframes':
+        return f'data/keyframes_{year}.json'
+    return f'animations/f1_{year}_standings.mp4'
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return hash_bytes(f.read())
+
+def hash_json(value):
+    return hash_bytes(json.dumps(value, sort_keys=True).encode('utf-8'))
+
+def code_version(kind):
+    digest = hashlib.sha256(f'build-{BUILD_VERSION}-{kind}'.encode('utf-8'))
+    for path in CODE_FILES[kind]:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def downloaded_years():
+    years = []
+    for path in glob.glob('data/standings_history_*.json'):
+        match = re.search(r'(\d{4})', os.path.basename(path))
+        if match:
+            years.append(int(match.group(1)))
+    return sorted(years)
+
+def load_state():
+    if os.path.exists(STATE_PATH):
+        try:
+            with open(STATE_PATH, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print(f"Could not read {STATE_PATH}, treating everything as stale.")
+    return {}
+
+def save_state(state):
+    directory = os.path.dirname(STATE_PATH)
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    tmp = STATE_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+# --- Graph ---
+
+def build_graph(years, targets):
+    """
+    Returns {node id: node} for `targets` (kinds) over `years`, plus every node they
+    depend on. Node ids look like 'patch:1998' or 'manifest'.
+    """
+    all_years = sorted(set(years) | set(downloaded_years()))
+    nodes = {}
+
+    def add(kind, year=None, deps=()):
+        node_id = kind if year is None else f'{kind}:{year}'
+        nodes[node_id] = {'id': node_id, 'kind': kind, 'year': year, 'deps': list(deps)}
+        return node_id
+
+    for year in all_years:
+        add('data', year)
+    add('fallbacks', deps=[f'data:{y}' for y in all_years])
+    add('manifest', deps=[f'data:{y}' for y in all_years])
+    for year in years:
+        add('patch', year, [f'data:{year}', 'fallbacks'])
+        add('constructors', year, [f'patch:{year}'])
+        add('series', year, [f'constructors:{year}'])
+        add('keyframes', year, [f'patch:{year}'])
+        add('animation', year, [f'patch:{year}'])
+
+    # Keep the requested kinds and everything they need
+    wanted = set()
+    pending = [n for n in nodes.values() if n['kind'] in targets and (n['year'] is None or n['year'] in years)]
+    while pending:
+        node = pending.pop()
+        if node['id'] in wanted:
+            continue
+        wanted.add(node['id'])
+        pending.extend(nodes[d] for d in node['deps'])
+    return {node_id: node for node_id, node in nodes.items() if node_id in wanted}
+
+class InputCache:
+    """Per-run memo of file hashes, season team sets and the color resolver."""
+    def __init__(self):
+        self._teams = {}
+        self._resolver = None
+        self._resolver_key = None
+
+    def season_teams(self, year):
+        path = data_path(year)
+        digest = hash_file(path)
+        cached = self._teams.get(year)
+        if cached is None or cached[0] != digest:
+            teams = set()
+            if digest is not None:
+                with open(path, 'r') as f:
+                    for step in json.load(f):
+                        teams.update(d.get('team') for d in step.get('standings', []) if d.get('team'))
+            cached = (digest, sorted(teams))
+            self._teams[year] = cached
+        return cached[1]
+
+    def resolver(self):
+        key = hash_file('fallback_teams.json')
+        if self._resolver is None or key != self._resolver_key:
+            self._resolver = TeamColorResolver(load_fallbacks())
+            self._resolver_key = key
+        return self._resolver
+
+    def color_signature(self, year):
+        resolver = self.resolver()
+        return hash_json([[team, resolver.resolve(team, year)] for team in self.season_teams(year)])
+
+def node_inputs(node, cache):
+    """Current input hashes of `node` (computed after its dependencies were built)."""
+    kind, year = node['kind'], node['year']
+    inputs = {'code': code_version(kind)}
+    if kind == 'fallbacks':
+        teams = sorted({t for y in downloaded_years() for t in cache.season_teams(y)})
+        inputs['teams'] = hash_json(teams)
+        inputs['historical'] = hash_json(HISTORICAL_COLORS)
+    elif kind == 'manifest':
+        inputs['years'] = downloaded_years()
+    elif kind == 'patch':
+        inputs['colors'] = cache.color_signature(year)
+    elif kind in ('constructors', 'keyframes', 'animation'):
+        inputs['data'] = hash_file(data_path(year))
+        inputs['colors'] = cache.color_signature(year)
+    elif kind == 'series':
+        inputs['data'] = hash_file(data_path(year))
+        inputs['constructors'] = hash_file(output_path('constructors', year))
+        inputs['colors'] = cache.color_signature(year)
+    return inputs
+
+def stale_reason(node, inputs, record, refresh):
+    """Why `node` must be rebuilt, or None if it is up to date."""
+    kind, path = node['kind'], output_path(node['kind'], node['year'])
+    if not os.path.exists(path):
+        return 'missing'
+    if kind == 'data':
+        # Sources: fetched only when missing or explicitly refreshed
+        return 'refresh' if node['year'] in refresh else None
+    if record is None:
+        return 'never built'
+    changed = sorted(k for k in inputs if record['inputs'].get(k) != inputs[k])
+    if changed:
+        return 'changed ' + ', '.join(changed)
+    if record.get('output') != hash_file(path):
+        return 'output modified'
+    return None
+
+# --- Actions (run in worker processes) ---
+
+def run_node(kind, year, payload=None):
+    start = time.perf_counter()
+    if kind == 'data':
+        from prepare_web_data import prepare_data
+        from state_store import StateStore
+        store = StateStore()
+        store.start_season(year)
+        try:
+            success = prepare_data(year)
+        except Exception as e:
+            store.finish_season(year, 'failed', time.perf_counter() - start, error=str(e))
+            raise
+        if not success:
+            store.finish_season(year, 'failed', time.perf_counter() - start, error='prepare_data returned False')
+            raise RuntimeError(f"prepare_data({year}) failed")
+        store.complete_from_file(year, time.perf_counter() - start)
+
+    elif kind == 'fallbacks':
+        current = load_fallbacks()
+        fallbacks = base_fallbacks(current)
+        resolver = TeamColorResolver(fallbacks)
+        new_teams = {team: resolve_new_team(team, resolver) for team in payload if team not in fallbacks}
+        from update_colors import merge_new_teams
+        merge_new_teams(fallbacks, [new_teams])
+        if fallbacks != current:
+            save_fallbacks(fallbacks)
+
+    elif kind == 'patch':
+        import update_colors
+        update_colors.init_worker(load_fallbacks())
+        report = update_colors.process_season(data_path(year))
+        if 'error' in report:
+            raise RuntimeError(report['error'])
+
+    elif kind == 'manifest':
+        from state_store import StateStore
+        StateStore().export_manifest(output_path('manifest'))
+
+    elif kind == 'constructors':
+        from constructors_history import save_constructors
+        with open(data_path(year), 'r') as f:
+            save_constructors(json.load(f), year)
+
+    elif kind == 'series':
+        from season_series import derive
+        derive([year])
+
+    elif kind == 'keyframes':
+        import animate_standings
+        animate_standings.animate(year, export=True)
+
+    elif kind == 'animation':
+        import animate_standings
+        animate_standings.animate(year)
+
+    return time.perf_counter() - start
+
+# --- Scheduler ---
+
+def build(years=None, targets=None, workers=None, force=False, refresh=(), dry_run=False):
+    """
+    Brings `targets` (kinds, default: everything but animation when ffmpeg is
+    missing) for `years` (default: every downloaded season) up to date.
+    Returns {node id: 'built' | 'fresh' | 'failed' | 'skipped'}.
+    """
+    start = time.perf_counter()
+    years = sorted(years or downloaded_years())
+    refresh = set(refresh)
+    if targets is None:
+        targets = [k for k in KINDS if k != 'animation' or shutil.which('ffmpeg')]
+        if 'animation' not in targets:
+            print("ffmpeg not found: skipping animation targets.")
+
+    nodes = build_graph(years, set(targets))
+    state = load_state()
+    cache = InputCache()
+    results = {}
+    done = set()
+    inflight = {}
+
+    def resolved(node_id):
+        # Failed and skipped nodes are finished too: their dependents get skipped
+        return node_id in done or results.get(node_id) in ('failed', 'skipped')
+
+    def ready(node):
+        return node['id'] not in results and node['id'] not in inflight.values() and \
+            all(resolved(d) for d in node['deps'])
+
+    pool = ProcessPoolExecutor(max_workers=workers) if not dry_run else None
+    try:
+        while len(results) < len(nodes):
+            # Schedule every node whose dependencies are finished
+            progressed = False
+            for node in nodes.values():
+                if not ready(node):
+                    continue
+                progressed = True
+                if any(results.get(d) in ('failed', 'skipped') for d in node['deps']):
+                    results[node['id']] = 'skipped'
+                    print(f"[build] {node['id']:<16} skipped (a dependency failed)")
+                    continue
+
+                inputs = node_inputs(node, cache)
+                reason = 'forced' if force and node['kind'] != 'data' else \
+                    stale_reason(node, inputs, state.get(node['id']), refresh)
+                if reason is None:
+                    results[node['id']] = 'fresh'
+                    done.add(node['id'])
+                    continue
+
+                print(f"[build] {node['id']:<16} stale ({reason})")
+                if dry_run:
+                    # Pretend it was built so dependents are reported too
+                    results[node['id']] = 'stale'
+                    done.add(node['id'])
+                    continue
+
+                payload = None
+                if node['kind'] == 'fallbacks':
+                    payload = sorted({t for y in downloaded_years() for t in cache.season_teams(y)})
+                future = pool.submit(run_node, node['kind'], node['year'], payload)
+                inflight[future] = node['id']
+
+            if not inflight:
+                if progressed:
+                    continue
+                # Nothing running and nothing schedulable: the rest can never run
+                for node_id in nodes:
+                    results.setdefault(node_id, 'skipped')
+                break
+
+            finished, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                node_id = inflight.pop(future)
+                node = nodes[node_id]
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    print(f"[build] {node_id:<16} FAILED: {e}")
+                    results[node_id] = 'failed'
+                    continue
+
+                # Inputs are re-read after the build: the recorded hashes are the ones it saw
+                state[node_id] = {
+                    'inputs': node_inputs(node, cache),
+                    'output': hash_file(output_path(node['kind'], node['year'])),
+                    'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'seconds': round(seconds, 3),
+                }
+                save_state(state)
+                results[node_id] = 'built'
+                done.add(node_id)
+                print(f"[build] {node_id:<16} built in {seconds:.2f}s")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    counts = {}
+    for status in results.values():
+        counts[status] = counts.get(status, 0) + 1
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(f"\nBuild finished in {time.perf_counter() - start:.2f}s: {summary}.")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild stale data, colors, manifest and animations")
+    parser.add_argument("targets", nargs="*", help=f"Artifact kinds to bring up to date: {', '.join(KINDS)} (default: all)")
+    parser.add_argument("--years", type=int, nargs='+', help="Seasons to build (default: every downloaded season)")
+    parser.add_argument("--workers", type=int, help="Parallel worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Rebuild every selected node (downloads excepted)")
+    parser.add_argument("--refresh", type=int, nargs='+', default=[], help="Re-download these seasons")
+    parser.add_argument("--dry-run", action="store_true", help="Only list stale nodes")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'build'):
+        results = build(args.years, args.targets or None, args.workers, args.force, args.refresh, args.dry_run)
+    sys.exit(1 if 'failed' in results.values() else 0)
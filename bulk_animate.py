@@ -1,7 +1,14 @@
+import argparse
 import subprocess
 import sys
 
+from perf_utils import add_profile_args, profile_args
+
 def main():
+    parser = argparse.ArgumentParser(description="Render the standings animation for a range of seasons")
+    add_profile_args(parser) # Forwarded: each season is profiled in its own process
+    args = parser.parse_args()
+
     start_year = 2021
     end_year = 2025
     
@@ -9,7 +16,7 @@ def main():
     
     for year in range(start_year, end_year + 1):
         print(f"\n[Bulk Animate] Processing {year}...")
-        cmd = [sys.executable, "animate_standings.py", "--year", str(year)]
+        cmd = [sys.executable, "animate_standings.py", "--year", str(year)] + profile_args(args)
         
         try:
             subprocess.run(cmd, check=True)
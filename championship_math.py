@@ -0,0 +1,201 @@
+import argparse
+import glob
+import json
+import os
+import re
+
+import numpy as np
+
+"""
+championship_math.py
+
+Precomputes when each drivers' title was decided, so no viewer has to ship the
+calendar or recompute it per frame.
+- `remainingPoints` (per step): the most points one driver can still score in the
+  season's remaining Races and Sprints, under that season's rules (race win, the
+  2019-2024 fastest-lap point, the 2014 double-points finale, sprint win). A
+  driver's maximum reachable total is `points + remainingPoints`.
+- `titleStatus` (per standings entry): 'clinched' for the champion once nobody can
+  catch them, 'eliminated' once a driver can no longer reach the leader. Absent =
+  still in contention.
+- One step x entry matrix per season; leader, runner-up and statuses come from
+  array ops over all steps at once.
+`prepare_data` annotates every season it writes (with the rest of the calendar
+for a season in progress); this CLI annotates files that already exist.
+Ties on the maximum count as in contention (countback is not projected). The CLI
+checks each file against its calendar (a truncated file is annotated as of its
+last step); without a calendar only a file the state store shows was fetched in
+full after its season is annotated. Files are only rewritten when they change.
+"""
+
+from perf_utils import add_profile_args, profiled, timed
+from rescore import POINTS_SYSTEMS, SPRINT_SYSTEMS
+
+FASTEST_LAP_YEARS = range(2019, 2025)
+DOUBLE_POINTS_ROUNDS = {(2014, 19)} # Abu Dhabi 2014 paid double
+
+def race_system(year):
+    return '2010' if year >= 2010 else '2003' if year >= 2003 else '1991'
+
+def session_max_points(year, round_num, session):
+    """Most points one driver can score in a session of `year`."""
+    if session == 'Sprint':
+        table = SPRINT_SYSTEMS['2021' if year == 2021 else '2022']
+        return table[0]
+    points = POINTS_SYSTEMS[race_system(year)][0]
+    if (year, int(round_num)) in DOUBLE_POINTS_ROUNDS:
+        points *= 2
+    if year in FASTEST_LAP_YEARS:
+        points += 1
+    return points
+
+def upcoming_sessions(schedule, history):
+    """
+    (round, session) pairs of a FastF1 event schedule not recorded in `history` yet:
+    the Race of a round published after its Sprint, then every later round.
+    """
+    recorded = {(int(step['round']), step['session']) for step in history}
+    last_round = max((r for r, _ in recorded), default=0)
+    upcoming = []
+    for _, event in schedule[schedule['RoundNumber'] > 0].iterrows():
+        round_num = int(event['RoundNumber'])
+        if round_num < last_round:
+            continue
+        sessions = ['Sprint', 'Race'] if 'sprint' in str(event.get('EventFormat', '')).lower() else ['Race']
+        upcoming.extend((round_num, s) for s in sessions if (round_num, s) not in recorded)
+    return upcoming
+
+def remaining_points(history, year, upcoming=(), max_points=None):
+    """
+    Points still available after each step (step sessions after it plus `upcoming`).
+    `max_points(round, session)` overrides the rules of `year` (e.g. a what-if system).
+    """
+    max_points = max_points or (lambda round_num, session: session_max_points(year, round_num, session))
+    available = np.array([max_points(step['round'], step['session']) for step in history], dtype=np.float64)
+    after = np.cumsum(available[::-1])[::-1] - available
+    return after + sum(max_points(r, s) for r, s in upcoming)
+
+def title_status(history, remaining):
+    """
+    (clinched, eliminated) step x entry boolean matrices, entries in standings order
+    (padded to the longest step).
+    """
+    n_steps = len(history)
+    width = max((len(step['standings']) for step in history), default=0)
+    points = np.full((n_steps, width), -np.inf)
+    listed = np.zeros((n_steps, width), dtype=bool)
+    rank = np.full((n_steps, width), np.iinfo(np.int32).max)
+    dsq = np.zeros((n_steps, width), dtype=bool)
+    for i, step in enumerate(history):
+        for j, d in enumerate(step['standings']):
+            points[i, j] = float(d['points'])
+            listed[i, j] = True
+            rank[i, j] = int(d.get('rank') or 0) or np.iinfo(np.int32).max
+            dsq[i, j] = d.get('rankDisplay') == 'DSQ'
+
+    eligible = listed & ~dsq
+    scores = np.where(eligible, points, -np.inf)
+    top_two = -np.sort(-np.pad(scores, ((0, 0), (0, 1)), constant_values=-np.inf), axis=1)[:, :2]
+    leader, runner_up = top_two[:, 0:1], top_two[:, 1:2]
+    remaining = np.asarray(remaining, dtype=np.float64)[:, None]
+
+    # Clear of the field by more than the points left; after the last session a
+    # tie on points goes to the countback (the best listed rank)
+    best_rank = np.where(eligible, rank, np.iinfo(np.int32).max).min(axis=1, keepdims=True)
+    clinched = eligible & (scores == leader) & (leader > runner_up + remaining)
+    clinched |= eligible & (remaining == 0) & (rank == best_rank) & ~clinched.any(axis=1, keepdims=True)
+
+    eliminated = listed & ((scores + remaining < leader) | dsq | (clinched.any(axis=1, keepdims=True) & ~clinched))
+    return clinched, eliminated
+
+@timed('title math')
+def annotate(history, year, upcoming=(), max_points=None):
+    """
+    Adds `remainingPoints` to every step and `titleStatus` to decided entries (in place).
+    Returns the index of the step where the title was clinched, or None.
+    """
+    if not history:
+        return None
+    remaining = remaining_points(history, year, upcoming, max_points)
+    clinched, eliminated = title_status(history, remaining)
+    for i, step in enumerate(history):
+        step['remainingPoints'] = round(float(remaining[i]), 2)
+        for j, d in enumerate(step['standings']):
+            # Set in place (key order unchanged), so a re-run leaves the file identical
+            status = 'clinched' if clinched[i, j] else 'eliminated' if eliminated[i, j] else None
+            if status:
+                d['titleStatus'] = status
+            else:
+                d.pop('titleStatus', None)
+    decided = np.flatnonzero(clinched.any(axis=1))
+    return int(decided[0]) if len(decided) else None
+
+def season_upcoming(year, history):
+    """
+    Sessions of `year` not in `history`, from its (cached) calendar. Without a
+    calendar the file is only taken as complete when the state store shows it was
+    fetched in full (`fetched_in_full`); otherwise returns None (not annotated).
+    """
+    try:
+        import fastf1
+        fastf1.Cache.enable_cache('f1_cache')
+        return upcoming_sessions(fastf1.get_event_schedule(year), history)
+    except Exception as e:
+        if fetched_in_full(year, history):
+            print(f"No calendar for {year} ({e}); its file was fetched after the season, taking it as complete.")
+            return []
+        print(f"Skipping {year}: could not load its calendar ({e}) and cannot tell if its file is complete")
+        return None
+
+def fetched_in_full(year, history):
+    """
+    True when the state store recorded a completed fetch of `year` made after the
+    season's year, with as many steps as `history` (so the file is not truncated).
+    """
+    from state_store import STATE_DB, StateStore
+    if not os.path.exists(STATE_DB):
+        return False
+    store = StateStore()
+    try:
+        season = store.season(year)
+    finally:
+        store.close()
+    return bool(season and season['status'] == 'complete' and season['fetched_at']
+                and int(season['fetched_at'][:4]) > year and season['steps'] == len(history))
+
+def describe(history, clinched_at):
+    if clinched_at is None:
+        return "title undecided"
+    step = history[clinched_at]
+    champion = next(d['name'] for d in step['standings'] if d.get('titleStatus') == 'clinched')
+    return f"{champion} clinched at R{step['round']} {step['session']} ({step['eventName']})"
+
+def annotate_files(years=None):
+    """Annotates every existing drivers' file (or only `years`) in place."""
+    for path in sorted(glob.glob('data/standings_history_*.json')):
+        match = re.fullmatch(r'standings_history_(\d{4})\.json', os.path.basename(path))
+        if not match or (years and int(match.group(1)) not in years):
+            continue
+        year = int(match.group(1))
+        with open(path, 'r') as f:
+            raw = f.read()
+        history = json.loads(raw)
+        upcoming = season_upcoming(year, history)
+        if not history or upcoming is None:
+            continue
+        clinched_at = annotate(history, year, upcoming)
+        # Only rewritten when the annotations changed
+        output = json.dumps(history, indent=2)
+        if output != raw:
+            with open(path, 'w') as f:
+                f.write(output)
+        print(f"{year}: {describe(history, clinched_at)}{'' if output != raw else ' (unchanged)'}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Annotate season files with points still available and title status")
+    parser.add_argument("--years", type=int, nargs='+', help="Seasons to annotate (default: all downloaded)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'championship_math'):
+        annotate_files(args.years)
@@ -0,0 +1,163 @@
+import argparse
+import glob
+import json
+import os
+import re
+
+import numpy as np
+
+"""
+constructors_history.py
+
+Constructors' championship timeline derived from the drivers' history (no API calls).
+- Each step's per-driver point deltas (vs. the previous step) are credited to the
+  team the driver is listed with at that step, summed per team with one
+  `np.bincount` over the whole season and accumulated over the steps.
+- Output `data/constructors_history_{year}.json` has the same step shape as
+  `standings_history_{year}.json`: `name` / `lookupKey` / `team` are the team,
+  `drivers` lists who scored for it so far, and `raceResults` holds the team's
+  best result of the session.
+- `prepare_data` and `ingest_kaggle` write it next to every season; this CLI
+  derives it for files that already exist.
+Note: this is the sum of the drivers' points. Seasons whose official constructors'
+table used other rules (e.g. only the best car scoring before 1979, the 2007
+McLaren exclusion) will differ from it.
+"""
+
+from driver_names import normalize_name
+from perf_utils import add_profile_args, profiled, timed
+from team_colors import get_resolver
+
+def constructors_path(year):
+    return f'data/constructors_history_{year}.json'
+
+def team_key(team):
+    return "_".join(normalize_name(team).split())
+
+def best_result(results):
+    """Best classified position among a team's results, else its first non-classified outcome."""
+    classified = [r for r in results if str(r).isdigit()]
+    if classified:
+        return min(classified, key=int)
+    return results[0] if results else None
+
+def constructors_history(history, year):
+    """Builds the constructors' steps of a season from its drivers' steps."""
+    n_steps = len(history)
+    drivers = {}
+    teams = {}
+    for step in history:
+        for d in step['standings']:
+            drivers.setdefault(d.get('lookupKey') or d['name'], len(drivers))
+            teams.setdefault(d.get('team') or 'Unknown', len(teams))
+    team_names = list(teams)
+
+    # step x driver points / team index (-1 = absent)
+    points = np.full((n_steps, len(drivers)), np.nan)
+    team_of = np.full((n_steps, len(drivers)), -1, dtype=np.intp)
+    for i, step in enumerate(history):
+        for d in step['standings']:
+            j = drivers[d.get('lookupKey') or d['name']]
+            points[i, j] = float(d['points'])
+            team_of[i, j] = teams[d.get('team') or 'Unknown']
+
+    # Point deltas per step (a driver missing from a step keeps their last total)
+    filled = points.copy()
+    for i in range(1, n_steps):
+        missing = np.isnan(filled[i])
+        filled[i, missing] = filled[i - 1, missing]
+    filled = np.nan_to_num(filled)
+    delta = np.diff(filled, axis=0, prepend=np.zeros((1, len(drivers))))
+    delta[team_of < 0] = 0.0
+
+    # Grouped sum per (step, team) in one pass, then the running total
+    flat = (np.arange(n_steps)[:, None] * len(teams) + np.maximum(team_of, 0)).ravel()
+    gained = np.bincount(flat, weights=delta.ravel(), minlength=n_steps * len(teams)).reshape(n_steps, len(teams))
+    totals = np.cumsum(gained, axis=0)
+
+    # Teams listed so far, and who scored for them
+    seen = np.maximum.accumulate((team_of[:, :, None] == np.arange(len(teams))).any(axis=1), axis=0)
+    scorers = {}
+
+    resolver = get_resolver()
+    keys = list(drivers)
+    steps = []
+    previous_rank = {}
+    for i, step in enumerate(history):
+        api_colors = {}
+        results = {}
+        for d in step['standings']:
+            team = d.get('team') or 'Unknown'
+            if d.get('color') and d.get('colorSource') != 'fallback':
+                api_colors.setdefault(team, d['color'])
+            result = (step.get('raceResults') or {}).get(d.get('lookupKey'))
+            if result is not None:
+                results.setdefault(team, []).append(result)
+        for j in np.nonzero(delta[i] > 0)[0]:
+            names = scorers.setdefault(team_names[team_of[i, j]], [])
+            name = next(d['name'] for d in step['standings'] if (d.get('lookupKey') or d['name']) == keys[j])
+            if name not in names:
+                names.append(name)
+
+        # Rank on points, ties keep the previous order
+        listed = np.nonzero(seen[i])[0]
+        order = sorted(listed, key=lambda t: (-totals[i, t], previous_rank.get(t, len(teams)), team_names[t]))
+        standings = []
+        for rank, t in enumerate(order, 1):
+            team = team_names[t]
+            color = api_colors.get(team)
+            entry = {
+                'name': team,
+                'firstName': '',
+                'lookupKey': team_key(team),
+                'points': round(float(totals[i, t]), 2),
+                'team': team,
+                'color': color or resolver.resolve(team, year),
+                'rank': rank,
+                'rankDisplay': str(rank),
+                'drivers': list(scorers.get(team, [])),
+            }
+            if not color:
+                entry['colorSource'] = 'fallback'
+            standings.append(entry)
+            previous_rank[t] = rank
+
+        steps.append({
+            'round': step['round'],
+            'eventName': step['eventName'],
+            'session': step['session'],
+            'date': step['date'],
+            'location': step['location'],
+            'standings': standings,
+            'raceResults': {team_key(team): best_result(r) for team, r in results.items()},
+        })
+    return steps
+
+@timed('json write')
+def save_constructors(history, year):
+    steps = constructors_history(history, year)
+    filename = constructors_path(year)
+    with open(filename, 'w') as f:
+        json.dump(steps, f, indent=2)
+    print(f"Saved {filename}")
+    return steps
+
+def derive(years=None):
+    """Writes the constructors' file for every existing drivers' file (or only `years`)."""
+    for path in sorted(glob.glob('data/standings_history_*.json')):
+        match = re.search(r'(\d{4})', os.path.basename(path))
+        if not match or (years and int(match.group(1)) not in years):
+            continue
+        with open(path, 'r') as f:
+            history = json.load(f)
+        if history:
+            save_constructors(history, int(match.group(1)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Derive constructors' standings from the drivers' history files")
+    parser.add_argument("--years", type=int, nargs='+', help="Seasons to derive (default: all downloaded)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'constructors_history'):
+        derive(args.years)
@@ -1,4 +1,6 @@
 import argparse
+import contextlib
+import fcntl
 import os
 import json
 import time
@@ -9,41 +11,100 @@ download_all_seasons.py
 
 Orchestrates the bulk download of historical F1 data.
 - Iterates through a specified range of years (default 1950-2025).
-- Checks `data/download_progress.json` to skip already completed years.
+- Checks the state store (`state_store.py`) to skip already completed years and
+  records each season's status, attempts and timings there.
 - Calls `prepare_web_data.py` to fetch and process each season.
 - Implements rate-limiting and pacing strategies to stay within FastF1/ergast API limits.
+- Holds `logs/download.lock` while running, so a supervisor (`finalize_downloads.py`)
+  can wait for it without polling.
 """
 
 from prepare_web_data import prepare_data, RateLimitExceededError
+from perf_utils import add_profile_args, profiled
+from state_store import StateStore
 
-def download_seasons(start_year, end_year, force=False):
-    print(f"Downloading data for seasons {start_year} to {end_year}...")
+LOCK_PATH = 'logs/download.lock'
+
+# Target: Limit to < 500 calls / hour.
+# ~40 calls per season.
+# 12 seasons per hour = 480 calls.
+# 60 mins / 12 = 5 mins per season.
+TARGET_CYCLE_TIME = 600
+
+@contextlib.contextmanager
+def download_lock(path=LOCK_PATH, wait=True):
+    """
+    Exclusive lock shared by every process that downloads data.
+    With `wait`, blocks until the current holder releases it (the kernel wakes us,
+    no polling); otherwise raises BlockingIOError if it is held.
+    """
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(path, 'a+') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        try:
+            # Holder's PID, for humans
+            f.seek(0)
+            f.truncate()
+            f.write(str(os.getpid()))
+            f.flush()
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+class RateBudget:
+    """
+    Pacing shared by every download in a run (first pass and re-downloads).
+    A season that hit the API (took > 10s) reserves a full `cycle_time` slot; a cached
+    one only a short pause. The wait happens before the next fetch, so nothing sleeps
+    after the last season.
+    """
+    def __init__(self, cycle_time=TARGET_CYCLE_TIME):
+        self.cycle_time = cycle_time
+        self.next_allowed = 0.0
+
+    def wait(self):
+        sleep_time = self.next_allowed - time.time()
+        if sleep_time > 0:
+            print(f"PACING: Sleeping for {sleep_time:.1f}s to respect rate limit...")
+            time.sleep(sleep_time)
+
+    def record(self, start_time, elapsed):
+        if elapsed > 10:
+            # Assume API calls were made
+            self.next_allowed = start_time + self.cycle_time
+        else:
+            print("Processing was likely cached or fast. Short pause.")
+            self.next_allowed = time.time() + 2
+
+def download_seasons(start_year, end_year, force=False, years=None, budget=None, on_complete=None):
+    """
+    Downloads seasons `start_year`..`end_year` (or the explicit list `years`).
+    `budget` is a RateBudget shared with other calls in the same run; `on_complete`
+    is called as on_complete(year, status) with status 'downloaded', 'skipped',
+    'failed' or 'rate_limited'. Returns False if the run stopped on a rate limit.
+    """
+    if years is None:
+        years = range(start_year, end_year + 1)
+        print(f"Downloading data for seasons {start_year} to {end_year}...")
+    else:
+        print(f"Downloading data for seasons {', '.join(map(str, years))}...")
+    if budget is None:
+        budget = RateBudget()
+    notify = on_complete or (lambda year, status: None)
     
     # Ensure data directory exists
     if not os.path.exists('data'):
         os.makedirs('data')
 
-    manifest_path = 'data/seasons.json'
-    progress_path = 'data/download_progress.json'
-    
-    # Load progress
-    completed_years = []
-    if os.path.exists(progress_path):
-        try:
-            with open(progress_path, 'r') as f:
-                completed_years = json.load(f)
-        except:
-             print("Could not load download_progress.json, starting fresh.")
-
-    # Target: Limit to < 500 calls / hour.
-    # ~40 calls per season.
-    # 12 seasons per hour = 480 calls.
-    # 60 mins / 12 = 5 mins per season.
-    TARGET_CYCLE_TIME = 600 
-    
-    for year in range(start_year, end_year + 1):
-        if year in completed_years and not force:
-            print(f"Skipping {year}: Already marked as complete in progress log.")
+    # Season status lives in the state store (imports the old download_progress.json once)
+    store = StateStore()
+
+    for year in years:
+        if store.is_complete(year) and not force:
+            print(f"Skipping {year}: Already marked as complete in the state store.")
+            notify(year, 'skipped')
             continue
 
         filename = f'data/standings_history_{year}.json'
@@ -59,84 +120,78 @@ def download_seasons(start_year, end_year, force=False):
                     should_download = False
                     
                     # Mark as complete if not already
-                    if year not in completed_years:
-                        completed_years.append(year)
-                        with open(progress_path, 'w') as f:
-                            json.dump(completed_years, f)
+                    store.complete_season(year, data, fetched=False)
+                    notify(year, 'skipped')
                 else:
                     print(f"Retrying {year}: Exists but only has {len(data)} rounds (incomplete).")
             except Exception as e:
                 print(f"Retrying {year}: File corrupted or unreadable ({e})")
         
         if should_download:
+            budget.wait()
             print(f"\n--- Processing {year} ---")
             start_time = time.time()
+            store.start_season(year)
             
             try:
                 success = prepare_data(year)
                 
-                if success:
-                    # Update manifest incrementally
-                    current_seasons = []
-                    if os.path.exists(manifest_path):
-                        with open(manifest_path, 'r') as f:
-                            try:
-                                current_seasons = json.load(f)
-                            except:
-                                pass
-                    
-                    if year not in current_seasons:
-                        current_seasons.append(year)
-                        current_seasons.sort(reverse=True)
-                        with open(manifest_path, 'w') as f:
-                            json.dump(current_seasons, f)
-                    
-                    # Mark as complete
-                    if year not in completed_years:
-                        completed_years.append(year)
-                        with open(progress_path, 'w') as f:
-                            json.dump(completed_years, f)
-                    
-                    print(f"Updated manifest and progress for {year}")
-                
                 # Check elapsed time
                 elapsed = time.time() - start_time
-                
+
+                if success:
+                    # Record the season and its rounds, then re-export the manifest
+                    store.complete_from_file(year, elapsed)
+                    store.export_manifest()
+                    print(f"Updated manifest and state for {year}")
+                else:
+                    store.finish_season(year, 'failed', elapsed, error='prepare_data returned False')
+
                 # If we actually did work (downloaded content), pace ourselves
                 # prepare_data returns True if it ran. If it was cached inside prepare_data (fastf1 cache),
                 # elapsed time will be small.
-                
+
                 print(f"Year {year} processed in {elapsed:.2f}s")
-                
-                if elapsed > 10: 
-                    # Assume API calls were made
-                    sleep_time = max(0, TARGET_CYCLE_TIME - elapsed)
-                    print(f"PACING: Sleeping for {sleep_time:.1f}s to respect rate limit (~8 min cycle)...")
-                    if sleep_time > 0:
-                        time.sleep(sleep_time)
-                else:
-                    print("Processing was likely cached or fast. Short sleep.")
-                    time.sleep(2)
-                    
+                budget.record(start_time, elapsed)
+                notify(year, 'downloaded' if success else 'failed')
+
             except RateLimitExceededError as e:
                 print(f"\n!!! RATE LIMIT HIT !!!")
                 print(f"Stopper at year {year}. Details: {e}")
                 print("Exiting safely. Resume later by running this script again.")
-                return # Exit function
-                
+                store.finish_season(year, 'rate_limited', time.time() - start_time, error=str(e))
+                notify(year, 'rate_limited')
+                return False # Exit function
+
             except Exception as e:
                 print(f"Failed to process {year}: {e}")
-                time.sleep(5) # Short sleep on error
+                store.finish_season(year, 'failed', time.time() - start_time, error=str(e))
+                budget.next_allowed = time.time() + 5 # Short pause on error
+                notify(year, 'failed')
+
+    return True
 
 if __name__ == '__main__':
     current_year = datetime.datetime.now().year
-    
+
     parser = argparse.ArgumentParser(description="Download F1 data for multiple seasons")
     parser.add_argument("--start", type=int, default=1991, help="Start year (default: 1991)")
     parser.add_argument("--end", type=int, default=current_year, help=f"End year (default: {current_year})")
     
     parser.add_argument("--force", action="store_true", help="Force download even if file exists")
+    parser.add_argument("--archive", help="Kaggle CSV archive (directory or zip): ingest its seasons offline, download only the rest")
     
+    add_profile_args(parser)
     args = parser.parse_args()
     
-    download_seasons(args.start, args.end, args.force)
+    try:
+        with download_lock(wait=False), profiled(args, 'download_all_seasons'):
+            if args.archive:
+                from ingest_kaggle import ingest
+                covered = ingest(args.archive, range(args.start, args.end + 1), args.force)
+                remaining = [y for y in range(args.start, args.end + 1) if y not in covered]
+                download_seasons(None, None, args.force, years=remaining)
+            else:
+                download_seasons(args.start, args.end, args.force)
+    except BlockingIOError:
+        print(f"Another download holds {LOCK_PATH}. Exiting.")
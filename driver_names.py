@@ -0,0 +1,153 @@
+import re
+import unicodedata
+from collections import Counter
+
+"""
+driver_names.py
+
+Driver name normalization and matching shared by data prep and verification.
+- `normalize_name` is the rule `prepare_web_data` uses to build `lookupKey`
+  ("{last}_{first}").
+- `DriverNameIndex` indexes a set of drivers by `lookupKey` (exact names, tokens
+  and character trigrams) so an external name, e.g. from Wikipedia, resolves to a
+  local driver with a few dict lookups instead of pairwise string comparisons.
+"""
+
+def normalize_name(text):
+    """
+    Normalizes a string to ASCII, lowercase, stripped.
+    e.g. "Hülkenberg" -> "hulkenberg"
+    """
+    if not isinstance(text, str):
+        text = str(text)
+
+    # Normalize unicode characters to closest ASCII equivalent
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8')
+    return text.lower().strip()
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+def name_tokens(name):
+    """Normalized name split into alphanumeric tokens: "Nelson Piquet Jr." -> ('nelson', 'piquet', 'jr')."""
+    return tuple(t for t in _NON_ALNUM.split(normalize_name(name)) if t)
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def dice(a, b):
+    """Trigram Dice coefficient of two strings."""
+    ga, gb = trigrams(a), trigrams(b)
+    return 2 * len(ga & gb) / (len(ga) + len(gb)) if ga or gb else 0.0
+
+class DriverNameIndex:
+    """
+    Token/trigram index of drivers keyed by `lookupKey`.
+
+    `match(name)` tries, in order:
+    1. Exact normalized full name ("first last") or `lookupKey`.
+    2. Token overlap (Jaccard over name tokens), which handles extra or missing
+       parts such as "Jr." or middle names.
+    3. Trigram similarity (Dice coefficient) for spelling variants. Candidates that
+       already share a token are scored on their remaining tokens only, so
+       "Jos Verstappen" does not resolve to "Max Verstappen".
+    Returns (lookupKey, score), or (None, 0.0) below `threshold`. Results are memoized.
+    """
+    def __init__(self, drivers, threshold=0.5):
+        self.threshold = threshold
+        self._names = {}    # lookupKey -> joined tokens
+        self._tokens = {}   # lookupKey -> token set
+        self._exact = {}    # joined tokens / lookupKey -> lookupKey
+        self._by_token = {} # token -> set of lookupKeys
+        self._by_gram = {}  # trigram -> set of lookupKeys
+        self._gram_count = {} # lookupKey -> number of trigrams
+        self._cache = {}
+
+        for driver in drivers:
+            name = driver.get('name', '')
+            tokens = name_tokens(name)
+            key = driver.get('lookupKey')
+            if not key:
+                first = driver.get('firstName', '')
+                last = name[len(first):] if first and name.startswith(first) else name
+                key = f"{normalize_name(last)}_{normalize_name(first)}"
+            if key in self._names:
+                continue
+
+            joined = " ".join(tokens)
+            self._names[key] = joined
+            self._tokens[key] = set(tokens)
+            self._exact.setdefault(joined, key)
+            self._exact.setdefault(key, key)
+            for token in tokens:
+                self._by_token.setdefault(token, set()).add(key)
+            grams = trigrams(joined)
+            self._gram_count[key] = len(grams)
+            for gram in grams:
+                self._by_gram.setdefault(gram, set()).add(key)
+
+    def __len__(self):
+        return len(self._names)
+
+    def match(self, name):
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        result = self._match(name)
+        self._cache[name] = result
+        return result
+
+    def match_key(self, key):
+        """
+        Resolves a `last_first` result key that may come from another spelling of
+        the name (FastF1's "antonelli_kimi" for "antonelli_andrea kimi").
+        Returns (lookupKey, score) like `match`.
+        """
+        if key in self._names:
+            return key, 1.0
+        last, _, first = key.partition('_')
+        return self.match(f"{first} {last}")
+
+    def _match(self, name):
+        tokens = name_tokens(name)
+        joined = " ".join(tokens)
+        if not joined:
+            return None, 0.0
+
+        # 1. Exact
+        key = self._exact.get(joined)
+        if key:
+            return key, 1.0
+
+        # 2. Token overlap
+        token_set = set(tokens)
+        candidates = set()
+        for token in token_set:
+            candidates |= self._by_token.get(token, set())
+        best_key, best_score = None, 0.0
+        for key in candidates:
+            shared = len(token_set & self._tokens[key])
+            score = shared / len(token_set | self._tokens[key])
+            if score > best_score:
+                best_key, best_score = key, score
+        if best_score >= self.threshold:
+            return best_key, best_score
+
+        # 3. Trigram similarity
+        grams = trigrams(joined)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._by_gram.get(gram, ()))
+        for key, shared in counts.items():
+            if key in candidates:
+                other = self._tokens[key]
+                score = dice(" ".join(t for t in tokens if t not in other),
+                             " ".join(sorted(other - token_set)))
+            else:
+                score = 2 * shared / (len(grams) + self._gram_count[key])
+            if score > best_score:
+                best_key, best_score = key, score
+        if best_score >= self.threshold:
+            return best_key, best_score
+        return None, best_score
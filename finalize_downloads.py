@@ -1,87 +1,87 @@
+import argparse
+import datetime
 import time
-import os
-import subprocess
-import json
-# import psutil removed
 
 """
 finalize_downloads.py
 
-Automates the completion of the F1 data download process.
-1. Monitors the `download_all_seasons.py` process.
-2. Waits for it to finish.
-3. Runs `verify_integrity.py` to check for incomplete seasons.
-4. Reads `logs/mismatched_years.json` and forcefully re-downloads those specific years.
+Automates the completion of the F1 data download process as one in-process pipeline.
+1. Takes the download lock (`logs/download.lock`). If `download_all_seasons.py` is
+   already running, this blocks until it exits instead of polling for it.
+2. Runs the download itself (optional), collecting per-season completion events.
+3. Runs `verify_integrity` to check for incomplete or inconsistent seasons.
+4. Re-downloads the mismatched years (plus seasons whose download failed) as one
+   batch under the same rate budget, then verifies once more.
 """
 
-def is_download_running():
-    # Simple check using pgrep
-    try:
-        # Check for python process running download_all_seasons.py
-        # We use pgrep -f to match full command line
-        result = subprocess.run(['pgrep', '-f', 'download_all_seasons.py'], stdout=subprocess.PIPE)
-        return result.returncode == 0
-    except:
-        return False
+from download_all_seasons import download_lock, download_seasons, RateBudget, LOCK_PATH
+from perf_utils import add_profile_args, profiled
+from verify_integrity import verify_integrity, MISMATCHED_FILE
+
+class DownloadEvents:
+    """Collects the completion events emitted by `download_seasons`."""
+    def __init__(self):
+        self.status = {}
+
+    def __call__(self, year, status):
+        self.status[year] = status
+        print(f"[event] {year}: {status}")
+
+    def failed(self):
+        return sorted(y for y, s in self.status.items() if s in ('failed', 'rate_limited'))
+
+def supervise(start_year, end_year, download=True, force=False):
+    started = time.time()
+    print("--- Finalize Downloads Started ---")
+
+    # 1. Wait for any running download (kernel wakes us when its lock is released)
+    print(f"Waiting for {LOCK_PATH}...")
+    with download_lock():
+        print(f"Lock acquired after {time.time() - started:.1f}s.")
+        budget = RateBudget()
+        events = DownloadEvents()
+
+        # 2. Download
+        completed = True
+        if download:
+            completed = download_seasons(start_year, end_year, force, budget=budget, on_complete=events)
+
+        # 3. Verify Integrity
+        print("\nRunning verify_integrity...")
+        mismatched_years = verify_integrity(verbose=False)
+
+        # 4. Re-download mismatches + failed seasons in one batch
+        retry_years = sorted(set(mismatched_years) | set(events.failed()))
+        if not completed:
+            print("Download stopped on a rate limit. Skipping re-download; run again later.")
+        elif retry_years:
+            print(f"\nFound {len(retry_years)} years to re-download: {retry_years}")
+            download_seasons(None, None, force=True, years=retry_years, budget=budget, on_complete=events)
 
-def main():
-    print("--- Finalize Downloads Script Started ---")
-    
-    # 1. Wait for Download
-    print("Monitoring 'download_all_seasons.py'...")
-    while is_download_running():
-        print("Download still running... Waiting 60s")
-        time.sleep(60)
-        
-    print("Download process finished (or not found). Proceeding to verification.")
-    time.sleep(5) # Give file system a moment
-    
-    # 2. Verify Integrity
-    print("Running verify_integrity.py...")
-    subprocess.run(['python', 'verify_integrity.py'])
-    
-    # 3. Check Mismatches
-    mismatched_file = 'logs/mismatched_years.json'
-    if os.path.exists(mismatched_file):
-        with open(mismatched_file, 'r') as f:
-            mismatched_years = json.load(f)
-            
-        if mismatched_years:
-            print(f"Found {len(mismatched_years)} mismatched years: {mismatched_years}")
-            print("Attempting to re-download mismatched years...")
-            
-            # 4. Re-download mismatches
-            # We can use download_all_seasons.py logic or just call it directly
-            # Since download_all_seasons.py takes start/end, calling it per year might be slow due to startup overhead
-            # but it is safer. Or we can modify it to accept a list.
-            # Simpler: Loop and call script with --force --start Y --end Y
-            
-            for year in mismatched_years:
-                print(f"Re-downloading {year}...")
-                subprocess.run([
-                    'venv/bin/python', 'download_all_seasons.py', 
-                    '--start', str(year), 
-                    '--end', str(year), 
-                    '--force'
-                ])
-                # We should probably sleep a bit between force downloads too, 
-                # although module has internal rate limiting, the startup/shutdown might bypass strict 10m cycle check?
-                # Actually download_all_seasons uses pacing loop. If we run it for 1 year, it might exit quickly.
-                # Let's add a small sleep here to be safe.
-                time.sleep(10)
-                
-            print("Re-download complete.")
-            
             # Verify one last time
-            print("Running final verification...")
-            subprocess.run(['python', 'verify_integrity.py'])
-            
+            print("\nRunning final verification...")
+            mismatched_years = verify_integrity(verbose=False)
         else:
             print("No mismatches found! Data is complete.")
-    else:
-        print("No mismatched_years.json found. Verification might have failed or everything is perfect.")
 
-    print("--- Finalize Script Complete ---")
+    if mismatched_years:
+        print(f"Still mismatched: {mismatched_years} (see {MISMATCHED_FILE})")
+    print(f"--- Finalize Complete in {time.time() - started:.1f}s ---")
+    return mismatched_years
+
+def main():
+    current_year = datetime.datetime.now().year
+
+    parser = argparse.ArgumentParser(description="Download, verify and repair all seasons in one pipeline")
+    parser.add_argument("--start", type=int, default=1991, help="Start year (default: 1991)")
+    parser.add_argument("--end", type=int, default=current_year, help=f"End year (default: {current_year})")
+    parser.add_argument("--force", action="store_true", help="Force download even if file exists")
+    parser.add_argument("--no-download", action="store_true", help="Only wait for a running download, then verify and repair")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'finalize_downloads'):
+        supervise(args.start, args.end, download=not args.no_download, force=args.force)
 
 if __name__ == "__main__":
     main()
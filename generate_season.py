@@ -9,7 +9,7 @@ generate_season.py
 Master script for the F1 Standing Animation pipeline.
 - Accepts a year as input.
 - Checks if data exists in `data/`; if not (or if forced), fetches it via `prepare_web_data`.
-- Updates the `data/seasons.json` manifest.
+- Records the season in the state store and re-exports the `data/seasons.json` manifest.
 - Triggers `animate_standings.py` to generate the final MP4 animation.
 """
 
@@ -18,14 +18,14 @@ Master script for the F1 Standing Animation pipeline.
 # Since they are in the same directory, this works.
 import prepare_web_data
 import animate_standings
+from perf_utils import add_profile_args, profiled
+from state_store import StateStore
 
 def process_year(year, force):
     """
     Process a single year: fetch data if needed, then generate animation.
     Returns True if successful, False otherwise.
     """
-    import json
-    
     current_year = datetime.datetime.now().year
     data_filename = f'data/standings_history_{year}.json'
     data_exists = os.path.exists(data_filename)
@@ -50,31 +50,23 @@ def process_year(year, force):
     # 1. Fetch Data if needed
     if should_fetch_data:
         print(f"[{year}] --- Running prepare_web_data ---")
+        store = StateStore()
+        store.start_season(year)
         try:
             success = prepare_web_data.prepare_data(year)
             if not success:
+                store.finish_season(year, 'failed', error='prepare_data returned False')
                 print(f"[{year}] Data preparation returned False.")
                 return False
                 
-            # Update Manifest (seasons.json)
-            manifest_path = 'data/seasons.json'
-            current_seasons = []
-            if os.path.exists(manifest_path):
-                try:
-                    with open(manifest_path, 'r') as f:
-                        current_seasons = json.load(f)
-                except:
-                    pass
-            
-            if year not in current_seasons:
-                current_seasons.append(year)
-                current_seasons.sort(reverse=True)
-                with open(manifest_path, 'w') as f:
-                    json.dump(current_seasons, f)
-                print(f"[{year}] Added to seasons.json manifest.")
+            # Record the season and re-export the manifest (seasons.json)
+            store.complete_from_file(year)
+            store.export_manifest()
+            print(f"[{year}] Updated state store and seasons.json manifest.")
                 
         except Exception as e:
             print(f"[{year}] Error fetching data: {e}")
+            store.finish_season(year, 'failed', error=str(e))
             return False
     
     # Check if data exists now
@@ -101,6 +93,7 @@ def main():
     parser.add_argument("--start", type=int, default=current_year, help=f"Start year (default: {current_year})")
     parser.add_argument("--end", type=int, default=current_year, help=f"End year (default: {current_year})")
     parser.add_argument("--force", action="store_true", help="Force refresh data even if it exists")
+    add_profile_args(parser)
     
     args = parser.parse_args()
     
@@ -120,12 +113,13 @@ def main():
     
     failures = []
     
-    for year in range(start_year, end_year + 1):
-        print(f"\n=== Processing Year {year} ===")
-        success = process_year(year, args.force)
-        
-        if not success:
-            failures.append(year)
+    with profiled(args, 'generate_season'):
+        for year in range(start_year, end_year + 1):
+            print(f"\n=== Processing Year {year} ===")
+            success = process_year(year, args.force)
+
+            if not success:
+                failures.append(year)
             
     if failures:
         print("\n\nFinished with failures for years:", failures)
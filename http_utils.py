@@ -0,0 +1,196 @@
+import gzip
+import hashlib
+import json
+import re
+import socket
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import brotli # Optional: br responses when installed
+except ImportError:
+    brotli = None
+
+"""
+http_utils.py
+
+Small HTTP helpers shared by the stdlib servers (`query_server.py`, `serve.py`).
+- Strong ETags from the response bytes, `If-None-Match` matching (-> 304).
+- `Accept-Encoding` negotiation (q-values, `identity;q=0`), deterministic gzip
+  and brotli when the optional `brotli` package is installed.
+- `Representation`: a body with its compressed variants and their validators,
+  built once and served many times.
+- Single `Range` requests (`bytes=0-99`, `bytes=100-`, `bytes=-100`).
+- `Handler`: a keep-alive (HTTP/1.1) request handler base that sends one prepared
+  body with its validators, and only logs requests when asked to.
+"""
+
+COMPRESS_MIN_SIZE = 1024 # Smaller bodies are sent as is
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Server preference order; the ETag suffix keeps each coding's validator distinct
+CODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+CODING_SUFFIX = {'br': '-br', 'gzip': '-gz'}
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:32]
+
+def strong_etag(data, suffix=''):
+    """Strong validator of `data` (a distinct suffix per content-coding, e.g. '-gz')."""
+    return f'"{content_hash(data)}{suffix}"'
+
+def etag_matches(header, etag):
+    """`If-None-Match` check (weak comparison, as RFC 9110 prescribes for it)."""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    bare = etag[2:] if etag.startswith('W/') else etag
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+def accepted_encodings(header):
+    """{coding: q} from an `Accept-Encoding` header."""
+    codings = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[name.strip().lower()] = q
+    return codings
+
+def pick_encoding(header, available):
+    """The best of `available` codings (server preference order) the client accepts, else None."""
+    codings = accepted_encodings(header)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = codings.get(coding, codings.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+def gzip_bytes(data, level=GZIP_LEVEL):
+    # mtime=0: the same input always compresses to the same bytes (stable ETags)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def compress(data, coding):
+    if coding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip_bytes(data)
+
+_RANGE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single-range `Range` header, None to send the whole
+    body (absent, malformed or multi-range), or 'unsatisfiable' (-> 416).
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    if not match.group(1):
+        # Suffix range: the last N bytes
+        length = int(match.group(2))
+        if length == 0:
+            return 'unsatisfiable'
+        return (max(0, size - length), size - 1)
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else size - 1
+    if start >= size or end < start:
+        return 'unsatisfiable'
+    return (start, min(end, size - 1))
+
+class Representation:
+    """A response body with its precomputed compressed variants and validators."""
+    __slots__ = ('body', 'etag', 'content_type', 'variants')
+
+    def __init__(self, body, content_type='application/json', compressible=True):
+        self.body = body
+        digest = content_hash(body)
+        self.etag = f'"{digest}"'
+        self.content_type = content_type
+        self.variants = {} # coding -> (body, etag)
+        if compressible and len(body) >= COMPRESS_MIN_SIZE:
+            for coding in CODINGS:
+                self.variants[coding] = (compress(body, coding), f'"{digest}{CODING_SUFFIX[coding]}"')
+
+    def size(self):
+        return len(self.body) + sum(len(body) for body, _ in self.variants.values())
+
+    def negotiate(self, accept_encoding):
+        """(coding or None, body, etag) for a request's `Accept-Encoding`."""
+        coding = pick_encoding(accept_encoding, tuple(self.variants)) if self.variants else None
+        if coding:
+            body, etag = self.variants[coding]
+            return coding, body, etag
+        return None, self.body, self.etag
+
+class Handler(BaseHTTPRequestHandler):
+    """Keep-alive handler base; subclasses call `send_representation` / `send_error_json`."""
+    protocol_version = 'HTTP/1.1'
+    log_requests = False
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes: don't let Nagle hold the body back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        if self.log_requests:
+            super().log_message(format, *args)
+
+    def send_representation(self, rep, cache_control='no-cache', head=False):
+        """Sends `rep` (compressed if accepted), or 304 when the client's validator matches."""
+        coding, body, etag = rep.negotiate(self.headers.get('Accept-Encoding'))
+
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_not_modified(etag, cache_control)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', rep.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', cache_control)
+        self.send_header('Vary', 'Accept-Encoding')
+        if coding:
+            self.send_header('Content-Encoding', coding)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def send_not_modified(self, etag, cache_control):
+        self.send_response(304)
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', cache_control)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.end_headers()
+
+    def send_error_json(self, status, message):
+        body = json.dumps({'error': message}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+def make_server(handler, host, port):
+    """Threaded server (one thread per connection); worker threads do not block shutdown."""
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,245 @@
+import argparse
+import io
+import json
+import os
+import time
+import zipfile
+
+import pandas as pd
+
+"""
+ingest_kaggle.py
+
+Offline alternative to `prepare_web_data` for every season in a local copy of the
+Kaggle "Formula 1 World Championship" archive (an Ergast dump, described by
+`formula-1-world-championship-1950-2020-metadata.json`).
+- Reads the archive (the unpacked directory or `archive.zip`) once. The large
+  tables (`results.csv`, `driver_standings.csv`, `sprint_results.csv`) are read
+  in chunks, keeping only the columns and races of the requested seasons.
+- Joins races, standings, results, drivers and constructors in bulk, then builds
+  the same steps as the API path through `season_steps` (Sprint step before the
+  Race step, ranks, result strings, fallback colors, title math).
+- Writes `data/standings_history_{year}.json` (and the derived constructors'
+  history and chart series), records the seasons in the state store and re-exports
+  `data/seasons.json`.
+The archive has no team colors, so every color is a fallback (like any season
+before 2018); seasons newer than the archive still come from the API.
+"""
+
+import season_steps
+import championship_math
+from perf_utils import add_profile_args, profiled, record
+from constructors_history import save_constructors
+from season_series import save_series
+from state_store import StateStore
+from team_colors import get_resolver
+
+CHUNK_ROWS = 50000
+NA_VALUES = ['\\N']
+
+COLUMNS = {
+    'races.csv': ['raceId', 'year', 'round', 'circuitId', 'name', 'date'],
+    'circuits.csv': ['circuitId', 'location'],
+    'drivers.csv': ['driverId', 'forename', 'surname'],
+    'constructors.csv': ['constructorId', 'name'],
+    'driver_standings.csv': ['raceId', 'driverId', 'points', 'position', 'wins'],
+    'results.csv': ['raceId', 'driverId', 'constructorId', 'positionText', 'positionOrder'],
+    'sprint_results.csv': ['raceId', 'driverId', 'positionText', 'positionOrder', 'points'],
+    'qualifying.csv': ['raceId', 'driverId', 'constructorId'],
+}
+CHUNKED = {'driver_standings.csv', 'results.csv', 'sprint_results.csv', 'qualifying.csv'}
+OPTIONAL = {'sprint_results.csv', 'qualifying.csv'} # Missing from older archive versions
+
+class KaggleArchive:
+    """CSV tables of the archive, from a directory or a zip file (nested folders allowed)."""
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else None
+        if self._zip is not None:
+            self._members = {os.path.basename(n): n for n in self._zip.namelist() if n.endswith('.csv')}
+        else:
+            self._members = {f: os.path.join(path, f) for f in os.listdir(path) if f.endswith('.csv')}
+
+    def has(self, name):
+        return name in self._members
+
+    def _open(self, name):
+        if self._zip is not None:
+            return io.TextIOWrapper(self._zip.open(self._members[name]), encoding='utf-8')
+        return open(self._members[name], 'r', encoding='utf-8')
+
+    def read(self, name, race_ids=None):
+        """Reads `name` (only the needed columns); chunked tables keep only `race_ids`."""
+        if not self.has(name):
+            if name in OPTIONAL:
+                return pd.DataFrame(columns=COLUMNS[name])
+            raise FileNotFoundError(f"{name} not found in {self.path}")
+
+        with self._open(name) as f:
+            if name not in CHUNKED:
+                return pd.read_csv(f, usecols=COLUMNS[name], na_values=NA_VALUES, keep_default_na=False)
+            parts = []
+            for chunk in pd.read_csv(f, usecols=COLUMNS[name], na_values=NA_VALUES,
+                                     keep_default_na=False, chunksize=CHUNK_ROWS):
+                if race_ids is not None:
+                    chunk = chunk[chunk['raceId'].isin(race_ids)]
+                parts.append(chunk)
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=COLUMNS[name])
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+
+def load_tables(archive, years=None):
+    """Joined tables for `years` (default: every season in the archive)."""
+    races = archive.read('races.csv')
+    if years is not None:
+        races = races[races['year'].isin(list(years))]
+    circuits = archive.read('circuits.csv')
+    races = races.merge(circuits, on='circuitId', how='left')
+    race_ids = set(races['raceId'])
+
+    drivers = archive.read('drivers.csv')
+    constructors = archive.read('constructors.csv').rename(columns={'name': 'team'})
+    race_cols = ['raceId', 'year', 'round']
+
+    standings = archive.read('driver_standings.csv', race_ids) \
+        .merge(races[race_cols], on='raceId').merge(drivers, on='driverId')
+    results = archive.read('results.csv', race_ids) \
+        .merge(races[race_cols], on='raceId').merge(drivers, on='driverId') \
+        .merge(constructors, on='constructorId', how='left')
+    sprints = archive.read('sprint_results.csv', race_ids) \
+        .merge(races[race_cols], on='raceId').merge(drivers, on='driverId')
+
+    # Team per driver after each round: the constructor of their latest race so far
+    # (a qualifying entry counts for drivers who did not start), else of their next one
+    results = results.sort_values(['year', 'round', 'positionOrder'])
+    qualifying = archive.read('qualifying.csv', race_ids) \
+        .merge(races[race_cols], on='raceId').merge(constructors, on='constructorId', how='left')
+    entries = pd.concat([qualifying.assign(source=0), results.assign(source=1)], ignore_index=True)
+    entries = entries[['year', 'round', 'driverId', 'team', 'source']].dropna(subset=['team']) \
+        .sort_values(['round', 'source'], kind='stable').drop(columns='source') \
+        .astype({'year': 'int64', 'round': 'int64', 'driverId': 'int64'})
+    standings = standings.sort_values('round', kind='stable')
+    standings = pd.merge_asof(standings, entries, on='round', by=['year', 'driverId'], direction='backward')
+    later = pd.merge_asof(standings[['round', 'year', 'driverId']], entries,
+                          on='round', by=['year', 'driverId'], direction='forward')
+    standings['team'] = standings['team'].fillna(later['team']).fillna('Unknown')
+
+    return {
+        'races': races.sort_values(['year', 'round']),
+        'standings': standings.sort_values(['year', 'round', 'position']),
+        'results': results,
+        'sprints': sprints.sort_values(['year', 'round', 'positionOrder']),
+    }
+
+def build_season(year, tables, resolver):
+    """Steps of one season, as `prepare_data` would write them."""
+    races = tables['races'][tables['races']['year'] == year]
+    standings = dict(tuple(tables['standings'][tables['standings']['year'] == year].groupby('round')))
+    results = dict(tuple(tables['results'][tables['results']['year'] == year].groupby('round')))
+    sprints = dict(tuple(tables['sprints'][tables['sprints']['year'] == year].groupby('round')))
+
+    history = []
+    for race in races.itertuples(index=False):
+        round_num = int(race.round)
+        round_start = time.perf_counter()
+        if round_num not in standings:
+            continue # Not run (yet) in this archive version
+        date_str = season_steps.format_date(race.date)
+
+        # 1. Sprint step
+        sprint = sprints.get(round_num)
+        if sprint is not None:
+            sprint_points = {}
+            sprint_results = {}
+            for row in sprint.itertuples(index=False):
+                if float(row.points) > 0:
+                    sprint_points[f"{row.forename} {row.surname}"] = float(row.points)
+                pos_text = str(row.positionText)
+                if pos_text == 'R': pos_text = 'DNF'
+                sprint_results[season_steps.lookup_key(row.forename, row.surname)] = pos_text
+            if sprint_points:
+                previous = history[-1]['standings'] if history else []
+                history.append(season_steps.make_step(
+                    round_num, race.name, 'Sprint', date_str, race.location,
+                    season_steps.sprint_standings(previous, sprint_points), sprint_results))
+
+        # 2. Race step
+        race_results = {}
+        race_rows = results.get(round_num)
+        if race_rows is not None:
+            for row in race_rows.itertuples(index=False):
+                res_str = season_steps.result_display(row.positionText)
+                if season_steps.is_championship_dsq(year, round_num, row.forename, row.surname):
+                    res_str = 'DSQ'
+                race_results[season_steps.lookup_key(row.forename, row.surname)] = res_str
+
+        rows = [{'first': r.forename, 'last': r.surname, 'points': r.points, 'wins': r.wins, 'team': r.team}
+                for r in standings[round_num].itertuples(index=False)]
+        history.append(season_steps.make_step(
+            round_num, race.name, 'Race', date_str, race.location,
+            season_steps.race_standings(rows, year, round_num), race_results))
+        record('round loop', round_start)
+
+    season_steps.apply_fallback_colors(history, year, resolver)
+
+    # Rounds listed but not run yet in this archive version (their sprints are unknown)
+    upcoming = [(int(r), 'Race') for r in races['round'] if int(r) not in standings]
+    championship_math.annotate(history, year, upcoming)
+    return history
+
+def ingest(archive_path, years=None, force=False):
+    """
+    Writes every season of `years` (default: all) found in the archive.
+    Existing files are kept unless `force`. Returns the years the archive covers.
+    """
+    start = time.perf_counter()
+    archive = KaggleArchive(archive_path)
+    try:
+        tables = load_tables(archive, years)
+    finally:
+        archive.close()
+    print(f"Loaded archive tables in {time.perf_counter() - start:.2f}s")
+
+    if not os.path.exists('data'):
+        os.makedirs('data')
+    store = StateStore()
+    resolver = get_resolver()
+    covered = sorted(int(y) for y in tables['standings']['year'].unique())
+    written = 0
+    for year in covered:
+        filename = f'data/standings_history_{year}.json'
+        if os.path.exists(filename) and not force:
+            print(f"Skipping {year}: {filename} exists (use --force to overwrite).")
+            continue
+        season_start = time.perf_counter()
+        history = build_season(year, tables, resolver)
+        if not history:
+            continue
+        write_start = time.perf_counter()
+        with open(filename, 'w') as f:
+            json.dump(history, f, indent=2)
+        record('json write', write_start)
+        constructors = save_constructors(history, year)
+        save_series(history, year)
+        save_series(constructors, year, constructors=True)
+        store.complete_season(year, history, time.perf_counter() - season_start)
+        written += 1
+        print(f"Saved {filename} ({len(history)} steps)")
+
+    if written:
+        store.export_manifest()
+    print(f"Ingested {written} of {len(covered)} archive seasons in {time.perf_counter() - start:.2f}s")
+    return covered
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build season files offline from the Kaggle F1 CSV archive")
+    parser.add_argument("archive", help="Unpacked archive directory or archive.zip")
+    parser.add_argument("--years", type=int, nargs='+', help="Seasons to ingest (default: every season in the archive)")
+    parser.add_argument("--force", action="store_true", help="Overwrite existing season files")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'ingest_kaggle'):
+        ingest(args.archive, args.years, args.force)
@@ -0,0 +1,210 @@
+import argparse
+import http.client
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+"""
+load_test.py
+
+Keep-alive HTTP load generator for the local servers (stdlib only).
+- Each client process holds one persistent connection and requests the URL mix
+  round-robin until the duration ends; latencies and status codes are merged
+  into req/s, p50/p95/p99 latency and bytes received.
+- `--revalidate` replays each URL's ETag (`If-None-Match`, the browser reload
+  path) and `--gzip` sends `Accept-Encoding: gzip`.
+- `--preset query` / `--preset static` start `query_server.py` / `serve.py`
+  pinned to one CPU core (Linux) and run their URL mix against it (the static mix
+  includes a video seek, a `Range` request); `--url` targets any running server
+  instead.
+- Writes JSON to `logs/benchmarks/load_{preset}_{commit}.json` for comparison
+  across commits.
+"""
+
+from perf_utils import write_results
+
+PRESETS = {
+    'query': {
+        'command': [sys.executable, 'query_server.py', '--port', '{port}'],
+        'paths': [
+            '/api/seasons',
+            '/api/standings?year=2021&steps=10-20',
+            '/api/standings?years=1999-2006&name=schumacher',
+            '/api/standings?year=2024&team=ferrari',
+            '/api/standings?year=2008&driver=hamilton_lewis',
+            '/api/drivers?years=2010-2015',
+        ],
+    },
+    'static': {
+        'command': [sys.executable, 'serve.py', '--port', '{port}', '--precompress'],
+        'paths': [
+            '/',
+            '/script.js',
+            '/style.css',
+            '/data/standings_history_2024.json',
+            '/data/series_2024.json',
+            '/data/constructors_history_2024.json',
+            ('/animations/f1_2024_standings.mp4', {'Range': 'bytes=1048576-1114111'}),
+        ],
+    },
+}
+
+def request_target(url):
+    """A URL mix entry: 'url' or ('url', {extra headers}) -> (url, headers)."""
+    return (url, {}) if isinstance(url, str) else url
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+def start_server(preset, port, cpu):
+    """Starts a preset's server (pinned to `cpu` where supported) and waits until it listens."""
+    command = [part.format(port=port) for part in PRESETS[preset]['command']]
+    pin = None
+    if cpu is not None and hasattr(os, 'sched_setaffinity'):
+        pin = lambda: os.sched_setaffinity(0, {cpu})
+    proc = subprocess.Popen(command, preexec_fn=pin, stdout=subprocess.DEVNULL)
+    if not wait_for_port(port):
+        proc.kill()
+        raise RuntimeError(f"{' '.join(command)} did not start listening on port {port}")
+    return proc
+
+def client(args):
+    """One keep-alive connection looping over `urls` until `duration` elapses."""
+    urls, duration, headers, revalidate, cpu = args
+    if cpu is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cpu})
+    parts = urlsplit(request_target(urls[0])[0])
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    etags = {}
+    latencies = []
+    statuses = {}
+    received = 0
+    errors = 0
+
+    deadline = time.perf_counter() + duration
+    k = 0
+    while time.perf_counter() < deadline:
+        url, extra = request_target(urls[k % len(urls)])
+        k += 1
+        target = urlsplit(url)
+        path = target.path + (f'?{target.query}' if target.query else '')
+        request_headers = dict(headers, **extra)
+        if revalidate and url in etags:
+            request_headers['If-None-Match'] = etags[url]
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=request_headers)
+            response = conn.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        received += len(body)
+        if response.getheader('ETag'):
+            etags[url] = response.getheader('ETag')
+    conn.close()
+    return latencies, statuses, received, errors
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+def run_load(urls, duration=10, connections=4, gzip=False, revalidate=False, client_cpus=None):
+    headers = {'Accept-Encoding': 'gzip'} if gzip else {}
+    cpus = client_cpus or [None]
+    jobs = [(urls, duration, headers, revalidate, cpus[i % len(cpus)]) for i in range(connections)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(connections) as pool:
+        outcomes = pool.map(client, jobs)
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(l for outcome in outcomes for l in outcome[0])
+    statuses = {}
+    for outcome in outcomes:
+        for status, count in outcome[1].items():
+            statuses[str(status)] = statuses.get(str(status), 0) + count
+    return {
+        'urls': len(urls),
+        'connections': connections,
+        'duration': duration,
+        'gzip': gzip,
+        'revalidate': revalidate,
+        'requests': len(latencies),
+        'errors': sum(outcome[3] for outcome in outcomes),
+        'requests_per_sec': round(len(latencies) / min(elapsed, duration), 1),
+        'latency_ms': {p: round(percentile(latencies, int(p[1:])) * 1000, 3) for p in ('p50', 'p95', 'p99')},
+        'mb_received': round(sum(outcome[2] for outcome in outcomes) / 1e6, 2),
+        'statuses': statuses,
+    }
+
+def print_result(name, result):
+    latency = result['latency_ms']
+    print(f"{name:<28} {result['requests_per_sec']:>9,.0f} req/s   p50 {latency['p50']:.2f}ms   "
+          f"p95 {latency['p95']:.2f}ms   p99 {latency['p99']:.2f}ms   {result['mb_received']:.1f}MB   "
+          f"statuses {result['statuses']}" + (f"   errors {result['errors']}" if result['errors'] else ''))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep-alive load test against the local servers")
+    parser.add_argument("--preset", choices=sorted(PRESETS), help="Start a server and run its URL mix")
+    parser.add_argument("--url", action='append', default=[], help="URL to request (repeatable; for a running server)")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario (default: 10)")
+    parser.add_argument("--connections", type=int, default=4, help="Concurrent keep-alive connections (default: 4)")
+    parser.add_argument("--gzip", action="store_true", help="Send Accept-Encoding: gzip")
+    parser.add_argument("--revalidate", action="store_true", help="Replay ETags (If-None-Match) like a browser reload")
+    parser.add_argument("--server-cpu", type=int, default=0, help="CPU core the preset server is pinned to (default: 0)")
+    args = parser.parse_args()
+
+    if not args.preset and not args.url:
+        parser.error("give --preset or at least one --url")
+
+    server = None
+    try:
+        if args.preset:
+            port = free_port()
+            server = start_server(args.preset, port, args.server_cpu)
+            urls = []
+            for entry in PRESETS[args.preset]['paths']:
+                path, extra = request_target(entry)
+                urls.append((f'http://127.0.0.1:{port}{path}', extra))
+            # Clients run on the other cores, so the server really has one core to itself
+            client_cpus = [c for c in range(os.cpu_count() or 1) if c != args.server_cpu] or None
+        else:
+            urls = args.url
+            client_cpus = None
+
+        scenarios = [('cold+warm', args.gzip, args.revalidate)]
+        if args.preset:
+            scenarios = [('identity', False, False), ('gzip', True, False), ('revalidate (304)', True, True)]
+        results = {}
+        for name, gzip, revalidate in scenarios:
+            result = run_load(urls, args.duration, args.connections, gzip, revalidate, client_cpus)
+            results[name] = result
+            print_result(name, result)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    path = write_results(f"load_{args.preset or 'urls'}", results)
+    print(f"Results written to {path}")
@@ -1,6 +1,12 @@
+import argparse
 import json
 import glob
 import os
+import re
+import time
+
+from perf_utils import add_profile_args, profiled, record
+from team_colors import TeamColorResolver
 
 """
 patch_colors.py
@@ -8,7 +14,11 @@ patch_colors.py
 Applies the global fallback color map (`fallback_teams.json`) to all existing
 JSON data files in `data/`.
 - Useful for retroactively fixing missing colors in downloaded data without re-fetching from API.
-- Iterates through all driver entries and fills in `color` if missing and a fallback exists.
+- Iterates through all driver entries and fills in `color` if missing and the shared
+  `team_colors` resolver knows the team (exact, case-insensitive or alias match).
+- Colors are resolved for the file's season, so era liveries apply; earlier
+  fallback fills are refreshed with the same replace rule as `update_colors.py`
+  (`TeamColorResolver.apply_fallback`).
 """
 
 def patch_data_colors():
@@ -17,6 +27,7 @@ def patch_data_colors():
         with open('fallback_teams.json', 'r') as f:
             fallbacks = json.load(f)
         print(f"Loaded {len(fallbacks)} fallback colors.")
+        resolver = TeamColorResolver(fallbacks)
     except Exception as e:
         print(f"Error loading fallbacks: {e}")
         return
@@ -30,23 +41,25 @@ def patch_data_colors():
 
     for filepath in files:
         changed = False
+        match = re.search(r'(\d{4})', os.path.basename(filepath))
+        year = int(match.group(1)) if match else None
         try:
             with open(filepath, 'r') as f:
                 history = json.load(f)
             
             for step in history:
                 for driver in step.get('standings', []):
-                    # logic: if color is missing, try to find it in fallbacks
-                    if not driver.get('color'):
-                        team = driver.get('team')
-                        if team and team in fallbacks:
-                            driver['color'] = fallbacks[team]
-                            changed = True
-                            total_patched += 1
+                    # logic: if color is missing (or a stale fallback), try to find it in fallbacks
+                    color = resolver.resolve(driver.get('team'), year)
+                    if resolver.apply_fallback(driver, color, year):
+                        changed = True
+                        total_patched += 1
             
             if changed:
+                write_start = time.perf_counter()
                 with open(filepath, 'w') as f:
                     json.dump(history, f, indent=2)
+                record('json write', write_start)
                 files_changed += 1
                 
         except Exception as e:
@@ -55,4 +68,9 @@ def patch_data_colors():
     print(f"Done. Patched {total_patched} driver entries across {files_changed} files.")
 
 if __name__ == "__main__":
-    patch_data_colors()
+    parser = argparse.ArgumentParser(description="Fill missing colors in the season files from fallback_teams.json")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'patch_colors'):
+        patch_data_colors()
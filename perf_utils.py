@@ -0,0 +1,282 @@
+import collections
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import resource
+import signal
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import datetime
+
+"""
+perf_utils.py
+
+Shared helpers for the benchmark scripts.
+- Identifies the current git commit so results can be compared across commits.
+- Reads the peak resident set size of the current process.
+- Writes benchmark results as JSON under `logs/benchmarks/` and loads them back
+  by path or commit (for comparisons between commits).
+- `--profile` for every entry point (`add_profile_args` + `profiled`): cProfile
+  stats (`.pstats`), CPU-time stack samples as collapsed stacks for flame graphs
+  (`--profile-sample MS`, `.collapsed.txt`) and a tracemalloc snapshot with the top
+  allocation sites (`--profile-memory`, `.tracemalloc`), written to
+  `logs/profiles/{name}_{commit}.*`. Only the main process is profiled (use
+  `--workers 1` where a script has workers).
+- A timing registry for the known hot paths (`timed` / `record`): call counts and
+  total time per label, printed and saved with the profile. Off (a flag check per
+  call) unless a profile is being taken.
+"""
+
+BENCHMARK_DIR = 'logs/benchmarks'
+PROFILE_DIR = 'logs/profiles'
+PROFILE_TOP = 15
+TRACEMALLOC_FRAMES = 10
+
+def git_commit():
+    """
+    Returns the short hash of HEAD (with a '-dirty' suffix for local edits), or 'unknown'.
+    Asks the repository this code lives in, so tools run from another directory
+    (e.g. a synthetic season root) are still keyed by the code's commit.
+    """
+    repo = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+def write_results(name, results, path=None):
+    """
+    Saves `results` as JSON, tagged with the commit and timestamp.
+    Defaults to `logs/benchmarks/{name}_{commit}.json`. Returns the path written.
+    """
+    commit = git_commit()
+    if path is None:
+        path = results_path(name, commit)
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    payload = {
+        'benchmark': name,
+        'commit': commit,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+def results_path(name, commit):
+    return os.path.join(BENCHMARK_DIR, f'{name}_{commit}.json')
+
+def load_results(name, ref):
+    """
+    Saved results by file path, or by commit (`logs/benchmarks/{name}_{ref}.json`).
+    Returns the payload written by `write_results`; raises FileNotFoundError.
+    """
+    path = ref if os.path.isfile(ref) else results_path(name, ref)
+    with open(path, 'r') as f:
+        return json.load(f)
+
+# --- Hot-path timing registry ---
+
+TIMINGS = {} # label -> [calls, seconds]
+_timings_enabled = False
+_timings_lock = threading.Lock()
+
+def enable_timings(enabled=True):
+    global _timings_enabled
+    _timings_enabled = enabled
+
+def record(label, start):
+    """Adds one call of `label` that began at `start` (a `time.perf_counter()` value)."""
+    if _timings_enabled:
+        elapsed = time.perf_counter() - start
+        with _timings_lock:
+            entry = TIMINGS.setdefault(label, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+def timed(label):
+    """Decorator: counts the calls and time of a hot function under `label` while timings are enabled."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _timings_enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, start)
+        return wrapper
+    return decorator
+
+def timings_report():
+    """label -> {'calls', 'seconds', 'mean_ms'}, slowest first."""
+    with _timings_lock:
+        items = sorted(TIMINGS.items(), key=lambda item: -item[1][1])
+    return {label: {'calls': calls, 'seconds': round(seconds, 4), 'mean_ms': round(seconds / calls * 1000, 3)}
+            for label, (calls, seconds) in items}
+
+# --- Profiling ---
+
+class StackSampler:
+    """
+    Samples the main thread's Python stack every `interval` seconds of CPU time
+    (SIGPROF) and counts them as collapsed stacks ("module:function;..." root first).
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._labels = {} # code object -> "module:function"
+        self._previous = None
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            if module == '__init__': # A package: name it after its directory (json, matplotlib, ...)
+                module = os.path.basename(os.path.dirname(code.co_filename))
+            label = self._labels[code] = f"{module}:{code.co_name}"
+        return label
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous)
+
+    def write(self, path):
+        """One "stack count" line per stack (the input of flamegraph.pl, speedscope, inferno)."""
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def add_profile_args(parser):
+    """Adds the common profiling options to an entry point's parser."""
+    group = parser.add_argument_group('profiling')
+    group.add_argument("--profile", action="store_true", help=f"Record cProfile stats and hot-path timings to {PROFILE_DIR}/")
+    group.add_argument("--profile-sample", type=float, metavar='MS', help="Also sample the stack every MS of CPU time (collapsed stacks for flame graphs)")
+    group.add_argument("--profile-memory", action="store_true", help="Also trace allocations (tracemalloc snapshot, top allocation sites)")
+
+def profile_args(args):
+    """The profiling options of `args` as command-line flags (to forward to child scripts)."""
+    flags = ['--profile'] if args.profile else []
+    if args.profile_sample:
+        flags += ['--profile-sample', f'{args.profile_sample:g}']
+    if args.profile_memory:
+        flags.append('--profile-memory')
+    return flags
+
+@contextlib.contextmanager
+def profiled(args, name):
+    """
+    Profiles the enclosed block as `args` (from `add_profile_args`) asks, then writes
+    `logs/profiles/{name}_{commit}.*` and prints a summary. A no-op without options.
+    """
+    sample_ms = getattr(args, 'profile_sample', None)
+    memory = getattr(args, 'profile_memory', False)
+    if not (getattr(args, 'profile', False) or sample_ms or memory):
+        yield
+        return
+
+    enable_timings()
+    profiler = cProfile.Profile() if args.profile else None
+    sampler = None
+    if sample_ms:
+        if hasattr(signal, 'setitimer'):
+            sampler = StackSampler(sample_ms / 1000)
+        else:
+            print("Stack sampling needs setitimer (not available on this platform); skipped.")
+    if memory:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    if sampler:
+        sampler.start()
+    if profiler:
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+        if sampler:
+            sampler.stop()
+        elapsed = time.perf_counter() - start
+        allocations = None
+        if memory:
+            # Before any reporting allocates; the profilers' own allocations are left out
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, module.__file__) for module in (sys.modules[__name__], cProfile, pstats, tracemalloc)])
+            allocations = (snapshot, tracemalloc.get_traced_memory())
+            tracemalloc.stop()
+        _write_profile(name, elapsed, profiler, sampler, allocations)
+        enable_timings(False)
+
+def _write_profile(name, elapsed, profiler, sampler, allocations):
+    if not os.path.exists(PROFILE_DIR):
+        os.makedirs(PROFILE_DIR)
+    base = os.path.join(PROFILE_DIR, f'{name}_{git_commit()}')
+    written = []
+    print(f"\n--- Profile: {name} ({elapsed:.2f}s, peak RSS {peak_rss_mb():.0f} MB) ---")
+
+    if profiler:
+        profiler.dump_stats(f'{base}.pstats')
+        written.append(f'{base}.pstats')
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        print(out.getvalue().strip())
+
+    if sampler:
+        sampler.write(f'{base}.collapsed.txt')
+        written.append(f'{base}.collapsed.txt')
+        print(f"\n{sum(sampler.stacks.values())} stack samples, {len(sampler.stacks)} distinct stacks")
+
+    if allocations:
+        snapshot, (current, peak) = allocations
+        snapshot.dump(f'{base}.tracemalloc')
+        written.append(f'{base}.tracemalloc')
+        print(f"\nTraced memory: {current / 1e6:.1f} MB now, {peak / 1e6:.1f} MB peak. Top allocation sites:")
+        for stat in snapshot.statistics('lineno')[:PROFILE_TOP]:
+            print(f"  {stat}")
+
+    report = timings_report()
+    if report:
+        print(f"\n{'Hot path':<28} | {'Calls':>8} | {'Total':>9} | {'Mean':>10}")
+        for label, t in report.items():
+            print(f"{label:<28} | {t['calls']:>8} | {t['seconds']:>8.3f}s | {t['mean_ms']:>7.3f} ms")
+    with open(f'{base}.timings.json', 'w') as f:
+        json.dump({'name': name, 'commit': git_commit(), 'seconds': round(elapsed, 3),
+                   'peak_rss_mb': round(peak_rss_mb(), 1), 'timings': report}, f, indent=2)
+    written.append(f'{base}.timings.json')
+    print(f"\nProfile written to {', '.join(written)}")
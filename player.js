@@ -0,0 +1,225 @@
+document.addEventListener('DOMContentLoaded', () => {
+    // Replays the keyframes written by `animate_standings.py --export-keyframes`
+    // with the same layout as the MP4 (figure 19.2 x 10.8in at 100dpi).
+    const canvas = document.getElementById('player-canvas');
+    const ctx = canvas.getContext('2d');
+    const seasonSelect = document.getElementById('season-select');
+    const progressBarEl = document.getElementById('progress-bar');
+    const btnPlay = document.getElementById('btn-play');
+    const btnRestart = document.getElementById('btn-restart');
+
+    const W = canvas.width;
+    const H = canvas.height;
+    const PT = 100 / 72; // Matplotlib points -> pixels at 100dpi
+
+    // Axes rect [left, bottom, width, height] in figure fractions (same as create_figure)
+    const AX = { left: 0.15 * W, right: 0.95 * W, top: (1 - 0.83) * H, bottom: (1 - 0.05) * H };
+    const BAR_SIZE = 0.70;
+
+    let kf = null;        // Decoded keyframes
+    let elapsed = 0;      // ms into the timeline
+    let playing = true;
+    let lastTick = null;
+
+    // Fonts (same files as the MP4 renderer)
+    const fontsReady = Promise.all([
+        new FontFace('Outfit', 'url(fonts/Outfit-Regular.ttf)', { weight: '400' }).load(),
+        new FontFace('Outfit', 'url(fonts/Outfit-Bold.ttf)', { weight: '700' }).load(),
+    ]).then(faces => faces.forEach(f => document.fonts.add(f)))
+        .catch(err => console.warn("Outfit font not loaded, using fallback", err));
+
+    fetch('data/seasons.json')
+        .then(res => res.json())
+        .then(seasons => {
+            populateSeasonSelect(seasons);
+
+            const urlParams = new URLSearchParams(window.location.search);
+            const urlYear = urlParams.get('year');
+
+            if (urlYear && seasons.includes(parseInt(urlYear))) {
+                seasonSelect.value = urlYear;
+                loadSeason(urlYear);
+            } else if (seasons.length > 0) {
+                loadSeason(seasons[0]);
+            }
+        })
+        .catch(err => {
+            console.error("Failed to load seasons manifest", err);
+            loadSeason(2025);
+        });
+
+    function populateSeasonSelect(seasons) {
+        seasonSelect.innerHTML = '';
+        seasons.forEach(year => {
+            const option = document.createElement('option');
+            option.value = year;
+            option.textContent = year;
+            seasonSelect.appendChild(option);
+        });
+
+        seasonSelect.addEventListener('change', (e) => {
+            loadSeason(e.target.value);
+        });
+    }
+
+    function decode(b64, TypedArray) {
+        const bytes = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+        return new TypedArray(bytes.buffer);
+    }
+
+    function loadSeason(year) {
+        const url = new URL(window.location);
+        url.searchParams.set('year', year);
+        window.history.pushState({}, '', url);
+
+        document.querySelectorAll('.main-nav a').forEach(a => {
+            const page = a.getAttribute('href').split('?')[0];
+            a.href = `${page}?year=${year}`;
+        });
+
+        Promise.all([fetch(`data/keyframes_${year}.json`).then(res => res.json()), fontsReady])
+            .then(([data]) => {
+                kf = {
+                    ...data,
+                    points: decode(data.points, Float32Array),
+                    ranks: decode(data.ranks, Uint8Array),
+                    positions: decode(data.positions, Uint8Array),
+                    labels: decode(data.labels, Uint16Array),
+                    nDrivers: data.drivers.length,
+                };
+                elapsed = 0;
+                playing = true;
+                btnPlay.textContent = 'Pause';
+            })
+            .catch(err => {
+                console.error(`Failed to load keyframes for ${year}`, err);
+                kf = null;
+                ctx.fillStyle = '#000000';
+                ctx.fillRect(0, 0, W, H);
+                ctx.fillStyle = '#ffffff';
+                ctx.font = `${18 * PT}px Outfit, sans-serif`;
+                ctx.fillText(`No keyframes for ${year} (run animate_standings.py --year ${year} --export-keyframes)`, AX.left, H / 2);
+            });
+    }
+
+    function totalDuration() {
+        return (kf.periods - 1) * (kf.periodLength + kf.endPeriodPause);
+    }
+
+    // Period index + interpolation fraction for a timeline position (ms)
+    function locate(ms) {
+        const span = kf.periodLength + kf.endPeriodPause;
+        const period = Math.min(Math.floor(ms / span), kf.periods - 1);
+        if (period >= kf.periods - 1) return { period: kf.periods - 1, t: 0 };
+        const t = Math.min((ms - period * span) / kf.periodLength, 1);
+        return { period, t };
+    }
+
+    function draw(ms) {
+        const { period, t } = locate(ms);
+        const n = kf.nDrivers;
+        const next = Math.min(period + 1, kf.periods - 1);
+        const xMax = kf.maxPoints * 1.15;
+
+        const xScale = v => AX.left + (v / xMax) * (AX.right - AX.left);
+        const yScale = p => AX.bottom - ((p - 0.5) / kf.nBars) * (AX.bottom - AX.top);
+
+        ctx.fillStyle = '#000000';
+        ctx.fillRect(0, 0, W, H);
+
+        // Title: suptitle at y=0.95 (top aligned), x=0.15
+        ctx.fillStyle = '#ffffff';
+        ctx.textAlign = 'left';
+        ctx.textBaseline = 'top';
+        ctx.font = `700 ${36 * PT}px Outfit, sans-serif`;
+        ctx.fillText(`F1 ${kf.year} Championship Standings`, 0.15 * W, (1 - 0.95) * H);
+
+        // Period label: bottom-left aligned on the axes top edge, label of the current period
+        const label = kf.stepLabels[kf.labels[period]].split('\n');
+        const labelSize = 18 * PT;
+        ctx.font = `700 ${labelSize}px Outfit, sans-serif`;
+        ctx.textBaseline = 'bottom';
+        label.forEach((line, i) => {
+            ctx.fillText(line, AX.left, AX.top - (label.length - 1 - i) * labelSize * 1.2);
+        });
+
+        // Bars: interpolate values and slot positions between keyframes
+        const rows = [];
+        for (let j = 0; j < n; j++) {
+            const a = period * n + j;
+            const b = next * n + j;
+            const pos = kf.positions[a] + (kf.positions[b] - kf.positions[a]) * t;
+            if (pos <= 0 || pos >= kf.nBars + 1) continue;
+            const value = kf.points[a] + (kf.points[b] - kf.points[a]) * t;
+            rows.push({ j, pos, value });
+        }
+
+        const barHalf = (BAR_SIZE / 2) * (AX.bottom - AX.top) / kf.nBars;
+        ctx.textBaseline = 'middle';
+        ctx.font = `400 ${18 * PT}px Outfit, sans-serif`;
+
+        rows.forEach(({ j, pos, value }) => {
+            const driver = kf.drivers[j];
+            const y = yScale(pos);
+            const x1 = xScale(value);
+
+            ctx.globalAlpha = 0.9;
+            ctx.fillStyle = driver.color;
+            ctx.fillRect(AX.left, y - barHalf, x1 - AX.left, barHalf * 2);
+            ctx.globalAlpha = 1;
+            ctx.strokeStyle = 'whitesmoke';
+            ctx.lineWidth = PT;
+            ctx.strokeRect(AX.left, y - barHalf, x1 - AX.left, barHalf * 2);
+
+            // Value label: 1% of the x range past the bar end
+            ctx.fillStyle = '#ffffff';
+            ctx.textAlign = 'left';
+            ctx.fillText(Math.round(value).toLocaleString('en-US'), x1 + 0.01 * (AX.right - AX.left), y);
+
+            // Tick label: "Name" over "TEAM", right aligned to the axes
+            ctx.textAlign = 'right';
+            const lineHeight = 18 * PT * 1.2;
+            const tickX = AX.left - 3.5 * PT;
+            ctx.fillText(driver.name, tickX, y - lineHeight / 2);
+            ctx.fillText(driver.team.toUpperCase(), tickX, y + lineHeight / 2);
+        });
+
+        progressBarEl.style.width = `${Math.min(ms / totalDuration(), 1) * 100}%`;
+    }
+
+    function tick(now) {
+        if (kf) {
+            if (playing && lastTick !== null) {
+                elapsed = Math.min(elapsed + (now - lastTick), totalDuration());
+                if (elapsed >= totalDuration()) {
+                    playing = false;
+                    btnPlay.textContent = 'Play';
+                }
+            }
+            draw(elapsed);
+        }
+        lastTick = now;
+        requestAnimationFrame(tick);
+    }
+    requestAnimationFrame(tick);
+
+    btnPlay.addEventListener('click', () => {
+        if (!kf) return;
+        if (!playing && elapsed >= totalDuration()) elapsed = 0;
+        playing = !playing;
+        btnPlay.textContent = playing ? 'Pause' : 'Play';
+    });
+
+    btnRestart.addEventListener('click', () => {
+        elapsed = 0;
+        playing = true;
+        btnPlay.textContent = 'Pause';
+    });
+
+    document.addEventListener('keydown', (e) => {
+        if (e.key === ' ') {
+            e.preventDefault();
+            btnPlay.click();
+        }
+    });
+});
@@ -1,11 +1,9 @@
 import fastf1
-import pandas as pd
 import os
 import json
 import argparse
 import sys
 import time
-import copy
 
 """
 prepare_web_data.py
@@ -13,8 +11,11 @@ prepare_web_data.py
 Core logic for fetching and processing F1 data.
 - Fetches season schedule and results using `fastf1`.
 - Calculates cumulative standings points race-by-race.
-- Enriches data with colors (from API or fallback).
-- Outputs comprehensive JSON structure to `data/standings_history_{year}.json`.
+- Enriches data with colors (from API or fallback) and the title math
+  (`remainingPoints`, `titleStatus`, see `championship_math.py`).
+- Outputs comprehensive JSON structure to `data/standings_history_{year}.json`,
+  plus the derived `data/constructors_history_{year}.json` and the chart series
+  (`season_series.py`).
 - Raises `RateLimitExceededError` to allow upstream scripts to handle API limits.
 """
 
@@ -28,33 +29,48 @@ import datetime
 # [NEW] Aggressive HTTP Caching (User Request)
 import requests_cache
 
-import unicodedata
 
-def normalize_name(text):
-    """
-    Normalizes a string to ASCII, lowercase, stripped.
-    e.g. "Hülkenberg" -> "hulkenberg"
-    """
-    if not isinstance(text, str):
-        text = str(text)
-    
-    # Normalize unicode characters to closest ASCII equivalent
-    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8')
-    return text.lower().strip()
+from team_colors import get_resolver
+import season_steps
+from constructors_history import save_constructors
+from season_series import save_series
+import championship_math
+from perf_utils import add_profile_args, profiled, record
 
 class RateLimitExceededError(Exception):
     pass
 
+def completed_round_urls(year):
+    """
+    Cache expiry per URL for the rounds already saved for `year`: their results are
+    final, so their responses never expire (same `/{year}/{round}/` marker that
+    `watch.py` evicts by).
+    """
+    filename = f'data/standings_history_{year}.json'
+    if not os.path.exists(filename):
+        return {}
+    try:
+        with open(filename, 'r') as f:
+            rounds = {step.get('round') for step in json.load(f)}
+    except (OSError, ValueError) as e:
+        print(f"Could not read {filename} ({e}); caching every round for 4h")
+        return {}
+    return {f'*/{year}/{r}/*': requests_cache.NEVER_EXPIRE for r in sorted(rounds) if isinstance(r, int)}
+
 def prepare_data(year):
     # Configure Cache based on year
     # Historical years: Cache forever
-    # Current/Future years: Cache for 4 hours (14400s) to allow updates
+    # Current/Future years: Cache for 4 hours (14400s) to allow updates,
+    # except the rounds already saved (final), which are cached forever
     current_year = datetime.datetime.now().year
     expire_time = -1 if year < current_year else 14400
+    urls_expire_after = completed_round_urls(year) if expire_time != -1 else {}
     
-    requests_cache.install_cache('f1_http_cache', backend='sqlite', expire_after=expire_time)
+    requests_cache.install_cache('f1_http_cache', backend='sqlite', expire_after=expire_time,
+                                 urls_expire_after=urls_expire_after)
     
-    print(f"Fetching {year} Season Schedule... (Cache: {'Forever' if expire_time == -1 else '4h'})")
+    cache_label = 'Forever' if expire_time == -1 else f'4h, {len(urls_expire_after)} completed rounds forever'
+    print(f"Fetching {year} Season Schedule... (Cache: {cache_label})")
     try:
         schedule = fastf1.get_event_schedule(year)
     except Exception as e:
@@ -81,11 +97,13 @@ def prepare_data(year):
     
     for _, event in rounds.iterrows():
         round_num = int(event['RoundNumber'])
+        round_start = time.perf_counter()
         # if round_num > 5: break # Debug limit
         
         # 1. Fetch Standings AFTER this round
         # We need to retry this because Ergast generic rate limits are strict
         standings_df = None
+        round_pending = False
         retries = 0
         max_retries = 5 
         
@@ -98,8 +116,9 @@ def prepare_data(year):
                 else:
                     print(f"  No standings data available for Round {round_num} yet.")
                     # If this is the current season, we might have reached the future.
-                    # Stop processing smoothly.
-                    return True # Success so far
+                    # Stop processing smoothly (after recording a finished Sprint, and
+                    # saving the rounds so far).
+                    round_pending = True
                 break # Success
                 
             except Exception as e:
@@ -116,7 +135,7 @@ def prepare_data(year):
         if standings_df is None and retries >= max_retries:
              raise RateLimitExceededError(f"Ergast Rate limit exhausted after {max_retries} retries at Round {round_num}")
         
-        if standings_df is None:
+        if standings_df is None and not round_pending:
             continue # specific error logged above
 
         # [NEW] SPRINT LOGIC
@@ -138,7 +157,7 @@ def prepare_data(year):
                     last = row['familyName']
                     
                     # [FIX] Normalize Key
-                    unique_key = f"{normalize_name(last)}_{normalize_name(first)}"
+                    unique_key = season_steps.lookup_key(first, last)
                     
                     pts = float(row['points'])
                     if pts > 0:
@@ -153,101 +172,32 @@ def prepare_data(year):
                     sprint_results_map[unique_key] = pos_text
 
                         
-                # If we have valid sprint points, we need to generate an intermediate step.
-                # We need the "Previous Standings" to add these points to.
-                # if i == 0 (Round 1), previous points are 0.
-                
+                # If we have valid sprint points, we need to generate an intermediate step:
+                # the previous standings (zero before Round 1) plus the sprint points,
+                # re-ranked with countback on the previous rank.
                 previous_standings_list = []
                 if history:
                     previous_standings_list = history[-1]['standings']
-                
-                # We need a comprehensive list of drivers. 
-                # The best proxy for "current grid" is the standings_df we just fetched for the Main Race.
-                # However, we need to subtract the Race points to get "Pre-Race" points?
-                # A safer bet: Take the 'previous_standings_list'. 
-                # Clone it. Update points for those in 'sprint_points_map'.
-                # Add any new drivers appearing in sprint but not in previous standings (rare).
-                
-                # Let's clone the previous state
-                sprint_standings_state = copy.deepcopy(previous_standings_list)
-                
-                # Map for easy update
-                sprint_driver_map = {d['name']: d for d in sprint_standings_state}
-                
-                # Update with sprint points
-                for drv_name, pts in sprint_points_map.items():
-                    if drv_name in sprint_driver_map:
-                        sprint_driver_map[drv_name]['points'] += pts
-                    else:
-                        # Driver not in previous standings (e.g. first race or substitute)
-                        # We should create an entry. 
-                        # We might lack color/first name here if we rely solely on previous.
-                        # For now, let's try to grab metadata from the sprint_df if possible, 
-                        # or just defer to the robust logic below.
-                        pass 
-
-                # Re-convert to list and Sort
-                sprint_standings_list = list(sprint_driver_map.values())
-                sprint_standings_list.sort(key=lambda x: x['points'], reverse=True)
-                
-                # Re-assign ranks
-                # [NEW] Sprint Logic: Sort by (Points Desc, Previous Rank Asc)
-                # This preserves the countback from the previous round for those with Equal Sprint Points.
-                
-                # Update sort: Points (desc), then Old Rank (asc, handled by d['rank'] from prev step)
-                # Note: d['rank'] might be modified in prev step, so it is valid.
-                sprint_standings_list.sort(key=lambda x: (float(x['points']) * -1, x.get('rank', 999)))
-                
-                s_current_assign = 0
-                s_prev_points = -1.0
-                s_prev_old_rank = -1
-                
-                for idx, d in enumerate(sprint_standings_list, 1):
-                    pts = float(d['points'])
-                    old_rank = d.get('rank', 999) # fallback
-                    
-                    # Logic: If Points match AND Old Rank matches (rare, but possible if tied correctly before)
-                    # Then Tie.
-                    # Else: Next Rank.
-                    
-                    if pts == s_prev_points and old_rank == s_prev_old_rank:
-                        # Tie
-                        d['rank'] = s_current_assign
-                    else:
-                        # Taking the next available slot?
-                        # Since we sorted by countback, we usually just want to enumerate 1, 2, 3...
-                        # so different old_rank implies different new_rank.
-                        s_current_assign = idx
-                        d['rank'] = s_current_assign
-                        
-                    s_prev_points = pts
-                    s_prev_old_rank = old_rank
-                    
-                # Format Date
-                sprint_date = str(event['EventDate'])
-                try:
-                    s_dt = pd.to_datetime(sprint_date)
-                    s_date_str = s_dt.strftime("%d %b")
-                except:
-                    s_date_str = str(sprint_date)
+                sprint_standings_list = season_steps.sprint_standings(previous_standings_list, sprint_points_map)
 
                 # Create the Step
                 if sprint_points_map:
-                     sprint_step_data = {
-                        'round': int(round_num),
-                        'eventName': event['EventName'],
-                        'session': 'Sprint',
-                        'date': s_date_str, 
-                        'location': event['Location'],
-                        'standings': sprint_standings_list,
-                        'raceResults': sprint_results_map
-                    }
+                    sprint_step_data = season_steps.make_step(
+                        round_num, event['EventName'], 'Sprint', season_steps.format_date(event['EventDate']),
+                        event['Location'], sprint_standings_list, sprint_results_map)
 
         except Exception as e:
             # Sprint fetch failed or clean - ignore
             # print(f"  Debug: Check sprint failed: {e}")
             pass
 
+        if round_pending:
+            # Sprint is done but the Race is not: publish the Sprint step on its own
+            if sprint_step_data:
+                history.append(sprint_step_data)
+                print(f"  Recorded SPRINT standings for Round {round_num} (Race pending)")
+            break
+
         # 2. Fetch Race Session to get Team Colors (not in Ergast) AND Race Results
         # We only need the 'Race' session for this metadata.
         # We can try to be lightweight.
@@ -270,7 +220,7 @@ def prepare_data(year):
                        lname = str(driver['LastName'])
                        fname = str(driver['FirstName'])
                        # [FIX] Use unique key to prevent collisions (e.g. schumacher_michael)
-                       unique_key = f"{normalize_name(lname)}_{normalize_name(fname)}"
+                       unique_key = season_steps.lookup_key(fname, lname)
                        
                        # Colors
                        raw_color = driver.get('TeamColor', '')
@@ -284,19 +234,8 @@ def prepare_data(year):
                        status = str(driver['Status'])
                        
                        # Determine display string
-                       if cls_pos.isdigit():
-                           res_str = cls_pos
-                       else:
-                           # If not classified (R, D, N), use 'DNF' usually or the code
-                           # 'R' = Retired, 'D' = Disqualified, 'N' = Not Classified, 'W' = Withdrawn
-                           if cls_pos in ['R', 'W', 'N']:
-                               res_str = 'DNF'
-                           elif cls_pos == 'D':
-                               res_str = 'DSQ'
-                           else:
-                               res_str = cls_pos # Fallback e.g. 'NC'
-                        
-                       if year == 1997 and lname.lower() == 'schumacher' and fname.lower() == 'michael' and int(round_num) == 17:
+                       res_str = season_steps.result_display(cls_pos)
+                       if season_steps.is_championship_dsq(year, round_num, fname, lname):
                            res_str = 'DSQ'
 
                        race_results_map[unique_key] = res_str
@@ -320,93 +259,22 @@ def prepare_data(year):
              print("  Warning: Skipped colors/results for this round due to rate limits.")
 
         # 3. Build Standings List
-        current_standings = []
-        
-        # 3. Build Standings List
-        current_standings = []
-        
-        # [NEW] Race Logic: Gap Squash
-        # We rely on 'standings_df' being sorted by rank (1, 2, 3... 22) as provided by Ergast.
-        # We look at the 'position' column.
-        # 1. Trust 'position' for ordering.
-        # 2. If 'position' jumps (e.g. 14 -> 22), squash it to (14 -> 15).
-        # 3. If 'position' is same (22, 22), keep same assigned rank (15, 15).
-        
-        r_assigned_rank = 0
-        r_prev_api_rank = -999
-        r_prev_points = -1.0
-        
-        # [FIX] Sort by Points first to ignore API Rank bias (e.g. 1997 Schumacher DSQ)
-        # We want to calculate rank based on points ourselves primarily.
-        standings_df = standings_df.sort_values(by=['points', 'wins'], ascending=[False, False])
-        
-        visual_rank_counter = 1
-        bottom_rank = len(standings_df) # [FIX] Dynamic bottom rank (e.g. 28)
-
-        for idx, row in enumerate(standings_df.iterrows(), 1):
-             _, row_data = row
-             points = float(row_data['points'])
-             
-             # Parse API Rank (for reference only)
-             try:
-                 api_rank = int(float(row_data['position']))
-             except (ValueError, TypeError):
-                 api_rank = 9999
-             
-             # Ergast fields: givenName, familyName
-             first = row_data['givenName']
-             last = row_data['familyName']
-             
-             # Default: Assign next visual rank
-             rank_to_assign = visual_rank_counter
+        # Ranked on points (then wins) ourselves, one visual rank per driver;
+        # the 1997 Schumacher DSQ goes to the bottom.
+        standings_rows = []
+        for _, row_data in standings_df.iterrows():
+            teams = row_data.get('constructorNames', [])
+            standings_rows.append({
+                'first': row_data['givenName'],
+                'last': row_data['familyName'],
+                'points': row_data['points'],
+                'wins': row_data['wins'],
+                'team': teams[-1] if len(teams) > 0 else "Unknown",
+            })
+        current_standings = season_steps.race_standings(standings_rows, year, round_num, color_map)
 
-             is_1997_dsq = False
-             if year == 1997 and last == 'Schumacher' and first == 'Michael' and int(round_num) == 17:
-                 is_1997_dsq = True
-                 rank_to_assign = bottom_rank # Force to dynamic bottom (DSQ)
-             
-             # If NOT DSQ, consume the rank slot
-             if not is_1997_dsq:
-                 visual_rank_counter += 1
-
-             r_assigned_rank = rank_to_assign
-             r_prev_api_rank = api_rank
-
-             teams = row_data.get('constructorNames', [])
-             team_name = teams[-1] if len(teams) > 0 else "Unknown"
-             
-             # [FIX] Use robust normalized key
-             lname_key = normalize_name(last)
-             fname_key = normalize_name(first)
-             unique_lookup = f"{lname_key}_{fname_key}"
-             
-             color = None
-             if unique_lookup in color_map:
-                 color = color_map[unique_lookup]['color']
-             
-             rank_display = str(rank_to_assign)
-             if is_1997_dsq:
-                 rank_display = "DSQ"
-             
-             current_standings.append({
-                 'name': f"{first} {last}", # Full Name
-                 'firstName': first,
-                 'lookupKey': unique_lookup, # Pass key to frontend
-                 'points': points,
-                 'team': team_name,
-                 'color': color,
-                 'rank': rank_to_assign,
-                 'rankDisplay': rank_display
-             })
-            
         # Extract metadata
-        event_date = str(event['EventDate'])
-        try:
-            dt = pd.to_datetime(event_date)
-            date_str = dt.strftime("%d %b")
-        except:
-            date_str = str(event_date)
-
+        date_str = season_steps.format_date(event['EventDate'])
         location = event['Location']
 
         # Append to history
@@ -429,46 +297,41 @@ def prepare_data(year):
             history.append(sprint_step_data)
             print(f"  Recorded SPRINT standings for Round {round_num}")
 
-        # 2. Race Step
-        step_data = {
-            'round': int(round_num),
-            'eventName': event['EventName'],
-            'session': 'Race', # Implies "Post-Race Standings"
-            'date': date_str,
-            'location': location,
-            'standings': current_standings,
-            'raceResults': race_results_map
-        }
+        # 2. Race Step ("Post-Race Standings")
+        step_data = season_steps.make_step(
+            round_num, event['EventName'], 'Race', date_str, location, current_standings, race_results_map)
         history.append(step_data)
         print(f"  Recorded standings for Round {round_num}")
+        record('round loop', round_start)
         
         # Pacing
         time.sleep(5.0)
 
-    # Load Fallback Colors
-    try:
-        with open('fallback_teams.json', 'r') as f:
-            fallback_colors = json.load(f)
-    except FileNotFoundError:
-        print("fallback_teams.json not found. Using empty fallback.")
-        fallback_colors = {}
+    if not history:
+        print(f"No completed rounds for {year} yet.")
+        return True # Nothing to save
+
+    # Fallback Colors (shared resolver: era liveries, exact, case-insensitive and alias matches)
+    season_steps.apply_fallback_colors(history, year, get_resolver())
 
-    for step in history:
-        for driver in step['standings']:
-            if not driver['color']:
-                team = driver['team']
-                # Try fallback
-                if team in fallback_colors:
-                    driver['color'] = fallback_colors[team]
+    # Points still available and title status per step (the rest of the calendar counts)
+    championship_math.annotate(history, year, championship_math.upcoming_sessions(schedule, history))
 
     # Save to JSON in data directory
     if not os.path.exists('data'):
         os.makedirs('data')
         
     filename = f'data/standings_history_{year}.json'
+    write_start = time.perf_counter()
     with open(filename, 'w') as f:
         json.dump(history, f, indent=2)
+    record('json write', write_start)
     print(f"Saved {filename}")
+
+    # Constructors' timeline and the chart series from the same steps (no extra requests)
+    constructors = save_constructors(history, year)
+    save_series(history, year)
+    save_series(constructors, year, constructors=True)
     return True
 
 if __name__ == "__main__":
@@ -477,10 +340,12 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="Clean F1 data for web visualization")
     parser.add_argument("--year", type=int, default=current_year, help=f"Season year to fetch (default: {current_year})")
+    add_profile_args(parser)
     args = parser.parse_args()
     
-    try:
-        prepare_data(args.year)
-    except RateLimitExceededError as e:
-        print(f"CRITICAL: {e}")
-        sys.exit(1)
+    with profiled(args, f'prepare_web_data_{args.year}'):
+        try:
+            prepare_data(args.year)
+        except RateLimitExceededError as e:
+            print(f"CRITICAL: {e}")
+            sys.exit(1)
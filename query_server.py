@@ -0,0 +1,277 @@
+import argparse
+import collections
+import glob
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit, parse_qs
+
+"""
+query_server.py
+
+Read-only JSON API over every downloaded season, so a client can fetch e.g. "the
+Schumachers in 1999-2006" or "steps 10-20 of 2021" without whole season files.
+- All `data/standings_history_*.json` files are loaded once into a `SeasonIndex`:
+  every standings entry is serialized to JSON once, steps keep their serialized
+  header, and inverted indexes map each driver (`lookupKey`), name token and
+  team to the (season, step, entry) positions they appear at. A query only
+  joins the pre-serialized fragments it selects.
+- Endpoints (GET/HEAD):
+  - `/api/seasons`: years with their step and driver counts.
+  - `/api/drivers?years=1999-2006`: drivers (`lookupKey`, name, teams, seasons).
+  - `/api/standings?years=2021&steps=10-20&driver=..&name=..&team=..`: the
+    matching steps and entries. `years` / `steps` take "2021", "1999-2006" or
+    lists ("1997,2008"); steps are 1-based within a season. `driver` (lookupKey)
+    and `name` ("schumacher", "michael schumacher") select any matching driver,
+    `team` (substring, e.g. "red bull") any matching team; they repeat or take
+    comma lists, and a driver and a team filter must both match.
+- Responses are cached per canonical query (LRU) together with their gzip (and
+  brotli) variants and strong ETags (`http_utils`), so repeated queries cost a dict hit;
+  `If-None-Match` gets a 304.
+The data is a snapshot of the files at start-up: restart the server after a download.
+"""
+
+import http_utils
+from constructors_history import team_key
+from driver_names import name_tokens
+from season_steps import entry_key
+
+DEFAULT_PORT = 8001
+CACHE_ENTRIES = 2048
+CACHE_BYTES = 256 * 1024 * 1024
+CACHE_CONTROL = 'public, max-age=60'
+STEP_FIELDS = ('round', 'eventName', 'session', 'date', 'location', 'remainingPoints')
+
+class QueryError(ValueError):
+    pass
+
+def parse_numbers(text, name):
+    """"2021", "1999-2006" or "1997,2008" -> sorted set of ints."""
+    values = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.fullmatch(r'(\d+)(?:-(\d+))?', part)
+        if not match:
+            raise QueryError(f"Invalid {name} '{part}' (expected e.g. 2021, 1999-2006 or 1997,2008)")
+        start = int(match.group(1))
+        end = int(match.group(2) or start)
+        if end < start or end - start > 10000:
+            raise QueryError(f"Invalid {name} range '{part}'")
+        values.update(range(start, end + 1))
+    return values
+
+def list_param(params, name):
+    """Values of a repeatable, comma-separated parameter."""
+    return [v.strip() for value in params.get(name, []) for v in value.split(',') if v.strip()]
+
+class SeasonIndex:
+    """Every season's steps, pre-serialized, with driver / name / team indexes."""
+    def __init__(self, data_dir='data'):
+        self.seasons = {}    # year -> {'steps': [header json], 'entries': [[entry json]], 'keys': [[key]], 'teams': [[team key]]}
+        self.drivers = {}    # lookupKey -> {'name', 'teams', 'years'}
+        self.by_driver = {}  # lookupKey -> {year: [(step, position)]}
+        self.by_token = {}   # name token -> {lookupKey}
+        self.by_team = {}    # team key -> {year: [(step, position)]}
+
+        start = time.perf_counter()
+        for path in sorted(glob.glob(os.path.join(data_dir, 'standings_history_*.json'))):
+            match = re.fullmatch(r'standings_history_(\d{4})\.json', os.path.basename(path))
+            if match:
+                with open(path, 'r') as f:
+                    self.add_season(int(match.group(1)), json.load(f))
+        self.load_seconds = time.perf_counter() - start
+
+    def add_season(self, year, history):
+        season = {'steps': [], 'entries': [], 'keys': [], 'teams': []}
+        for i, step in enumerate(history):
+            header = {'step': i + 1}
+            header.update({k: step[k] for k in STEP_FIELDS if k in step})
+            season['steps'].append(json.dumps(header, separators=(',', ':'), ensure_ascii=False)[:-1]) # open object
+            entries, keys, teams = [], [], []
+            for position, d in enumerate(step['standings']):
+                key = entry_key(d)
+                team = d.get('team') or 'Unknown'
+                entry = dict(d, lookupKey=key)
+                entries.append(json.dumps(entry, separators=(',', ':'), ensure_ascii=False))
+                keys.append(key)
+                teams.append(team_key(team))
+
+                driver = self.drivers.setdefault(key, {'name': d['name'], 'teams': [], 'years': []})
+                if team not in driver['teams']:
+                    driver['teams'].append(team)
+                if year not in driver['years']:
+                    driver['years'].append(year)
+                self.by_driver.setdefault(key, {}).setdefault(year, []).append((i, position))
+                self.by_team.setdefault(team_key(team), {}).setdefault(year, []).append((i, position))
+                for token in name_tokens(d['name']):
+                    self.by_token.setdefault(token, set()).add(key)
+            season['entries'].append(entries)
+            season['keys'].append(keys)
+            season['teams'].append(teams)
+        self.seasons[year] = season
+
+    def years(self, selected=None):
+        return [y for y in sorted(self.seasons) if selected is None or y in selected]
+
+    def season_summaries(self):
+        return [{'year': y, 'steps': len(s['steps']),
+                 'drivers': len({k for keys in s['keys'] for k in keys})}
+                for y, s in sorted(self.seasons.items())]
+
+    def driver_list(self, years=None):
+        drivers = []
+        for key, d in sorted(self.drivers.items()):
+            seasons = [y for y in d['years'] if years is None or y in years]
+            if seasons:
+                drivers.append({'lookupKey': key, 'name': d['name'], 'teams': d['teams'], 'years': seasons})
+        return drivers
+
+    def match_drivers(self, keys, names):
+        """lookupKeys matching any of `keys` or `names` (every token of a name); None = no driver filter."""
+        if not keys and not names:
+            return None
+        selected = set(keys) & set(self.drivers)
+        for name in names:
+            tokens = name_tokens(name)
+            if tokens:
+                selected |= set.intersection(*(self.by_token.get(t, set()) for t in tokens))
+        return selected
+
+    def match_teams(self, teams):
+        """Team keys containing any of `teams` (None = no team filter)."""
+        if not teams:
+            return None
+        wanted = [team_key(t) for t in teams]
+        return {k for k in self.by_team if any(w and w in k for w in wanted)}
+
+    def standings(self, years=None, steps=None, drivers=None, teams=None):
+        """
+        JSON body of the matching standings. `years` / `steps`: sets of ints or None;
+        `drivers` / `teams`: sets of lookupKeys / team keys or None.
+        """
+        parts = []
+        for year in self.years(years):
+            season = self.seasons[year]
+            # Positions per step: every entry, or only the indexed ones of the filter
+            if drivers is None and teams is None:
+                positions = {i: None for i in range(len(season['steps']))}
+            else:
+                positions = {}
+                index, filter_keys = (self.by_driver, drivers) if drivers is not None else (self.by_team, teams)
+                for key in filter_keys:
+                    for i, position in index.get(key, {}).get(year, ()):
+                        positions.setdefault(i, []).append(position)
+                if drivers is not None and teams is not None:
+                    positions = {i: [p for p in ps if season['teams'][i][p] in teams] for i, ps in positions.items()}
+
+            step_parts = []
+            for i in sorted(positions):
+                if steps is not None and i + 1 not in steps:
+                    continue
+                selected = positions[i]
+                entries = season['entries'][i] if selected is None else [season['entries'][i][p] for p in sorted(selected)]
+                if selected is not None and not entries:
+                    continue
+                step_parts.append(f'{season["steps"][i]},"standings":[{",".join(entries)}]}}')
+            if step_parts:
+                parts.append(f'{{"year":{year},"steps":[{",".join(step_parts)}]}}')
+        return f'{{"seasons":[{",".join(parts)}]}}'
+
+class QueryCache:
+    """Thread-safe LRU of canonical query -> `http_utils.Representation`, bounded by entries and bytes."""
+    def __init__(self, size=CACHE_ENTRIES, max_bytes=CACHE_BYTES):
+        self.size = size
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.items = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        with self.lock:
+            rep = self.items.get(key)
+            if rep is not None:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return rep
+            self.misses += 1
+        rep = build() # Outside the lock: a slow query does not block cached ones
+        if rep is None:
+            return None
+        with self.lock:
+            if key not in self.items:
+                self.items[key] = rep
+                self.bytes += rep.size()
+            while len(self.items) > self.size or (self.bytes > self.max_bytes and len(self.items) > 1):
+                _, evicted = self.items.popitem(last=False)
+                self.bytes -= evicted.size()
+        return rep
+
+class QueryHandler(http_utils.Handler):
+    index = None
+    cache = None
+
+    def do_GET(self):
+        self.handle_query(head=False)
+
+    def do_HEAD(self):
+        self.handle_query(head=True)
+
+    def handle_query(self, head):
+        url = urlsplit(self.path)
+        try:
+            params = parse_qs(url.query)
+            key = (url.path, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+            rep = self.cache.get(key, lambda: self.build(url.path, params))
+        except QueryError as e:
+            self.send_error_json(400, str(e))
+            return
+        if rep is None:
+            self.send_error_json(404, f"Unknown endpoint {url.path}")
+            return
+        self.send_representation(rep, CACHE_CONTROL, head=head)
+
+    def build(self, path, params):
+        index = self.index
+        years = parse_numbers(','.join(list_param(params, 'years') + list_param(params, 'year')), 'years') or None
+        if path == '/api/seasons':
+            body = json.dumps(index.season_summaries(), separators=(',', ':'))
+        elif path == '/api/drivers':
+            body = json.dumps(index.driver_list(years), separators=(',', ':'), ensure_ascii=False)
+        elif path == '/api/standings':
+            steps = parse_numbers(','.join(list_param(params, 'steps')), 'steps') or None
+            drivers = index.match_drivers(list_param(params, 'driver'), list_param(params, 'name'))
+            teams = index.match_teams(list_param(params, 'team'))
+            body = index.standings(years, steps, drivers, teams)
+        else:
+            return None
+        return http_utils.Representation(body.encode('utf-8'))
+
+def make_query_server(host='127.0.0.1', port=DEFAULT_PORT, data_dir='data', log=False):
+    index = SeasonIndex(data_dir)
+    handler = type('Handler', (QueryHandler,), {'index': index, 'cache': QueryCache(), 'log_requests': log})
+    server = http_utils.make_server(handler, host, port)
+    print(f"Indexed {len(index.seasons)} seasons, {len(index.drivers)} drivers in {index.load_seconds:.2f}s")
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve season slices as JSON from an in-memory index")
+    parser.add_argument("--host", default='127.0.0.1', help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--data", default='data', help="Directory with standings_history_*.json (default: data)")
+    parser.add_argument("--log", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    server = make_query_server(args.host, args.port, args.data, args.log)
+    print(f"Serving on http://{args.host}:{args.port}/api/seasons (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,5 +1,14 @@
 document.addEventListener('DOMContentLoaded', () => {
     const seasonSelect = document.getElementById('season-select');
+    const viewSelect = document.getElementById('view-select');
+
+    // Drivers' or constructors' rankings (data/constructors_history_{year}.json)
+    let view = new URLSearchParams(window.location.search).get('view') === 'constructors' ? 'constructors' : 'drivers';
+    viewSelect.value = view;
+    viewSelect.addEventListener('change', (e) => {
+        view = e.target.value;
+        loadSeason(seasonSelect.value);
+    });
     const ctx = document.getElementById('rankingsChart').getContext('2d');
     const scrollArea = document.querySelector('.chart-scroll-area');
 
@@ -56,162 +65,172 @@ document.addEventListener('DOMContentLoaded', () => {
         // Update URL
         const url = new URL(window.location);
         url.searchParams.set('year', year);
+        url.searchParams.set('view', view);
         window.history.pushState({}, '', url);
 
         // Update Navigation Links
         // Use attribute contains selector as href might already have params
         const standingsLink = document.querySelector('a[href*="index.html"]');
         if (standingsLink) {
-            standingsLink.href = `index.html?year=${year}`;
+            standingsLink.href = `index.html?year=${year}&view=${view}`;
+        }
+        const playerLink = document.querySelector('a[href*="player.html"]');
+        if (playerLink) {
+            playerLink.href = `player.html?year=${year}`;
         }
 
         // Add cache buster to ensure new data is loaded
-        fetch(`data/standings_history_${year}.json?t=${new Date().getTime()}`)
-            .then(res => res.json())
-            .then(data => {
-                renderChart(data, year);
+        const prefix = view === 'constructors' ? 'constructors' : 'standings';
+        // Precomputed series (season_series.py); older deployments only have the steps
+        const seriesFile = view === 'constructors' ? 'constructors_series' : 'series';
+        const bust = `t=${new Date().getTime()}`;
+        fetch(`data/${seriesFile}_${year}.json?${bust}`)
+            .then(res => {
+                if (!res.ok) throw new Error(`No series for ${year}`);
+                return res.json();
+            })
+            .catch(() => fetch(`data/${prefix}_history_${year}.json?${bust}`)
+                .then(res => res.json())
+                .then(seriesFromHistory))
+            .then(series => {
+                renderChart(series, year);
             })
             .catch(err => {
                 console.error("Data load error:", err);
             });
     }
 
-    function renderChart(history, year) {
-        // Destroy previous chart
-        if (chartInstance) {
-            chartInstance.destroy();
-        }
-
-        // --- Data Processing ---
-
-        // 1. Get Labels (Events)
-        const labels = history.map(step => {
-            // Shorten label: "Bahrain" or "Bahrain (S)" 
-            let name = step.eventName.replace(" Grand Prix", "").replace("Pre-Season", "Test");
+    // Fallback: the series document (see season_series.py) built from the raw steps
+    function seriesFromHistory(history) {
+        const steps = history.map(step => {
+            // Shorten label: "Bahrain" or "Bahrain (S)"
+            let label = step.eventName.replace(" Grand Prix", "").replace("Pre-Season", "Test");
             if (step.session === 'Sprint') {
-                name += " (S)";
+                label += " (S)";
             }
-            return name;
+            const champion = step.standings.find(d => d.titleStatus === 'clinched');
+            return {
+                label: label,
+                eventName: step.eventName,
+                session: step.session,
+                date: step.date,
+                location: step.location,
+                hasResults: !!step.raceResults && Object.keys(step.raceResults).length > 0,
+                remainingPoints: step.remainingPoints,
+                champion: champion ? champion.name : undefined
+            };
         });
 
-        // Helper to normalize names (Accents -> ASCII)
-        function normalizeName(text) {
-            return text
-                .normalize("NFD")
-                .replace(/[\u0300-\u036f]/g, "")
-                .toLowerCase()
-                .trim();
-        }
-
-        // 2. Extract Drivers and construct datasets
-        const driverMap = {}; // Name -> { points: [], ranks: [], team: "", color: "" }
-
-        // Initialize drivers from the FINAL step (to get everyone who participated?)
-        // Or iterate all steps to catch one-off drivers
-
-        // Track duplicate last names to trigger disambiguation
+        const driverMap = {}; // Full Name -> series entry
         const lastNameCounts = {};
-
         history.forEach((step, stepIndex) => {
+            const leader = Math.max(...step.standings.filter(d => d.rankDisplay !== 'DSQ').map(d => d.points));
             step.standings.forEach(d => {
-                const key = d.name; // Full Name "Max Verstappen"
-                const lname = d.name.split(' ').pop();
-
-                if (!driverMap[key]) {
-                    // Extract First Name for disambiguation key
+                if (!driverMap[d.name]) {
+                    // Constructors have no first name: the label is the full team name
                     const parts = d.name.split(' ');
-                    const firstName = parts[0];
-                    const lastName = parts.slice(1).join(' ');
-
-                    // [FIX] Use stored lookupKey matches backend exactly
-                    const lookupKey = d.lookupKey || `${normalizeName(lastName)}_${normalizeName(firstName)}`;
-
-                    driverMap[key] = {
-                        label: d.name,
+                    const firstName = d.drivers ? '' : parts[0];
+                    const lastName = d.drivers ? d.name : parts.slice(1).join(' ') || d.name;
+                    driverMap[d.name] = {
+                        key: d.lookupKey || `${normalizeName(lastName)}_${normalizeName(firstName)}`,
                         name: d.name,
                         firstName: firstName,
                         lastName: lastName,
-                        lookupKey: lookupKey,
+                        team: d.team || "",
+                        color: null,
+                        ranks: new Array(history.length).fill(null),
+                        rankLabels: new Array(history.length).fill(null),
                         points: new Array(history.length).fill(null),
-                        data: new Array(history.length).fill(null),
-                        rankLabels: new Array(history.length).fill(null), // [FIX] Initialize rankLabels
-                        team: d.constructor?.name || "",
-                        borderColor: d.color,
-                        backgroundColor: d.color,
-                        tension: 0.1,
-                        fill: false,
-                        pointRadius: 4,
-                        pointHoverRadius: 6,
-                        borderWidth: 3
-                    }
-
-                    if (!lastNameCounts[lastName]) lastNameCounts[lastName] = 0;
-                    lastNameCounts[lastName]++;
+                        gaps: new Array(history.length).fill(null),
+                        changes: new Array(history.length).fill(null),
+                        results: new Array(history.length).fill(null),
+                        titleStatus: new Array(history.length).fill(null)
+                    };
+                    lastNameCounts[lastName] = (lastNameCounts[lastName] || 0) + 1;
                 }
 
-                const driverEntry = driverMap[key];
-
-                // Update Color
-                if ((!driverEntry.borderColor || driverEntry.borderColor === "#555555") && d.color) {
-                    driverEntry.borderColor = d.color;
-                    driverEntry.backgroundColor = d.color;
+                const entry = driverMap[d.name];
+                if (!entry.color && d.color && d.color !== "#555555") {
+                    entry.color = d.color;
                 }
-
-                // Set Rank and Points
-                driverEntry.data[stepIndex] = d.rank;
-                driverEntry.points[stepIndex] = d.points;
-                driverEntry.rankLabels[stepIndex] = d.rankDisplay || d.rank; // Fallback to rank if missing
+                entry.team = d.team || entry.team;
+                const previous = stepIndex > 0 ? entry.ranks[stepIndex - 1] : null;
+                entry.ranks[stepIndex] = d.rank;
+                entry.rankLabels[stepIndex] = d.rankDisplay || d.rank; // Fallback to rank if missing
+                entry.points[stepIndex] = d.points;
+                entry.gaps[stepIndex] = leader - d.points;
+                entry.changes[stepIndex] = previous !== null ? previous - d.rank : null;
+                entry.results[stepIndex] = (step.raceResults || {})[entry.key] || null;
+                entry.titleStatus[stepIndex] = d.titleStatus || null;
             });
         });
 
-        // Detect overlaps (drivers with same Last Name)
-        // Actually, checking counts isn't enough (could be same driver in multiple entries? No, key is full name).
-        // We need to know if MULTIPLE UNIQUE KEYS map to the same LAST NAME.
-        const lastNameToKeys = {};
-        Object.keys(driverMap).forEach(key => {
-            const d = driverMap[key];
-            const ln = d.lastName;
-            if (!lastNameToKeys[ln]) lastNameToKeys[ln] = [];
-            lastNameToKeys[ln].push(key);
+        const drivers = Object.values(driverMap).map(entry => {
+            // Disambiguate drivers sharing a last name: "M. Schumacher"
+            entry.label = lastNameCounts[entry.lastName] > 1 && entry.firstName
+                ? `${entry.firstName.charAt(0)}. ${entry.lastName}` : entry.lastName;
+            entry.color = entry.color || fallbackColors[entry.team] || "#999999";
+            return entry;
         });
 
-        // Update labels for disambiguation
-        Object.keys(driverMap).forEach(key => {
-            const d = driverMap[key];
-            if (lastNameToKeys[d.lastName].length > 1) {
-                // Disambiguate: "M. Schumacher"
-                d.displayName = `${d.firstName.charAt(0)}. ${d.lastName}`;
-            } else {
-                d.displayName = d.lastName;
-            }
-        });
-        // Post-process colors (Fallback)
-        Object.values(driverMap).forEach(dataset => {
-            if (!dataset.borderColor || dataset.borderColor === "#555555") {
-                const teamName = dataset.team;
-                if (fallbackColors[teamName]) {
-                    dataset.borderColor = fallbackColors[teamName];
-                    dataset.backgroundColor = fallbackColors[teamName];
-                } else {
-                    dataset.borderColor = "#999999"; // Default grey
-                    dataset.backgroundColor = "#999999";
-                }
-            }
+        // Final championship order
+        const lastRank = entry => entry.ranks.filter(r => r !== null).pop() || 999;
+        drivers.sort((a, b) => lastRank(a) - lastRank(b));
+        return { steps: steps, drivers: drivers };
+    }
 
-            // Adjust visual style for points inside dots
-            dataset.pointRadius = 14; // Increased for 5-char scores
-            dataset.pointHoverRadius = 16;
-            dataset.pointBackgroundColor = dataset.borderColor; // Fill dot with color
-            dataset.pointBorderWidth = 1; // [FIX] Add outline
-            dataset.pointBorderColor = '#ffffff'; // [FIX] White outline for visibility
-        });
+    // Helper to normalize names (Accents -> ASCII)
+    function normalizeName(text) {
+        return text
+            .normalize("NFD")
+            .replace(/[\u0300-\u036f]/g, "")
+            .toLowerCase()
+            .trim();
+    }
+
+    function renderChart(series, year) {
+        // Destroy previous chart
+        if (chartInstance) {
+            chartInstance.destroy();
+        }
 
-        // Sort datasets by final rank (for legend order)
-        const datasets = Object.values(driverMap).sort((a, b) => {
-            // Get last non-null rank
-            const rankA = a.data.filter(r => r !== null).pop() || 999;
-            const rankB = b.data.filter(r => r !== null).pop() || 999;
-            return rankA - rankB;
+        // --- Data Binding --- (everything is precomputed per driver)
+        const steps = series.steps;
+        const labels = steps.map(step => step.label);
+
+        const datasets = series.drivers.map(d => {
+            const dataset = {
+                label: d.name,
+                lookupKey: d.key,
+                team: d.team,
+                data: d.ranks,
+                points: d.points,
+                rankLabels: d.rankLabels,
+                gaps: d.gaps,
+                changes: d.changes,
+                results: d.results,
+                borderColor: d.color,
+                backgroundColor: d.color,
+                tension: 0.1,
+                fill: false,
+                borderWidth: 3,
+                // Points are drawn inside the dots
+                pointRadius: 14, // Increased for 5-char scores
+                pointHoverRadius: 16,
+                pointBackgroundColor: d.color, // Fill dot with color
+                pointBorderWidth: 1, // [FIX] Add outline
+                pointBorderColor: '#ffffff' // [FIX] White outline for visibility
+            };
+
+            // Title math: gold ring once the title is clinched, faded dots once out of contention
+            const titleStatus = d.titleStatus || [];
+            if (titleStatus.some(s => s)) {
+                dataset.pointBorderWidth = titleStatus.map(s => s === 'clinched' ? 3 : 1);
+                dataset.pointBorderColor = titleStatus.map(s => s === 'clinched' ? '#FFD700' : '#ffffff');
+                const faded = /^#[0-9a-f]{6}$/i.test(d.color) ? `${d.color}66` : d.color; // 40% alpha
+                dataset.pointBackgroundColor = titleStatus.map(s => s === 'eliminated' ? faded : d.color);
+            }
+            return dataset;
         });
 
         // --- Layout Calculation ---
@@ -472,32 +491,22 @@ document.addEventListener('DOMContentLoaded', () => {
                         intersect: false,
                         filter: function (tooltipItem) {
                             const idx = tooltipItem.dataIndex;
-                            const step = history[idx];
-                            if (!step.raceResults) return true;
+                            if (!steps[idx].hasResults) return true;
                             const dataset = tooltipItem.chart.data.datasets[tooltipItem.datasetIndex];
-                            const key = dataset.lookupKey;
-                            return step.raceResults.hasOwnProperty(key);
+                            return dataset.results[idx] !== null;
                         },
                         itemSort: function (a, b) {
                             const idx = a.dataIndex;
-                            const step = history[idx];
-                            if (!step.raceResults) {
-                                const dsA = a.chart.data.datasets[a.datasetIndex];
-                                const dsB = b.chart.data.datasets[b.datasetIndex];
+                            const dsA = a.chart.data.datasets[a.datasetIndex];
+                            const dsB = b.chart.data.datasets[b.datasetIndex];
+                            if (!steps[idx].hasResults) {
                                 const ptA = dsA.points[idx] - (idx > 0 ? dsA.points[idx - 1] : 0);
                                 const ptB = dsB.points[idx] - (idx > 0 ? dsB.points[idx - 1] : 0);
                                 return ptB - ptA;
                             }
-                            // Robust Key Lookup
-                            const dsA = a.chart.data.datasets[a.datasetIndex];
-                            const dsB = b.chart.data.datasets[b.datasetIndex];
-
-                            // Try stored key, else derive from label (fallback)
-                            const keyA = dsA.lookupKey || (dsA.label ? normalizeName(dsA.label.split(' ').slice(1).join(' ')) + '_' + normalizeName(dsA.label.split(' ')[0]) : '');
-                            const keyB = dsB.lookupKey || (dsB.label ? normalizeName(dsB.label.split(' ').slice(1).join(' ')) + '_' + normalizeName(dsB.label.split(' ')[0]) : '');
 
-                            const resA = step.raceResults[keyA] || '999';
-                            const resB = step.raceResults[keyB] || '999';
+                            const resA = dsA.results[idx] || '999';
+                            const resB = dsB.results[idx] || '999';
 
                             const getRank = (r) => {
                                 if (r === 'DNF') return 1000;
@@ -513,11 +522,15 @@ document.addEventListener('DOMContentLoaded', () => {
                         bodyFont: { family: 'Outfit, sans-serif', size: 13, weight: 'normal' },
                         callbacks: {
                             title: function (context) {
-                                if (!context || !context.length) return '';
                                 if (!context || !context.length) return ''; // Safety check
-                                const idx = context[0].dataIndex;
-                                const step = history[idx];
-                                return `${step.eventName} | ${step.session}\n${step.date} | ${step.location}`;
+                                const step = steps[context[0].dataIndex];
+                                let title = `${step.eventName} | ${step.session}\n${step.date} | ${step.location}`;
+                                if (step.champion) {
+                                    title += `\nChampion: ${step.champion}`;
+                                } else if (step.remainingPoints !== undefined) {
+                                    title += `\n${step.remainingPoints} pts still available`;
+                                }
+                                return title;
                             },
                             label: function (context) {
                                 // 1. Identify "Active" Driver (Hovered)
@@ -531,25 +544,24 @@ document.addEventListener('DOMContentLoaded', () => {
                                 }
 
                                 const idx = context.dataIndex;
-                                const step = history[idx];
                                 const dataset = context.dataset;
-                                // Robust Key Lookup for Label
-                                const key = dataset.lookupKey || (dataset.label ? normalizeName(dataset.label.split(' ').slice(1).join(' ')) + '_' + normalizeName(dataset.label.split(' ')[0]) : '');
-
-                                let label = dataset.label || '';
-                                let val = '?';
 
                                 // [FIX] Show RACE RESULT to match the sort order (1, 2, 3...)
-                                if (step.raceResults && step.raceResults[key]) {
-                                    val = step.raceResults[key];
-                                }
+                                const val = dataset.results[idx] || '?';
 
                                 // Format: "Position. Name"
-                                let text = `${val}. ${label}`;
+                                let text = `${val}. ${dataset.label || ''}`;
 
                                 // If this is the hovered driver, make it "BOLD" using Unicode
+                                // and add their championship position and gap to the leader
                                 if (isActive) {
                                     text = toUnicodeBold(text);
+                                    const gap = dataset.gaps[idx];
+                                    const change = dataset.changes[idx];
+                                    const move = change > 0 ? ` ▲${change}` : change < 0 ? ` ▼${-change}` : '';
+                                    const rank = dataset.rankLabels[idx];
+                                    const position = isNaN(rank) ? rank : `P${rank}`; // e.g. "DSQ"
+                                    text += ` (${position}${move}, ${gap > 0 ? `-${gap} pts` : 'leader'})`;
                                 }
 
                                 return text;
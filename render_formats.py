@@ -0,0 +1,160 @@
+import argparse
+import datetime
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+"""
+render_formats.py
+
+Renders one season in several output formats from a single layout pass.
+- Builds the frame data and interpolates every frame (values, bar positions,
+  labels) once via `animate_standings`.
+- Emits each output profile (16:9, 9:16, square, thumbnail video and a poster
+  PNG of the final standings) from that shared layout, optionally in parallel
+  worker processes.
+- Outputs to `animations/f1_{year}_standings[_{profile}].{mp4,png}`.
+"""
+
+import animate_standings
+from perf_utils import add_profile_args, profiled
+
+# `layout` refers to animate_standings.FIGURE_LAYOUTS; resolution = figsize * dpi
+OUTPUT_PROFILES = {
+    'landscape': {'layout': 'landscape', 'dpi': 100, 'kind': 'video'},     # 1920x1080
+    'vertical': {'layout': 'vertical', 'dpi': 100, 'kind': 'video'},       # 1080x1920
+    'square': {'layout': 'square', 'dpi': 100, 'kind': 'video'},           # 1080x1080
+    'thumbnail': {'layout': 'landscape', 'dpi': 100 / 3, 'kind': 'video'}, # 640x360
+    'poster': {'layout': 'poster', 'dpi': 100, 'kind': 'poster', 'n_bars': 20}, # 1080x1920 PNG
+}
+
+# Shared layout, set once per worker process by `init_worker`
+_LAYOUT = None
+
+def init_worker(layout):
+    global _LAYOUT
+    _LAYOUT = layout
+    animate_standings.load_fonts()
+
+def output_path(year, name, profile, suffix=''):
+    extension = 'png' if profile['kind'] == 'poster' else 'mp4'
+    tag = '' if name == 'landscape' else f'_{name}'
+    return f"animations/f1_{year}_standings{tag}{suffix}.{extension}"
+
+def render_profile(name, profile, year, timing, dpi_scale, filename):
+    layout = _LAYOUT
+    frames = layout['frames']
+    dpi = profile['dpi'] * dpi_scale
+    start = time.perf_counter()
+
+    if profile['kind'] == 'poster':
+        # Final standings, ranked over the full field rather than the animated top 10
+        n_bars = min(profile.get('n_bars', animate_standings.N_BARS), len(frames['drivers']))
+        values = frames['step_points'][-1]
+        renderer = animate_standings.FrameRenderer(frames, layout['bar_colors'], year, dpi,
+                                                   profile['layout'], n_bars)
+        renderer.update(values, animate_standings.bar_positions(values, n_bars), frames['step_labels'][-1])
+        renderer.fig.savefig(filename, dpi=dpi, facecolor='black')
+        renderer.close()
+        return name, filename, 1, time.perf_counter() - start
+
+    values, positions, labels = layout['values'], layout['positions'], layout['labels']
+    steps = timing['steps_per_period']
+    fps = steps * 1000 / timing['period_length']
+    # End-of-period pause: repeat the settled frame instead of redrawing it
+    pause_frames = round(timing['end_period_pause'] * fps / 1000)
+
+    renderer = animate_standings.FrameRenderer(frames, layout['bar_colors'], year, dpi, profile['layout'])
+    sink = animate_standings.VideoSink(filename, renderer.width, renderer.height, fps)
+    written = 0
+    try:
+        for f in range(len(values)):
+            renderer.update(values[f], positions[f], frames['step_labels'][labels[f]])
+            buffer = renderer.render()
+            repeats = 1 + (pause_frames if f > 0 and f % steps == 0 else 0)
+            for _ in range(repeats):
+                sink.write(buffer)
+            written += repeats
+    finally:
+        sink.close()
+        renderer.close()
+
+    return name, filename, written, time.perf_counter() - start
+
+def render_formats(year, profiles, workers=1, draft=False, rounds=None):
+    """
+    Renders `profiles` (names from OUTPUT_PROFILES) for `year` from one layout pass.
+    Returns a list of (profile, filename, frames written, seconds).
+    """
+    history = animate_standings.load_history(year)
+    if history is None:
+        return []
+
+    indices = animate_standings.select_steps(history, rounds)
+    if not indices:
+        print(f"No steps match rounds {rounds} for {year}.")
+        return []
+
+    timing = animate_standings.RENDER_PROFILES['draft' if draft else 'full']
+    dpi_scale = timing['dpi'] / animate_standings.RENDER_PROFILES['full']['dpi']
+
+    # 1. Layout pass (shared by every profile)
+    t0 = time.perf_counter()
+    frames = animate_standings.build_frame_data(history, year, indices)
+    values, positions, labels = animate_standings.interpolate_frames(frames, timing['steps_per_period'])
+    layout = {
+        'frames': frames,
+        'bar_colors': animate_standings.resolve_bar_colors(frames),
+        'values': values,
+        'positions': positions,
+        'labels': labels,
+    }
+    print(f"Layout pass: {len(values)} frames x {len(frames['drivers'])} drivers in {time.perf_counter() - t0:.3f}s")
+
+    if not os.path.exists('animations'):
+        os.makedirs('animations')
+
+    suffix = ''
+    if rounds:
+        suffix += f'_r{rounds[0]}-{rounds[1]}'
+    if draft:
+        suffix += '_draft'
+
+    jobs = [(name, OUTPUT_PROFILES[name], year, timing, dpi_scale, output_path(year, name, OUTPUT_PROFILES[name], suffix))
+            for name in profiles]
+
+    # 2. Emit every profile from the shared layout
+    results = []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(layout,)) as pool:
+            futures = [pool.submit(render_profile, *job) for job in jobs]
+            for future in futures:
+                results.append(future.result())
+    else:
+        init_worker(layout)
+        for job in jobs:
+            results.append(render_profile(*job))
+
+    for name, filename, written, seconds in results:
+        print(f"  {name:<10} {written:>5} frames in {seconds:6.1f}s -> {filename}")
+    return results
+
+if __name__ == "__main__":
+    current_year = datetime.datetime.now().year
+
+    parser = argparse.ArgumentParser(description="Render a season in several output formats from one layout pass")
+    parser.add_argument("--year", type=int, default=current_year, help=f"Season year to render (default: {current_year})")
+    parser.add_argument("--profiles", nargs='+', choices=list(OUTPUT_PROFILES), default=list(OUTPUT_PROFILES), help="Output profiles (default: all)")
+    parser.add_argument("--workers", type=int, default=1, help="Render profiles in N parallel processes (default: 1)")
+    parser.add_argument("--draft", action="store_true", help="Half resolution, 5 steps per period")
+    parser.add_argument("--rounds", type=animate_standings.parse_round_range, help="Only render these rounds, e.g. 10-15")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'render_formats'):
+        try:
+            render_formats(args.year, args.profiles, args.workers, args.draft, args.rounds)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
@@ -0,0 +1,271 @@
+import argparse
+import glob
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+"""
+rescore.py
+
+What-if re-scoring of whole seasons under another points system, offline.
+- Each season's classifications (`raceResults` of every Race and Sprint step) are
+  loaded once into a step x driver position matrix (0 = not classified).
+- A points system is applied with array ops only: a table lookup per session
+  type, an optional fastest-lap bonus and an optional best-N-results rule (top N
+  race scores so far, per step), then a cumulative sum and a countback ranking
+  (points, then wins, seconds, ...) with `np.lexsort`.
+- Writes a normal history file (`data/whatif/standings_history_{year}_{tag}.json`)
+  that the animator and web views can load like any season. `remainingPoints` and
+  `titleStatus` are recomputed under the new system (`championship_math`) for
+  complete seasons, and dropped for a season in progress (no calendar offline).
+Seasons without classifications (2018-2020 files predate `raceResults`) are skipped.
+The history files carry no fastest laps, so `--fastest-lap` only applies to steps
+with a `fastestLap` entry (lookupKey) and warns otherwise.
+"""
+
+from driver_names import DriverNameIndex
+from perf_utils import add_profile_args, profiled
+from season_steps import entry_key
+
+OUTPUT_DIR = 'data/whatif'
+
+# Race tables, named after their first season
+POINTS_SYSTEMS = {
+    '1991': [10, 6, 4, 3, 2, 1],
+    '2003': [10, 8, 6, 5, 4, 3, 2, 1],
+    '2010': [25, 18, 15, 12, 10, 8, 6, 4, 2, 1],
+}
+SPRINT_SYSTEMS = {
+    'none': [], # Sprint steps are dropped
+    '2021': [3, 2, 1],
+    '2022': [8, 7, 6, 5, 4, 3, 2, 1],
+}
+FASTEST_LAP_MAX_POSITION = 10 # 2019-2024: the bonus needs a top-10 finish
+COUNTBACK_PLACES = 10 # Tie-break depth (wins, seconds, ... tenths)
+
+def parse_table(value, named):
+    """A named table or a comma-separated list of points, e.g. "25,18,15"."""
+    if value in named:
+        return list(named[value])
+    try:
+        return [float(p) for p in value.split(',') if p.strip()]
+    except ValueError:
+        raise ValueError(f"Unknown points system '{value}' (use {', '.join(named)} or e.g. 25,18,15)")
+
+def load_classifications(history):
+    """
+    Step x driver matrices of one season.
+    Returns {'keys', 'positions', 'is_sprint', 'has_results', 'present', 'dsq', 'fastest', 'unmatched'}.
+    """
+    keys = {}
+    entries = []
+    for step in history:
+        for d in step['standings']:
+            key = entry_key(d)
+            if key not in keys:
+                keys[key] = len(keys)
+                entries.append({'name': d.get('name', ''), 'firstName': d.get('firstName', ''), 'lookupKey': key})
+    index = DriverNameIndex(entries)
+
+    shape = (len(history), len(keys))
+    positions = np.zeros(shape, dtype=np.int16)
+    present = np.zeros(shape, dtype=bool)
+    dsq = np.zeros(shape, dtype=bool)
+    fastest = np.zeros(shape, dtype=bool)
+    is_sprint = np.array([step.get('session') == 'Sprint' for step in history], dtype=bool)
+    has_results = np.array([bool(step.get('raceResults')) for step in history], dtype=bool)
+    unmatched = set()
+
+    for i, step in enumerate(history):
+        for d in step['standings']:
+            j = keys[entry_key(d)]
+            present[i, j] = True
+            dsq[i, j] = d.get('rankDisplay') == 'DSQ'
+        for key, result in (step.get('raceResults') or {}).items():
+            j = keys.get(key)
+            if j is None:
+                # Result keys built from other name spellings ("antonelli_kimi")
+                j = keys.get(index.match_key(key)[0])
+            if j is None:
+                unmatched.add(key)
+                continue
+            if str(result).isdigit():
+                positions[i, j] = int(result)
+        if step.get('fastestLap') in keys:
+            fastest[i, keys[step['fastestLap']]] = True
+
+    return {
+        'keys': list(keys),
+        'positions': positions,
+        'is_sprint': is_sprint,
+        'has_results': has_results,
+        'present': present,
+        'dsq': dsq,
+        'fastest': fastest,
+        'unmatched': sorted(unmatched),
+    }
+
+def lookup_table(table, max_position):
+    """Points by position as an array indexed by position (index 0 = unclassified)."""
+    padded = np.zeros(max(max_position, len(table)) + 1)
+    padded[1:len(table) + 1] = table
+    return padded
+
+def score(classif, race_table, sprint_table, best=None, fastest_lap=0):
+    """
+    Cumulative points per step x driver under a points system.
+    `best`: only the N best race scores count (sprints always count).
+    `fastest_lap`: bonus for the fastest lap with a top-10 race finish.
+    """
+    positions = classif['positions']
+    is_sprint = classif['is_sprint'][:, None]
+    max_position = int(positions.max(initial=0))
+
+    gained = np.where(is_sprint,
+                      lookup_table(sprint_table, max_position)[positions],
+                      lookup_table(race_table, max_position)[positions])
+    if fastest_lap:
+        eligible = classif['fastest'] & ~is_sprint & (positions > 0) & (positions <= FASTEST_LAP_MAX_POSITION)
+        gained = gained + fastest_lap * eligible
+
+    if not best:
+        return np.cumsum(gained, axis=0)
+
+    # Best N: for every step, the top N race scores among the steps so far
+    race_gained = np.where(is_sprint, 0.0, gained)
+    n = len(race_gained)
+    prefix = np.tril(np.ones((n, n), dtype=bool))[:, :, None] * race_gained[None, :, :]
+    counted = -np.sort(-prefix, axis=1)[:, :best, :].sum(axis=1)
+    return counted + np.cumsum(np.where(is_sprint, gained, 0.0), axis=0)
+
+def rank_steps(totals, classif):
+    """
+    Ranks per step x driver: points, then countback on race places (wins, seconds, ...).
+    Drivers absent from a step get 0; DSQ entries go to the bottom.
+    """
+    positions = np.where(classif['is_sprint'][:, None], 0, classif['positions'])
+    places = [np.cumsum(positions == p, axis=0) for p in range(COUNTBACK_PLACES, 0, -1)]
+    listed = classif['present'] & ~classif['dsq']
+
+    # np.lexsort: last key is primary -> listed first, then points, then wins, seconds, ...
+    order = np.lexsort([-p for p in places] + [-totals, ~listed], axis=-1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, totals.shape[1] + 1)[None, :].repeat(len(totals), 0), axis=-1)
+    return np.where(classif['present'], ranks, 0)
+
+def rescore_history(history, race_table, sprint_table, best=None, fastest_lap=0):
+    """Re-scored copy of `history` (same step shape); sprint steps are dropped with an empty sprint table."""
+    classif = load_classifications(history)
+    totals = score(classif, race_table, sprint_table, best, fastest_lap)
+    ranks = rank_steps(totals, classif)
+    column = {key: j for j, key in enumerate(classif['keys'])}
+
+    steps = []
+    for i, step in enumerate(history):
+        if classif['is_sprint'][i] and not sprint_table:
+            continue
+        standings = []
+        for d in step['standings']:
+            j = column[entry_key(d)]
+            entry = dict(d)
+            entry['points'] = round(float(totals[i, j]), 2)
+            entry['rank'] = int(ranks[i, j])
+            entry['rankDisplay'] = 'DSQ' if classif['dsq'][i, j] else str(entry['rank'])
+            standings.append(entry)
+        standings.sort(key=lambda e: e['rank'])
+        steps.append(dict(step, standings=standings))
+    annotate_titles(steps, history, race_table, sprint_table, fastest_lap)
+    return steps, classif
+
+def annotate_titles(steps, history, race_table, sprint_table, fastest_lap=0):
+    """
+    Title math of the re-scored `steps` under the what-if tables (in place). The
+    original annotations only hold for the original points, so a season not known
+    to be complete (`history` does not end with 0 points left) loses them instead.
+    """
+    import championship_math # Imports this module for the points tables
+
+    if not history or history[-1].get('remainingPoints') != 0:
+        for step in steps:
+            step.pop('remainingPoints', None)
+            for entry in step['standings']:
+                entry.pop('titleStatus', None)
+        return
+    # Upper bound per session; with best-N a driver's score never drops, so it stays sound
+    race_max = max(race_table, default=0) + fastest_lap
+    sprint_max = max(sprint_table, default=0)
+    championship_math.annotate(steps, None, max_points=lambda round_num, session:
+                               sprint_max if session == 'Sprint' else race_max)
+
+def season_files():
+    files = {}
+    for path in glob.glob('data/standings_history_*.json'):
+        match = re.fullmatch(r'standings_history_(\d{4})\.json', os.path.basename(path))
+        if match:
+            files[int(match.group(1))] = path
+    return dict(sorted(files.items()))
+
+def rescore(years=None, system='2010', sprint='2022', best=None, fastest_lap=0, tag=None, out_dir=OUTPUT_DIR):
+    race_table = parse_table(system, POINTS_SYSTEMS)
+    sprint_table = parse_table(sprint, SPRINT_SYSTEMS)
+    tag = tag or f"{system}_sprint-{sprint}" + (f"_best{best}" if best else '') + (f"_fl{fastest_lap:g}" if fastest_lap else '')
+    tag = re.sub(r'[^A-Za-z0-9_.-]+', '-', tag)
+
+    files = season_files()
+    if years:
+        files = {y: p for y, p in files.items() if y in years}
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    scoring_time = 0.0
+    written = []
+    any_fastest = False
+    for year, path in files.items():
+        with open(path, 'r') as f:
+            history = json.load(f)
+        if not any(step.get('raceResults') for step in history):
+            print(f"Skipping {year}: no race classifications in {path}")
+            continue
+
+        start = time.perf_counter()
+        steps, classif = rescore_history(history, race_table, sprint_table, best, fastest_lap)
+        scoring_time += time.perf_counter() - start
+        any_fastest = any_fastest or classif['fastest'].any()
+
+        missing = int((~classif['has_results'] & ~(classif['is_sprint'] & (not sprint_table))).sum())
+        notes = []
+        if missing:
+            notes.append(f"{missing} steps without results score 0")
+        if classif['unmatched']:
+            notes.append(f"not in standings: {', '.join(classif['unmatched'])}")
+
+        filename = os.path.join(out_dir, f'standings_history_{year}_{tag}.json')
+        with open(filename, 'w') as f:
+            json.dump(steps, f, indent=2)
+        written.append(year)
+        champion = steps[-1]['standings'][0] if steps and steps[-1]['standings'] else None
+        summary = f"champion {champion['name']} ({champion['points']:g})" if champion else "no standings"
+        print(f"{year}: {summary}" + (f" [{'; '.join(notes)}]" if notes else ''))
+
+    if fastest_lap and not any_fastest:
+        print("Warning: no step records a fastestLap; the fastest-lap bonus was not applied.")
+    print(f"Re-scored {len(written)} seasons in {scoring_time * 1000:.0f}ms (excluding I/O). Output: {out_dir}/*_{tag}.json")
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score seasons under another points system")
+    parser.add_argument("--years", type=int, nargs='+', help="Seasons to re-score (default: all downloaded)")
+    parser.add_argument("--system", default='2010', help=f"Race points: {', '.join(POINTS_SYSTEMS)} or a list like 25,18,15 (default: 2010)")
+    parser.add_argument("--sprint", default='2022', help=f"Sprint points: {', '.join(SPRINT_SYSTEMS)} or a list (default: 2022)")
+    parser.add_argument("--best", type=int, help="Only count each driver's N best race results")
+    parser.add_argument("--fastest-lap", type=float, default=0, help="Bonus points for the fastest lap with a top-10 finish")
+    parser.add_argument("--tag", help="Output file suffix (default: derived from the options)")
+    parser.add_argument("--out", default=OUTPUT_DIR, help=f"Output directory (default: {OUTPUT_DIR})")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'rescore'):
+        rescore(args.years, args.system, args.sprint, args.best, args.fastest_lap, args.tag, args.out)
@@ -19,6 +19,15 @@ document.addEventListener('DOMContentLoaded', () => {
     const ROW_HEIGHT = 45;
 
     const seasonSelect = document.getElementById('season-select');
+    const viewSelect = document.getElementById('view-select');
+
+    // Drivers' or constructors' standings (data/constructors_history_{year}.json)
+    let view = new URLSearchParams(window.location.search).get('view') === 'constructors' ? 'constructors' : 'drivers';
+    viewSelect.value = view;
+    viewSelect.addEventListener('change', (e) => {
+        view = e.target.value;
+        loadSeason(seasonSelect.value);
+    });
 
     // 1. Fetch Available Seasons
     fetch('data/seasons.json')
@@ -64,13 +73,18 @@ document.addEventListener('DOMContentLoaded', () => {
         // Update URL
         const url = new URL(window.location);
         url.searchParams.set('year', year);
+        url.searchParams.set('view', view);
         window.history.pushState({}, '', url);
 
         // Update Navigation Links
         // Use attribute contains selector as href might already have params
         const rankingsLink = document.querySelector('a[href*="rankings.html"]');
         if (rankingsLink) {
-            rankingsLink.href = `rankings.html?year=${year}`;
+            rankingsLink.href = `rankings.html?year=${year}&view=${view}`;
+        }
+        const playerLink = document.querySelector('a[href*="player.html"]');
+        if (playerLink) {
+            playerLink.href = `player.html?year=${year}`;
         }
 
         // Reset state
@@ -78,7 +92,8 @@ document.addEventListener('DOMContentLoaded', () => {
         chartContainer.innerHTML = '';
         driverElements = {};
 
-        fetch(`data/standings_history_${year}.json`)
+        const prefix = view === 'constructors' ? 'constructors' : 'standings';
+        fetch(`data/${prefix}_history_${year}.json`)
             .then(response => response.json())
             .then(data => {
                 history = data;
@@ -154,6 +169,9 @@ document.addEventListener('DOMContentLoaded', () => {
         // Update Header
         eventNameEl.textContent = step.eventName;
         eventMetaEl.textContent = `${step.date} | ${step.location}`;
+        if (step.remainingPoints > 0) {
+            eventMetaEl.textContent += ` | ${step.remainingPoints} pts left`;
+        }
         sessionTypeEl.textContent = step.session;
 
         // Update Controls
@@ -167,9 +185,8 @@ document.addEventListener('DOMContentLoaded', () => {
         btnLast.disabled = currentIndex === history.length - 1;
 
         // Render Chart
-        // Render Chart
-        // [FIX] Sort by rank to ensure forced ranks (like 1997 DSQ) are respected visually
-        const standings = [...step.standings].sort((a, b) => a.rank - b.rank);
+        // Standings are stored in rank order (forced ranks like the 1997 DSQ included)
+        const standings = step.standings;
         const presentDriverNames = new Set();
         const maxPoints = seasonMaxPoints;
 
@@ -180,7 +197,14 @@ document.addEventListener('DOMContentLoaded', () => {
 
             // [FIX] Use rankDisplay (e.g. "DSQ") if provided, otherwise standard rank
             row.querySelector('.rank').textContent = driver.rankDisplay || driver.rank;
+            if (driver.drivers) {
+                // Constructors: who has scored for the team so far
+                row.querySelector('.team-name').textContent = driver.drivers.join(', ');
+            }
             row.querySelector('.bar-points').textContent = driver.points;
+            // Precomputed title math (absent = still in contention)
+            row.classList.toggle('clinched', driver.titleStatus === 'clinched');
+            row.classList.toggle('eliminated', driver.titleStatus === 'eliminated');
 
             let widthPercent = 0;
             if (maxPoints > 0) {
@@ -0,0 +1,185 @@
+import argparse
+import glob
+import json
+import os
+import re
+
+import numpy as np
+
+"""
+season_series.py
+
+Per-driver series of a season, computed once at build time so the rankings chart
+only binds arrays (no per-load parsing of the steps).
+- `data/series_{year}.json` (drivers) and `data/constructors_series_{year}.json`
+  (constructors, from `constructors_history.py`).
+- `steps`: the x axis (short event label, session, date, location, points still
+  available, the champion once clinched, whether the step has results).
+- `drivers`: one entry per driver in final championship order with `ranks`,
+  `rankLabels` ('DSQ'), `points`, `gaps` (points behind the leader), `changes`
+  (places gained since the previous step, + = up), `results` (the session's
+  result string) and `titleStatus`; `null` where the driver is not listed.
+  `label` is the short chart label ("Verstappen", "M. Schumacher" when two
+  drivers share a last name), `color` the resolved team color.
+"""
+
+from perf_utils import add_profile_args, profiled, timed
+from season_steps import entry_key
+from team_colors import get_resolver
+
+DEFAULT_COLOR = '#999999'
+
+def series_path(year, constructors=False):
+    return f'data/{"constructors_series" if constructors else "series"}_{year}.json'
+
+def event_label(step):
+    # "Bahrain" or "Bahrain (S)"
+    name = step['eventName'].replace(" Grand Prix", "").replace("Pre-Season", "Test")
+    return f"{name} (S)" if step.get('session') == 'Sprint' else name
+
+def last_name(driver):
+    first, name = driver.get('firstName', ''), driver['name']
+    return name[len(first):].strip() if first and name.startswith(first) else name
+
+def short_labels(entries):
+    """Last name, or "F. Last" when several drivers of the season share it (constructors: the team)."""
+    counts = {}
+    for e in entries:
+        counts[e['lastName']] = counts.get(e['lastName'], 0) + 1
+    labels = []
+    for e in entries:
+        if e['constructor'] or counts[e['lastName']] == 1 or not e['firstName']:
+            labels.append(e['lastName'])
+        else:
+            labels.append(f"{e['firstName'][0]}. {e['lastName']}")
+    return labels
+
+def optional(values, listed):
+    """Array row as a JSON list with None where the driver is not listed."""
+    return [v if ok else None for v, ok in zip(values, listed)]
+
+def number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
+
+def build_series(history, year):
+    """The series document of one season (drivers' or constructors' history)."""
+    keys = {}
+    entries = []
+    for step in history:
+        for d in step['standings']:
+            key = entry_key(d)
+            if key not in keys:
+                keys[key] = len(keys)
+                entries.append({
+                    'key': key,
+                    'name': d['name'],
+                    'firstName': d.get('firstName', ''),
+                    'lastName': last_name(d),
+                    'constructor': 'drivers' in d,
+                    'team': d.get('team') or '',
+                    'color': None,
+                })
+
+    n_steps, n_drivers = len(history), len(keys)
+    points = np.full((n_steps, n_drivers), np.nan)
+    ranks = np.zeros((n_steps, n_drivers), dtype=np.int32)
+    dsq = np.zeros((n_steps, n_drivers), dtype=bool)
+    results = [[None] * n_steps for _ in range(n_drivers)]
+    status = [[None] * n_steps for _ in range(n_drivers)]
+    for i, step in enumerate(history):
+        race_results = step.get('raceResults') or {}
+        for d in step['standings']:
+            j = keys[entry_key(d)]
+            points[i, j] = float(d['points'])
+            ranks[i, j] = int(d['rank'])
+            dsq[i, j] = d.get('rankDisplay') == 'DSQ'
+            results[j][i] = race_results.get(d.get('lookupKey'))
+            status[j][i] = d.get('titleStatus')
+            entry = entries[j]
+            entry['team'] = d.get('team') or entry['team']
+            # First real color wins (like the chart did); fallbacks are resolved below
+            if entry['color'] is None and d.get('color') and d['color'] != '#555555':
+                entry['color'] = d['color']
+
+    listed = ~np.isnan(points)
+    leader = np.where(listed & ~dsq, points, -np.inf).max(axis=1, initial=-np.inf)[:, None]
+    gaps = np.where(listed, leader - points, np.nan)
+    previous = np.vstack([np.zeros((1, n_drivers), dtype=np.int32), ranks[:-1]])
+    changes = np.where(listed & (previous > 0), previous - ranks, 0)
+    was_listed = np.vstack([np.zeros((1, n_drivers), dtype=bool), listed[:-1]])
+
+    resolver = get_resolver()
+    labels = short_labels(entries)
+    last_rank = np.array([ranks[listed[:, j], j][-1] if listed[:, j].any() else 999 for j in range(n_drivers)])
+    drivers = []
+    for j in np.argsort(last_rank, kind='stable'):
+        e = entries[j]
+        rank_labels = [('DSQ' if dsq[i, j] else int(ranks[i, j])) for i in range(n_steps)]
+        driver = {
+            'key': e['key'],
+            'name': e['name'],
+            'firstName': e['firstName'],
+            'label': labels[j],
+            'team': e['team'],
+            'color': e['color'] or resolver.resolve(e['team'] or 'Unknown', year) or DEFAULT_COLOR,
+            'ranks': optional(ranks[:, j].tolist(), listed[:, j]),
+            'rankLabels': optional(rank_labels, listed[:, j]),
+            'points': optional([number(p) for p in np.nan_to_num(points[:, j])], listed[:, j]),
+            'gaps': optional([number(g) for g in np.nan_to_num(gaps[:, j])], listed[:, j]),
+            'changes': optional(changes[:, j].tolist(), listed[:, j] & was_listed[:, j]),
+            'results': results[j],
+        }
+        if any(status[j]):
+            driver['titleStatus'] = status[j]
+        drivers.append(driver)
+
+    steps = []
+    for step in history:
+        meta = {
+            'label': event_label(step),
+            'eventName': step['eventName'],
+            'session': step.get('session', 'Race'),
+            'date': step['date'],
+            'location': step['location'],
+            'hasResults': bool(step.get('raceResults')),
+        }
+        if 'remainingPoints' in step:
+            meta['remainingPoints'] = number(step['remainingPoints'])
+        champion = next((d['name'] for d in step['standings'] if d.get('titleStatus') == 'clinched'), None)
+        if champion:
+            meta['champion'] = champion
+        steps.append(meta)
+
+    return {'year': year, 'version': 1, 'steps': steps, 'drivers': drivers}
+
+@timed('json write')
+def save_series(history, year, constructors=False):
+    filename = series_path(year, constructors)
+    with open(filename, 'w') as f:
+        json.dump(build_series(history, year), f, separators=(',', ':'))
+    print(f"Saved {filename}")
+
+def derive(years=None):
+    """Writes both series files for every existing season (or only `years`)."""
+    for path in sorted(glob.glob('data/standings_history_*.json')):
+        match = re.fullmatch(r'standings_history_(\d{4})\.json', os.path.basename(path))
+        if not match or (years and int(match.group(1)) not in years):
+            continue
+        year = int(match.group(1))
+        for constructors, source in ((False, path), (True, f'data/constructors_history_{year}.json')):
+            if not os.path.exists(source):
+                continue
+            with open(source, 'r') as f:
+                history = json.load(f)
+            if history:
+                save_series(history, year, constructors)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write per-driver chart series from the season files")
+    parser.add_argument("--years", type=int, nargs='+', help="Seasons to derive (default: all downloaded)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'season_series'):
+        derive(args.years)
@@ -0,0 +1,159 @@
+import copy
+
+import pandas as pd
+
+from driver_names import normalize_name
+from perf_utils import timed
+
+"""
+season_steps.py
+
+Step construction shared by every data source (`prepare_web_data` over the
+Ergast/FastF1 API, `ingest_kaggle` over the offline CSV archive), so both write
+the same `standings_history_{year}.json`.
+- Race steps: standings ordered by points (then wins), one visual rank per driver,
+  the 1997 Schumacher disqualification pushed to the bottom as 'DSQ'. Every
+  step's standings are stored in rank order.
+- Sprint steps: the previous standings plus the sprint points, re-ranked with
+  countback on the previous rank.
+- Result strings ('1', 'DNF', 'DSQ', ...) and display dates ('09 Mar').
+"""
+
+def lookup_key(first, last):
+    """Key the frontend uses per driver: "{last}_{first}", normalized."""
+    return f"{normalize_name(last)}_{normalize_name(first)}"
+
+def format_date(value):
+    """Event date as shown in the UI, e.g. "09 Mar"."""
+    try:
+        return pd.to_datetime(str(value)).strftime("%d %b")
+    except:
+        return str(value)
+
+def is_championship_dsq(year, round_num, first, last):
+    """Michael Schumacher was excluded from the 1997 championship after the final round."""
+    return year == 1997 and int(round_num) == 17 and \
+        str(last).lower() == 'schumacher' and str(first).lower() == 'michael'
+
+def result_display(position_text):
+    """
+    Classified position ('1', '2', ...) or the outcome for unclassified drivers.
+    'R' = Retired, 'W' = Withdrawn, 'N' = Not Classified -> 'DNF'; 'D' = Disqualified -> 'DSQ'.
+    """
+    position_text = str(position_text)
+    if position_text.isdigit():
+        return position_text
+    if position_text in ['R', 'W', 'N']:
+        return 'DNF'
+    if position_text == 'D':
+        return 'DSQ'
+    return position_text # Fallback e.g. 'NC'
+
+@timed('rank assignment')
+def race_standings(rows, year, round_num, color_map=None):
+    """
+    Standings entries after a race.
+    `rows`: dicts with first, last, points, wins and team, in the source's order.
+    `color_map`: lookupKey -> {'color': ...} from the race session (optional).
+    """
+    color_map = color_map or {}
+    # Rank on points ourselves (the API rank is biased by e.g. the 1997 DSQ); stable on ties
+    rows = sorted(rows, key=lambda r: (-float(r['points']), -float(r.get('wins') or 0)))
+
+    visual_rank_counter = 1
+    bottom_rank = len(rows) # Dynamic bottom rank (e.g. 28)
+    standings = []
+    for row in rows:
+        first, last = row['first'], row['last']
+
+        # Default: Assign next visual rank
+        rank_to_assign = visual_rank_counter
+        is_dsq = is_championship_dsq(year, round_num, first, last)
+        if is_dsq:
+            rank_to_assign = bottom_rank # Force to dynamic bottom (DSQ)
+        else:
+            # If NOT DSQ, consume the rank slot
+            visual_rank_counter += 1
+
+        key = lookup_key(first, last)
+        color = color_map[key]['color'] if key in color_map else None
+
+        standings.append({
+            'name': f"{first} {last}", # Full Name
+            'firstName': first,
+            'lookupKey': key, # Pass key to frontend
+            'points': float(row['points']),
+            'team': row['team'],
+            'color': color,
+            'rank': rank_to_assign,
+            'rankDisplay': "DSQ" if is_dsq else str(rank_to_assign)
+        })
+    # Stored in rank order, so viewers never re-sort (the DSQ entry goes last)
+    standings.sort(key=lambda d: d['rank'])
+    return standings
+
+@timed('rank assignment (sprint)')
+def sprint_standings(previous_standings, sprint_points):
+    """
+    Standings after a sprint: a copy of `previous_standings` with `sprint_points`
+    (full name -> points) added. Drivers absent from the previous standings are skipped.
+    """
+    sprint_standings_state = copy.deepcopy(previous_standings)
+    sprint_driver_map = {d['name']: d for d in sprint_standings_state}
+    for drv_name, pts in sprint_points.items():
+        if drv_name in sprint_driver_map:
+            sprint_driver_map[drv_name]['points'] += pts
+
+    # Sort by (Points Desc, Previous Rank Asc): equal sprint points keep the
+    # countback from the previous round
+    standings = list(sprint_driver_map.values())
+    standings.sort(key=lambda x: (float(x['points']) * -1, x.get('rank', 999)))
+
+    s_current_assign = 0
+    s_prev_points = -1.0
+    s_prev_old_rank = -1
+    for idx, d in enumerate(standings, 1):
+        pts = float(d['points'])
+        old_rank = d.get('rank', 999) # fallback
+
+        # Tie only if Points AND Old Rank match (rare, but possible if tied correctly before)
+        if pts == s_prev_points and old_rank == s_prev_old_rank:
+            d['rank'] = s_current_assign
+        else:
+            s_current_assign = idx
+            d['rank'] = s_current_assign
+
+        s_prev_points = pts
+        s_prev_old_rank = old_rank
+    return standings
+
+def make_step(round_num, event_name, session, date, location, standings, results):
+    return {
+        'round': int(round_num),
+        'eventName': event_name,
+        'session': session,
+        'date': date,
+        'location': location,
+        'standings': standings,
+        'raceResults': results
+    }
+
+def apply_fallback_colors(history, year, resolver):
+    """Fills missing colors (era liveries, exact, case-insensitive and alias matches), tagged as fallback."""
+    for step in history:
+        for driver in step['standings']:
+            if not driver['color']:
+                # Tagged so later patch runs may refresh it
+                color = resolver.resolve(driver['team'], year)
+                if color:
+                    driver['color'] = color
+                    driver['colorSource'] = 'fallback'
+
+def entry_key(driver):
+    """`lookupKey` of a standings entry; derived for older files that lack it (name = last name there)."""
+    if driver.get('lookupKey'):
+        return driver['lookupKey']
+    first = driver.get('firstName', '')
+    name = driver.get('name', '')
+    last = name[len(first):].strip() if first and name.startswith(first) else name
+    return lookup_key(first, last)
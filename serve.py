@@ -0,0 +1,238 @@
+import argparse
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import urlsplit, unquote
+
+"""
+serve.py
+
+Threaded static server for the dashboard (replaces `python3 -m http.server`).
+- Serves the pages, scripts and styles at the top level, `fallback_teams.json`
+  and everything under `data/`, `animations/` and `fonts/`. Nothing else in the
+  repository (state, caches, .git) is reachable.
+- Files up to `MEMORY_LIMIT` are read once per version (size + mtime) and kept in
+  memory with their gzip (and brotli, when the `brotli` package is installed)
+  variants and strong content ETags; `--precompress` builds them all at start-up.
+- Larger files (the MP4s) are streamed with `sendfile` and a strong ETag from
+  their content hash, computed once per version.
+- `If-None-Match` / `If-Modified-Since` -> 304, single `Range` requests (video
+  seeking) -> 206 with `If-Range`, unsatisfiable ranges -> 416.
+- `Cache-Control` per path: pages, scripts and season data revalidate on every
+  load (`no-cache`; cheap with the ETag), videos are cached for an hour and fonts
+  are immutable.
+"""
+
+import http_utils
+
+DEFAULT_PORT = 8000
+MEMORY_LIMIT = 8 * 1024 * 1024
+STREAM_CHUNK = 1024 * 1024
+
+PUBLIC_DIRS = ('data', 'animations', 'fonts')
+PUBLIC_FILES = ('fallback_teams.json',)
+PUBLIC_EXTENSIONS = ('.html', '.js', '.css', '.ico', '.png', '.svg')
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+# First matching prefix wins
+CACHE_POLICIES = [
+    ('fonts/', 'public, max-age=31536000, immutable'),
+    ('animations/', 'public, max-age=3600'),
+    ('', 'no-cache'),
+]
+
+mimetypes.add_type('application/json', '.json')
+mimetypes.add_type('text/javascript', '.js')
+mimetypes.add_type('video/mp4', '.mp4')
+mimetypes.add_type('font/ttf', '.ttf')
+
+def cache_policy(relative):
+    return next(policy for prefix, policy in CACHE_POLICIES if relative.startswith(prefix))
+
+def content_type(path):
+    kind = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if kind.startswith('text/') or kind == 'application/json':
+        kind += '; charset=utf-8'
+    return kind
+
+def is_compressible(kind):
+    return kind.startswith(COMPRESSIBLE_TYPES)
+
+def public_path(root, url_path):
+    """(absolute path, relative path) for a public URL path, or None."""
+    relative = unquote(url_path).lstrip('/') or 'index.html'
+    parts = relative.split('/')
+    if any(part in ('', '.', '..') or part.startswith('.') for part in parts):
+        return None
+    if len(parts) == 1:
+        if relative not in PUBLIC_FILES and not relative.endswith(PUBLIC_EXTENSIONS):
+            return None
+    elif parts[0] not in PUBLIC_DIRS:
+        return None
+    path = os.path.join(root, *parts)
+    # No symlink escapes out of the served tree
+    if os.path.commonpath([os.path.realpath(path), os.path.realpath(root)]) != os.path.realpath(root):
+        return None
+    return path, relative
+
+class FileEntry:
+    """One version (size, mtime) of a file: in memory with its variants, or streamed."""
+    def __init__(self, path, stat):
+        self.path = path
+        self.version = (stat.st_size, stat.st_mtime_ns)
+        self.size = stat.st_size
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.mtime = int(stat.st_mtime)
+        self.content_type = content_type(path)
+        if self.size <= MEMORY_LIMIT:
+            with open(path, 'rb') as f:
+                self.rep = http_utils.Representation(f.read(), self.content_type, is_compressible(self.content_type))
+            self.etag = self.rep.etag
+        else:
+            self.rep = None
+            self.etag = f'"{file_hash(path)}"'
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(STREAM_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+class FileCache:
+    """Path -> current `FileEntry`; rebuilt when the file's size or mtime changes."""
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        stat = os.stat(path)
+        entry = self.entries.get(path)
+        if entry is not None and entry.version == (stat.st_size, stat.st_mtime_ns):
+            return entry
+        entry = FileEntry(path, stat) # Outside the lock; a racing rebuild just wins last
+        with self.lock:
+            self.entries[path] = entry
+        return entry
+
+class StaticHandler(http_utils.Handler):
+    root = '.'
+    files = None
+    server_version = 'F1Timeline'
+
+    def do_GET(self):
+        self.serve(head=False)
+
+    def do_HEAD(self):
+        self.serve(head=True)
+
+    def serve(self, head):
+        target = public_path(self.root, urlsplit(self.path).path)
+        if target is None or not os.path.isfile(target[0]):
+            self.send_error_json(404, "Not found")
+            return
+        path, relative = target
+        try:
+            entry = self.files.get(path)
+        except OSError:
+            self.send_error_json(404, "Not found")
+            return
+        cache_control = cache_policy(relative)
+
+        if entry.rep is not None and entry.rep.variants and not self.headers.get('Range'):
+            # Compressible and in memory: negotiated representation (no ranges on these)
+            self.send_representation(entry.rep, cache_control, head=head)
+            return
+
+        if etag_or_date_matches(self.headers, entry):
+            self.send_not_modified(entry.etag, cache_control)
+            return
+
+        byte_range = http_utils.parse_range(self.headers.get('Range'), entry.size)
+        if_range = self.headers.get('If-Range')
+        if byte_range is not None and if_range and if_range.strip() != entry.etag:
+            byte_range = None # The client's copy is stale: send the whole file
+        if byte_range == 'unsatisfiable':
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{entry.size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        start, end = byte_range or (0, entry.size - 1)
+        length = max(0, end - start + 1)
+        self.send_response(206 if byte_range else 200)
+        self.send_header('Content-Type', entry.content_type)
+        self.send_header('Content-Length', str(length))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', entry.etag)
+        self.send_header('Last-Modified', entry.last_modified)
+        self.send_header('Cache-Control', cache_control)
+        if entry.rep is not None and entry.rep.variants:
+            self.send_header('Vary', 'Accept-Encoding')
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{entry.size}')
+        self.end_headers()
+        if head or not length:
+            return
+
+        if entry.rep is not None:
+            self.wfile.write(entry.rep.body[start:end + 1])
+        else:
+            with open(entry.path, 'rb') as f:
+                self.connection.sendfile(f, offset=start, count=length)
+
+def etag_or_date_matches(headers, entry):
+    """304 check: `If-None-Match` when sent, else `If-Modified-Since`."""
+    if headers.get('If-None-Match'):
+        return http_utils.etag_matches(headers['If-None-Match'], entry.etag)
+    since = headers.get('If-Modified-Since')
+    if since:
+        try:
+            return entry.mtime <= parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def precompress(root, files):
+    """Loads and compresses every public in-memory file up front. Returns (files, seconds)."""
+    start = time.perf_counter()
+    count = 0
+    for directory, dirs, names in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in names:
+            relative = os.path.relpath(os.path.join(directory, name), root).replace(os.sep, '/')
+            target = public_path(root, '/' + relative)
+            if target is not None and os.path.getsize(target[0]) <= MEMORY_LIMIT:
+                files.get(target[0])
+                count += 1
+    return count, time.perf_counter() - start
+
+def make_static_server(root='.', host='127.0.0.1', port=DEFAULT_PORT, warm=False, log=False):
+    files = FileCache()
+    if warm:
+        count, seconds = precompress(root, files)
+        print(f"Precompressed {count} files in {seconds:.2f}s ({', '.join(http_utils.CODINGS)})")
+    handler = type('Handler', (StaticHandler,), {'root': root, 'files': files, 'log_requests': log})
+    return http_utils.make_server(handler, host, port)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the dashboard with compression, ETags and range requests")
+    parser.add_argument("--host", default='127.0.0.1', help="Interface to bind (default: 127.0.0.1; 0.0.0.0 for the network)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--root", default='.', help="Repository root to serve (default: .)")
+    parser.add_argument("--precompress", action="store_true", help="Load and compress every file before serving")
+    parser.add_argument("--log", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    server = make_static_server(args.root, args.host, args.port, args.precompress, args.log)
+    print(f"Serving the dashboard on http://{args.host}:{args.port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,268 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import re
+import sqlite3
+import time
+
+"""
+state_store.py
+
+Embedded download/build state (SQLite) shared by every process that fetches data.
+- `seasons`: one row per season with its status ('running', 'complete', 'failed',
+  'rate_limited'), attempts, last start / fetch time, duration, step count and
+  the last error.
+- `rounds`: one row per recorded step (round + session) with its date and the time
+  it was last fetched.
+- Every update is a short `BEGIN IMMEDIATE` transaction in WAL mode, so parallel
+  downloaders, `finalize_downloads.py` and `watch.py` never lose each other's
+  updates and can read the state at any time.
+- `data/seasons.json` (the web manifest) is exported from the store and replaced
+  atomically. The legacy `data/download_progress.json` is imported on first use.
+"""
+
+STATE_DB = 'state.sqlite'
+MANIFEST_PATH = 'data/seasons.json'
+LEGACY_PROGRESS_PATH = 'data/download_progress.json'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seasons (
+    year INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    started_at TEXT,
+    fetched_at TEXT,
+    seconds REAL,
+    steps INTEGER,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    year INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    session TEXT NOT NULL,
+    event TEXT,
+    date TEXT,
+    fetched_at TEXT,
+    PRIMARY KEY (year, round, session)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+def timestamp():
+    return time.strftime('%Y-%m-%dT%H:%M:%S')
+
+def data_path(year):
+    return f'data/standings_history_{year}.json'
+
+def season_files():
+    files = {}
+    for path in glob.glob(data_path('*')):
+        match = re.search(r'(\d{4})', os.path.basename(path))
+        if match:
+            files[int(match.group(1))] = path
+    return files
+
+class StateStore:
+    """
+    Transactional season/round state. Cheap to open; use one per process (or thread).
+    """
+    def __init__(self, path=STATE_DB, timeout=30):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        # Autocommit mode: transactions are opened explicitly in `transaction()`
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(f'PRAGMA busy_timeout={int(timeout * 1000)}')
+        with self.transaction():
+            # executescript() would commit on its own, so run the statements one by one
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    self.conn.execute(statement)
+        self.import_progress()
+
+    def close(self):
+        self.conn.close()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Write transaction; takes the database write lock up front so read-modify-write is safe."""
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+
+    # --- Seasons ---
+
+    def season(self, year):
+        row = self.conn.execute('SELECT * FROM seasons WHERE year = ?', (year,)).fetchone()
+        return dict(row) if row else None
+
+    def seasons(self, status=None):
+        if status is None:
+            rows = self.conn.execute('SELECT * FROM seasons ORDER BY year')
+        else:
+            rows = self.conn.execute('SELECT * FROM seasons WHERE status = ? ORDER BY year', (status,))
+        return [dict(row) for row in rows]
+
+    def is_complete(self, year):
+        season = self.season(year)
+        return season is not None and season['status'] == 'complete'
+
+    def start_season(self, year):
+        """Marks a fetch of `year` as running and counts the attempt."""
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO seasons (year, status, attempts, started_at) VALUES (?, 'running', 1, ?) "
+                "ON CONFLICT(year) DO UPDATE SET status = 'running', attempts = attempts + 1, "
+                "started_at = excluded.started_at, error = NULL",
+                (year, timestamp()))
+
+    def finish_season(self, year, status, seconds=None, error=None):
+        """Records a fetch that did not complete ('failed' or 'rate_limited')."""
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO seasons (year, status, seconds, error) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(year) DO UPDATE SET status = excluded.status, "
+                "seconds = excluded.seconds, error = excluded.error",
+                (year, status, seconds, error))
+
+    def complete_season(self, year, history, seconds=None, fetched=True):
+        """
+        Marks `year` complete with its steps (a loaded history). With `fetched`, the
+        season and its rounds are stamped as fetched now; otherwise (an existing file
+        adopted as is) only missing rounds are added.
+        """
+        now = timestamp()
+        fetched_at = now if fetched else None
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO seasons (year, status, fetched_at, seconds, steps) VALUES (?, 'complete', ?, ?, ?) "
+                "ON CONFLICT(year) DO UPDATE SET status = 'complete', "
+                "fetched_at = COALESCE(excluded.fetched_at, fetched_at), "
+                "seconds = COALESCE(excluded.seconds, seconds), steps = excluded.steps, error = NULL",
+                (year, fetched_at, seconds, len(history)))
+            rows = [(year, step.get('round'), step.get('session', 'Race'), step.get('eventName'),
+                     step.get('date'), fetched_at) for step in history]
+            if fetched:
+                conn.execute('DELETE FROM rounds WHERE year = ?', (year,))
+            conn.executemany('INSERT OR IGNORE INTO rounds VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+    def complete_from_file(self, year, seconds=None):
+        """Marks a successful fetch of `year` from its saved file ('empty' when nothing was saved)."""
+        path = data_path(year)
+        if not os.path.exists(path):
+            self.finish_season(year, 'empty', seconds, error='no completed rounds')
+            return []
+        with open(path, 'r') as f:
+            history = json.load(f)
+        self.complete_season(year, history, seconds)
+        return history
+
+    # --- Rounds ---
+
+    def rounds(self, year):
+        rows = self.conn.execute('SELECT * FROM rounds WHERE year = ? ORDER BY round, session DESC', (year,))
+        return [dict(row) for row in rows]
+
+    def recorded_sessions(self, year):
+        """(round, session) pairs recorded for `year`."""
+        rows = self.conn.execute('SELECT round, session FROM rounds WHERE year = ?', (year,))
+        return {(row['round'], row['session']) for row in rows}
+
+    # --- Legacy files / manifest ---
+
+    def import_progress(self, path=LEGACY_PROGRESS_PATH):
+        """Imports `download_progress.json` (completed years) once. Returns the number of years added."""
+        if not os.path.exists(path):
+            return 0
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'imported_progress'").fetchone()
+        if row is not None:
+            return 0
+        try:
+            with open(path, 'r') as f:
+                years = [int(y) for y in json.load(f)]
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Could not import {path}: {e}")
+            years = []
+
+        with self.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO seasons (year, status) VALUES (?, 'complete')",
+                             [(y,) for y in years])
+            added = conn.total_changes - before
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('imported_progress', ?)", (timestamp(),))
+        if added:
+            print(f"Imported {added} completed seasons from {path}")
+        return added
+
+    def adopt_files(self):
+        """Registers downloaded season files the store does not know yet (e.g. a fresh clone)."""
+        known = {row['year'] for row in self.conn.execute('SELECT year FROM seasons WHERE steps IS NOT NULL')}
+        for year, path in sorted(season_files().items()):
+            if year in known:
+                continue
+            try:
+                with open(path, 'r') as f:
+                    history = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Skipping unreadable {path}: {e}")
+                continue
+            if history:
+                self.complete_season(year, history, fetched=False)
+
+    def manifest_years(self):
+        """Seasons the web can load: recorded with steps and present on disk, newest first."""
+        self.adopt_files()
+        files = season_files()
+        rows = self.conn.execute('SELECT year FROM seasons WHERE steps > 0 ORDER BY year DESC')
+        return [row['year'] for row in rows if row['year'] in files]
+
+    def export_manifest(self, path=MANIFEST_PATH):
+        """Writes `data/seasons.json` from the store (atomic replace). Returns the years."""
+        years = self.manifest_years()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(years, f)
+        os.replace(tmp, path)
+        return years
+
+def print_seasons(store):
+    print(f"{'Year':<6} | {'Status':<12} | {'Tries':>5} | {'Steps':>5} | {'Fetched':<19} | {'Secs':>7} | Error")
+    print("-" * 80)
+    for season in store.seasons():
+        seconds = f"{season['seconds']:.1f}" if season['seconds'] is not None else ''
+        print(f"{season['year']:<6} | {season['status']:<12} | {season['attempts']:>5} | "
+              f"{season['steps'] if season['steps'] is not None else '':>5} | {season['fetched_at'] or '':<19} | "
+              f"{seconds:>7} | {season['error'] or ''}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the download state and export the web manifest")
+    parser.add_argument("--db", default=STATE_DB, help=f"State database (default: {STATE_DB})")
+    parser.add_argument("--export", action="store_true", help=f"Write {MANIFEST_PATH} from the store")
+    parser.add_argument("--year", type=int, help="Show the recorded rounds of one season")
+    args = parser.parse_args()
+
+    store = StateStore(args.db)
+    if args.export:
+        years = store.export_manifest()
+        print(f"Wrote {len(years)} seasons to {MANIFEST_PATH}")
+    elif args.year:
+        for row in store.rounds(args.year):
+            print(f"R{row['round']:<3} {row['session']:<7} {row['date'] or '':<12} {row['event'] or '':<32} {row['fetched_at'] or ''}")
+    else:
+        print_seasons(store)
+    store.close()
@@ -0,0 +1,299 @@
+import argparse
+import datetime
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+"""
+synth_season.py
+
+Reproducible synthetic seasons for scale and stress testing (no network).
+- Simulates a season with a seeded RNG: team pace + driver skill + per-session
+  noise, retirements, disqualifications ('DSQ', no points), dead heats (a shared
+  position with the points of both places averaged, so totals can tie), sprint
+  weekends every N rounds and substitutions (a reserve takes a seat for a few
+  rounds, or for the rest of the season).
+- Builds the steps through `season_steps` and annotates them with
+  `championship_math`, under the real rules of `--year` (points table, sprint
+  table, fastest-lap point), so the files are valid `standings_history` input for
+  the animator, the web pages, the color pipeline and the verifiers.
+- Writes `{out}/data/standings_history_{year}.json` (plus the constructors' history
+  and chart series with `--derived`) and copies `fallback_teams.json` into `{out}`,
+  so any tool can run with `{out}` as its working directory. The same seed and
+  options always give the same files.
+"""
+
+import season_steps
+import championship_math
+from perf_utils import add_profile_args, profiled, record
+from constructors_history import constructors_history, constructors_path
+from rescore import FASTEST_LAP_MAX_POSITION, POINTS_SYSTEMS, SPRINT_SYSTEMS
+from season_series import build_series, series_path
+from team_colors import get_resolver
+
+DEFAULT_OUT = 'logs/synthetic'
+DEFAULT_YEAR = 2024
+SEAT_PER_TEAM = 2
+PACE_SPREAD = 1.5   # Team pace (sd) dominates...
+SKILL_SPREAD = 1.0  # ...driver skill...
+SESSION_NOISE = 1.2 # ...and each session reshuffles a little
+RESERVE_SKILL = -0.5
+PERMANENT_SUBSTITUTION = 0.3 # Share of substitutes who keep the seat
+
+TEAMS = ["Red Bull", "Ferrari", "Mercedes", "McLaren", "Aston Martin", "Alpine",
+         "Williams", "RB", "Sauber", "Haas", "Jordan", "Benetton", "Toyota", "Brawn",
+         "Lotus", "Tyrrell", "Ligier", "Arrows", "Minardi", "Jaguar"]
+FIRST_NAMES = ["Max", "Lewis", "Charles", "Lando", "Oscar", "George", "Carlos", "Fernando",
+               "Sergio", "Nico", "Kimi", "Valtteri", "Pierre", "Esteban", "Yuki", "Lance",
+               "Alexander", "Daniel", "Kevin", "Zhou", "Logan", "Liam", "Oliver", "Franco",
+               "Mika", "Ayrton", "Jacques", "Rubens", "Felipe", "Sébastien", "Jenson", "Nelson"]
+LAST_NAMES = ["Verstappen", "Hamilton", "Leclerc", "Norris", "Piastri", "Russell", "Sainz",
+              "Alonso", "Pérez", "Hülkenberg", "Räikkönen", "Bottas", "Gasly", "Ocon", "Tsunoda",
+              "Stroll", "Albon", "Ricciardo", "Magnussen", "Guanyu", "Sargeant", "Lawson",
+              "Bearman", "Colapinto", "Häkkinen", "Senna", "Villeneuve", "Barrichello", "Massa",
+              "Buemi", "Button", "Piquet", "Fisichella", "Trulli", "Coulthard", "Heidfeld"]
+EVENTS = [("Bahrain", "Sakhir"), ("Saudi Arabian", "Jeddah"), ("Australian", "Melbourne"),
+          ("Japanese", "Suzuka"), ("Chinese", "Shanghai"), ("Miami", "Miami"),
+          ("Emilia Romagna", "Imola"), ("Monaco", "Monaco"), ("Canadian", "Montréal"),
+          ("Spanish", "Barcelona"), ("Austrian", "Spielberg"), ("British", "Silverstone"),
+          ("Hungarian", "Budapest"), ("Belgian", "Spa-Francorchamps"), ("Dutch", "Zandvoort"),
+          ("Italian", "Monza"), ("Azerbaijan", "Baku"), ("Singapore", "Marina Bay"),
+          ("United States", "Austin"), ("Mexico City", "Mexico City"), ("São Paulo", "São Paulo"),
+          ("Las Vegas", "Las Vegas"), ("Qatar", "Lusail"), ("Abu Dhabi", "Yas Island")]
+
+def team_names(count):
+    """`count` team names: real ones first (they resolve to colors), then numbered ones."""
+    return [TEAMS[i] if i < len(TEAMS) else f"Synthetic Racing {i + 1 - len(TEAMS)}" for i in range(count)]
+
+def team_colors(teams, rng):
+    """Team -> color: the resolver's color for real teams, a random one for the rest."""
+    resolver = get_resolver()
+    colors = {}
+    for team in teams:
+        colors[team] = resolver.resolve(team) or '#%02X%02X%02X' % tuple(int(c) for c in rng.integers(40, 256, 3))
+    return colors
+
+def driver_names(count, rng):
+    """`count` (first, last) pairs with unique `lookupKey`s (numbered once the combinations run out)."""
+    pairs = [(f, l) for l in LAST_NAMES for f in FIRST_NAMES]
+    names, keys = [], set()
+    for i in rng.permutation(len(pairs)):
+        first, last = pairs[i]
+        key = season_steps.lookup_key(first, last)
+        if key not in keys:
+            keys.add(key)
+            names.append((first, last))
+        if len(names) == count:
+            return names
+    n = 2
+    while len(names) < count:
+        first, last = pairs[len(names) % len(pairs)]
+        last = f"{last} {n}"
+        key = season_steps.lookup_key(first, last)
+        if key not in keys:
+            keys.add(key)
+            names.append((first, last))
+        else:
+            n += 1
+    return names
+
+def event(round_num):
+    name, location = EVENTS[(round_num - 1) % len(EVENTS)]
+    lap = (round_num - 1) // len(EVENTS)
+    suffix = f" {lap + 1}" if lap else ''
+    return f"{name} Grand Prix{suffix}", location
+
+def season_start(year):
+    """First Sunday of March (as a date; only day and month are shown)."""
+    start = datetime.date(year, 3, 1)
+    return start + datetime.timedelta(days=(6 - start.weekday()) % 7)
+
+class SyntheticSeason:
+    """Grid, substitutions and session results of one simulated season."""
+    def __init__(self, year, drivers, rounds, sprint_every, substitutions, tie_rate, dsq_rate, dnf_rate, rng):
+        self.year = year
+        self.rounds = rounds
+        self.sprint_every = sprint_every
+        self.tie_rate = tie_rate
+        self.dsq_rate = dsq_rate
+        self.dnf_rate = dnf_rate
+        self.rng = rng
+
+        n_teams = -(-drivers // SEAT_PER_TEAM)
+        self.teams = team_names(n_teams)
+        self.colors = team_colors(self.teams, rng)
+        self.pace = dict(zip(self.teams, rng.normal(0, PACE_SPREAD, n_teams)))
+
+        names = driver_names(drivers + substitutions, rng)
+        self.drivers = [{'first': f, 'last': l, 'key': season_steps.lookup_key(f, l)} for f, l in names]
+        for d, skill in zip(self.drivers, rng.normal(0, SKILL_SPREAD, len(self.drivers))):
+            d['skill'] = skill
+        seats = [(self.teams[i // SEAT_PER_TEAM], self.drivers[i]) for i in range(drivers)]
+
+        # lineups[round] = [(team, driver)]; each substitute replaces one seat from a round on
+        self.lineups = {r: list(seats) for r in range(1, rounds + 1)}
+        for reserve in self.drivers[drivers:]:
+            reserve['skill'] += RESERVE_SKILL
+            seat = int(rng.integers(len(seats)))
+            first = int(rng.integers(min(2, rounds), rounds + 1))
+            last = rounds if rng.random() < PERMANENT_SUBSTITUTION else min(rounds, first + int(rng.integers(0, 3)))
+            for r in range(first, last + 1):
+                team, _ = self.lineups[r][seat]
+                self.lineups[r][seat] = (team, reserve)
+
+    def is_sprint(self, round_num):
+        return self.sprint_every > 0 and round_num % self.sprint_every == 0
+
+    def session(self, round_num, table, fastest_lap=0):
+        """
+        One session: [(team, driver, result string, points)] in finishing order.
+        Disqualified and retired drivers score nothing; a dead heat shares a
+        position and the average points of both places.
+        """
+        lineup = self.lineups[round_num]
+        performance = [self.pace[team] + d['skill'] + self.rng.normal(0, SESSION_NOISE) for team, d in lineup]
+        order = sorted(range(len(lineup)), key=lambda i: -performance[i])
+        outcome = ['DSQ' if self.rng.random() < self.dsq_rate else 'DNF' if self.rng.random() < self.dnf_rate else None
+                   for _ in order]
+        classified = [i for i, o in zip(order, outcome) if o is None]
+        points = {i: (table[p] if p < len(table) else 0) for p, i in enumerate(classified)}
+        position = {i: p + 1 for p, i in enumerate(classified)}
+
+        if len(classified) > 1 and self.rng.random() < self.tie_rate:
+            p = int(self.rng.integers(min(len(table), len(classified) - 1) or 1))
+            a, b = classified[p], classified[p + 1]
+            points[a] = points[b] = (points[a] + points[b]) / 2
+            position[b] = position[a]
+        if fastest_lap and classified:
+            top = classified[:FASTEST_LAP_MAX_POSITION]
+            points[top[int(self.rng.integers(len(top)))]] += fastest_lap
+
+        results = []
+        for i, o in zip(order, outcome):
+            team, d = lineup[i]
+            results.append((team, d, o or str(position[i]), points.get(i, 0)))
+        return results
+
+def generate_season(year=DEFAULT_YEAR, drivers=20, rounds=24, sprint_every=4, substitutions=2,
+                    tie_rate=0.02, dsq_rate=0.01, dnf_rate=0.1, seed=0):
+    """Steps of a synthetic season, as `prepare_data` would write them."""
+    rng = np.random.default_rng(seed)
+    season = SyntheticSeason(year, drivers, rounds, sprint_every, substitutions, tie_rate, dsq_rate, dnf_rate, rng)
+    race_table = POINTS_SYSTEMS[championship_math.race_system(year)]
+    sprint_table = SPRINT_SYSTEMS['2021' if year == 2021 else '2022']
+    fastest_lap = 1 if year in championship_math.FASTEST_LAP_YEARS else 0
+
+    totals = {} # key -> {'first', 'last', 'points', 'wins', 'team'}, in order of first start
+    history = []
+    start = season_start(year)
+    for round_num in range(1, rounds + 1):
+        round_start = time.perf_counter()
+        event_name, location = event(round_num)
+        date_str = (start + datetime.timedelta(days=7 * (round_num - 1))).strftime("%d %b")
+        colors = {d['key']: {'color': season.colors[team]} for team, d in season.lineups[round_num]}
+
+        sessions = (['Sprint'] if season.is_sprint(round_num) else []) + ['Race']
+        for session in sessions:
+            if session == 'Sprint':
+                results = season.session(round_num, sprint_table)
+            else:
+                multiplier = 2 if (year, round_num) in championship_math.DOUBLE_POINTS_ROUNDS else 1
+                results = season.session(round_num, [p * multiplier for p in race_table], fastest_lap)
+
+            previous = history[-1]['standings'] if history else []
+            for team, d, result, points in results:
+                row = totals.setdefault(d['key'], {'first': d['first'], 'last': d['last'], 'points': 0.0, 'wins': 0})
+                row['points'] += points
+                row['team'] = team
+                if session == 'Race' and result == '1':
+                    row['wins'] += 1
+            race_results = {d['key']: result for _, d, result, _ in results}
+
+            if session == 'Sprint':
+                # Drivers starting their first session here (every driver in round 1,
+                # a reserve's debut) join the previous standings on 0 points, at the bottom
+                listed = {d['lookupKey'] for d in previous}
+                debuts = [{'first': d['first'], 'last': d['last'], 'points': 0.0, 'wins': 0, 'team': team}
+                          for team, d in season.lineups[round_num] if d['key'] not in listed]
+                if debuts:
+                    entries = season_steps.race_standings(debuts, year, round_num, colors)
+                    for rank, entry in enumerate(entries, len(previous) + 1):
+                        entry['rank'], entry['rankDisplay'] = rank, str(rank)
+                    previous = previous + entries
+                sprint_points = {f"{d['first']} {d['last']}": points for _, d, _, points in results if points > 0}
+                standings = season_steps.sprint_standings(previous, sprint_points)
+            else:
+                standings = season_steps.race_standings(list(totals.values()), year, round_num, colors)
+                # Drivers not in this round's lineup keep their last team's color
+                for entry in standings:
+                    entry['color'] = entry['color'] or season.colors[totals[entry['lookupKey']]['team']]
+            history.append(season_steps.make_step(round_num, event_name, session, date_str, location,
+                                                  standings, race_results))
+        record('round loop', round_start)
+
+    championship_math.annotate(history, year)
+    return history
+
+def write_season(history, year, out=DEFAULT_OUT, derived=False):
+    """Writes the season (and with `derived` its constructors' history and series) under `{out}/data`."""
+    data_dir = os.path.join(out, 'data')
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+    if os.path.exists('fallback_teams.json') and os.path.abspath(out) != os.path.abspath('.'):
+        shutil.copyfile('fallback_teams.json', os.path.join(out, 'fallback_teams.json'))
+
+    paths = [os.path.join(out, f'data/standings_history_{year}.json')]
+    write_start = time.perf_counter()
+    with open(paths[0], 'w') as f:
+        json.dump(history, f, indent=2)
+    record('json write', write_start)
+    if derived:
+        constructors = constructors_history(history, year)
+        outputs = [(constructors_path(year), constructors, 2),
+                   (series_path(year), build_series(history, year), None),
+                   (series_path(year, constructors=True), build_series(constructors, year), None)]
+        for relative, payload, indent in outputs:
+            paths.append(os.path.join(out, relative))
+            with open(paths[-1], 'w') as f:
+                json.dump(payload, f, indent=indent, separators=None if indent else (',', ':'))
+    return paths
+
+def synthesize(years, out=DEFAULT_OUT, derived=False, seed=0, **options):
+    """Generates and writes one season per year (seeded `seed`, `seed + 1`, ...). Returns the paths written."""
+    written = []
+    for i, year in enumerate(years):
+        start = time.perf_counter()
+        history = generate_season(year, seed=seed + i, **options)
+        paths = write_season(history, year, out, derived)
+        drivers = len({d['lookupKey'] for step in history for d in step['standings']})
+        size = sum(os.path.getsize(p) for p in paths) / 1e6
+        print(f"Saved {paths[0]} ({drivers} drivers, {len(history)} steps, {size:.1f}MB"
+              f"{f' with {len(paths) - 1} derived files' if derived else ''}) in {time.perf_counter() - start:.2f}s")
+        written.extend(paths)
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate reproducible synthetic seasons for benchmarks and stress tests")
+    parser.add_argument("--year", type=int, default=DEFAULT_YEAR, help=f"Season year, sets the scoring rules (default: {DEFAULT_YEAR})")
+    parser.add_argument("--seasons", type=int, default=1, help="Consecutive seasons to generate from --year (default: 1)")
+    parser.add_argument("--drivers", type=int, default=20, help="Race seats (default: 20; two per team)")
+    parser.add_argument("--rounds", type=int, default=24, help="Rounds per season (default: 24)")
+    parser.add_argument("--sprint-every", type=int, default=4, help="Sprint weekend every N rounds (1 = every weekend, 0 = none; default: 4)")
+    parser.add_argument("--substitutions", type=int, default=2, help="Reserve drivers who take a seat mid-season (default: 2)")
+    parser.add_argument("--tie-rate", type=float, default=0.02, help="Chance of a dead heat per session (default: 0.02)")
+    parser.add_argument("--dsq-rate", type=float, default=0.01, help="Chance per driver and session of a disqualification (default: 0.01)")
+    parser.add_argument("--dnf-rate", type=float, default=0.1, help="Chance per driver and session of a retirement (default: 0.1)")
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed (default: 0)")
+    parser.add_argument("--derived", action="store_true", help="Also write the constructors' history and chart series")
+    parser.add_argument("--out", default=DEFAULT_OUT, help=f"Output root; files go to OUT/data (default: {DEFAULT_OUT})")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'synth_season'):
+        synthesize(range(args.year, args.year + args.seasons), args.out, args.derived, args.seed,
+                   drivers=args.drivers, rounds=args.rounds, sprint_every=args.sprint_every,
+                   substitutions=args.substitutions, tie_rate=args.tie_rate, dsq_rate=args.dsq_rate,
+                   dnf_rate=args.dnf_rate)
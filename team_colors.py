@@ -0,0 +1,361 @@
+import bisect
+import json
+import os
+import re
+
+"""
+team_colors.py
+
+Shared team color resolution for the whole pipeline (data prep, color patching,
+animator).
+- `HISTORICAL_COLORS` is the hand-maintained source of truth for liveries.
+- `TeamColorResolver` precompiles the team alias rules and a case-folded index
+  of the fallback map once, and memoizes every lookup, so repeated lookups are
+  O(1) and every stage resolves a given team name to the same color.
+- `ERA_COLORS` overrides the flat table for year ranges where a team ran a
+  different livery; `EraColorIndex` answers (team, year) lookups with a binary
+  search over each team's sorted intervals.
+"""
+
+# Base historical colors
+HISTORICAL_COLORS = {
+    # Modern & recent
+    "Mercedes": "#00D2BE",
+    "Ferrari": "#DC0000",
+    "Red Bull": "#0600EF",
+    "McLaren": "#FF8700",
+    "Alpine": "#0090FF",
+    "Aston Martin": "#006F62", 
+    "Sauber": "#006EFF",
+    "Haas": "#FFFFFF",
+    "Williams": "#005AFF",
+    "RB": "#6692FF",
+    
+    # 2000s - 2010s
+    "Renault": "#FFF500",
+    "Toyota": "#E10600",
+    "BMW": "#0066B1", # BMW Blue
+    "BMW Sauber": "#000066", # BMW Dark Blue (Sauber years)
+    "Honda": "#C5C5C5",
+    "Brawn": "#B8FD6E",
+    "Brawn GP": "#B8FD6E",
+    "Super Aguri": "#D63838",
+    "Spyker": "#F27E1C",
+    "Midland": "#808080",
+    "Toro Rosso": "#0000FF",
+    "Force India": "#F596C8",
+    "Racing Point": "#F596C8",
+    "Marussia": "#6E0000",
+    "Manor": "#D32F2F",
+    "Caterham": "#006400",
+    "HRT": "#A4660E",
+    "Virgin": "#D91E18",
+    "Jaguar": "#005A32",
+    "Stewart": "#0B2161", # Stewart Tartan Blue
+    "Prost": "#00009C",
+    "Arrows": "#F27E1C",
+    "Benetton": "#79C5E4",
+    "Minardi": "#505050",
+    "BAR": "#E0E0E0",
+    "Jordan": "#E7C513",
+
+    # 1980s - 1990s
+    "Lotus": "#004225", # Lotus Green
+    "Team Lotus": "#004225",
+    "Tyrrell": "#0000FF",
+    "Ligier": "#005FBF",
+    "Brabham": "#191970",
+    "March": "#FFA500",
+    "Lola": "#FF4500",
+    "Larrousse": "#008000",
+    "Simtek": "#4B0082",
+    "Pacific": "#23238E",
+    "Forti": "#FCE205",
+    "Footwork": "#FAFAFA",
+    "Leyton House": "#88D6C6",
+    "Onyx": "#00008B",
+    "Rial": "#0000FF",
+    "Zakspeed": "#FF0000",
+    "AGS": "#153F77", # JH25 Blue
+    "Coloni": "#FFFF00",
+    "EuroBrun": "#0A0A2A", # Dark Blue/Black
+    "Osella": "#00008B",
+    "Dallara": "#B71105",
+    "Andrea Moda": "#505050",
+    "Life": "#FF0000",
+    "Fondmetal": "#505050",
+    "Venturi": "#1F4096",
+    "Modena": "#153F77",
+    
+    # 1950s - 1970s
+    "Cooper": "#004225",
+    "Vanwall": "#004225",
+    "BRM": "#004225",
+    "Maserati": "#D40000", # Italian Red
+    "Alfa Romeo": "#9B0000",
+    "Lancia": "#D40000",
+    "Gordini": "#318CE7", # French Blue
+    "Talbot-Lago": "#318CE7",
+    "Matra": "#318CE7",
+    "Porsche": "#C0C0C0", # German Silver
+    "Mercedes-Benz": "#C0C0C0",
+    "Auto Union": "#C0C0C0",
+    "Honda": "#FFFFFF", # Japanese White with Red sun usually, keeping white
+    "Eagle": "#000080", # American Blue
+    "Shadow": "#505050",
+    "Wolf": "#C9A004", # Walter Wolf Gold/Black
+    "Hesketh": "#D4AF37", # Hesketh Bear Gold accents
+    "Surtees": "#2955A3", # Surtees Blue
+    "Penske": "#CF102D", # Penske Red
+    "Fittipaldi": "#FFFF00", # Brazilian Yellow
+    "Copersucar": "#FFFF00",
+    "Ensign": "#FF0000",
+    "Theodore": "#CE2029", # Teddy Yip Red
+    "ATS": "#FFFF00",
+    "Merzario": "#FF0000",
+    "Rebaque": "#8B4513",
+    "Kaukaser": "#FFFFFF",
+    "Tecno": "#D40000",
+    "Politoys": "#0000FF", # Blue
+    "Connew": "#FF0000",
+    "Spirit": "#FFFFFF", # Keeping White (Honda/Spirit)
+    "RAM": "#006633", # Skoal Bandit Green
+    
+    # Indy 500 era (approximate)
+    "Kurtis Kraft": "#FFFFFF",
+    "Kuzma": "#FFFFFF",
+    "Epperly": "#FFFFFF",
+    "Watson": "#FFFFFF",
+    
+    # Defaults/Fallbacks for common unlisted ones
+    "Veritas": "#C0C0C0",
+    "Simca": "#318CE7",
+    "OSCA": "#D40000",
+    "Connaught": "#004225",
+    "Alta": "#004225",
+    "HWM": "#004225",
+    "ERA": "#004225",
+    "Frazer Nash": "#004225",
+}
+
+# Era liveries: (team, first year, last year, color). Outside these ranges the
+# flat HISTORICAL_COLORS entry applies. Ranges of one team must not overlap.
+ERA_COLORS = [
+    ("McLaren", 1974, 1996, "#E8E8E8"),      # Marlboro red & white (white reads better than red next to Ferrari)
+    ("McLaren", 1997, 2016, "#9EA3A8"),      # West / Mercedes silver
+    ("Williams", 1994, 1997, "#1B3D8F"),     # Rothmans
+    ("Williams", 1998, 1999, "#C8102E"),     # Winfield
+    ("Williams", 2000, 2005, "#1F4E9B"),     # BMW
+    ("Jordan", 1991, 1991, "#00A551"),       # 7UP green
+    ("Jordan", 1992, 1995, "#1E5AA8"),       # Sasol blue
+    ("Benetton", 1997, 2001, "#4FA3E0"),     # Mild Seven
+    ("Renault", 2002, 2006, "#0055A5"),      # Mild Seven blue
+    ("Renault", 2007, 2009, "#FF8C00"),      # ING orange
+    ("Renault", 2010, 2011, "#FFD700"),      # Black & gold
+    ("Lotus", 2010, 2011, "#0B6623"),        # Lotus Racing green & yellow
+    ("Mercedes", 2010, 2011, "#A9B0B3"),     # Silver before the teal accents
+    ("Force India", 2008, 2016, "#FF8000"),  # Orange, white & green before BWT pink
+    ("Sauber", 2010, 2017, "#F0F0F0"),       # White & black
+]
+
+# FastF1 only reports team colors from this season on; every color in earlier
+# seasons was filled from the fallback map.
+API_COLOR_FIRST_YEAR = 2018
+
+class EraColorIndex:
+    """
+    Sorted interval index over `ERA_COLORS` (team, first, last, color) entries.
+
+    Teams are keyed case-insensitively; each team keeps its interval starts sorted so
+    `lookup(team, year)` is a dict hit plus a binary search. The flat `base` map
+    (HISTORICAL_COLORS by default) answers years outside every interval.
+    """
+    def __init__(self, eras=None, base=None):
+        self._starts = {}
+        self._intervals = {}
+        grouped = {}
+        for team, first, last, color in (ERA_COLORS if eras is None else eras):
+            grouped.setdefault(team.casefold(), []).append((first, last, color))
+
+        for key, intervals in grouped.items():
+            intervals.sort()
+            for (_, prev_last, _), (first, _, _) in zip(intervals, intervals[1:]):
+                if first <= prev_last:
+                    raise ValueError(f"Overlapping era colors for {key!r} around {first}")
+            self._starts[key] = [first for first, _, _ in intervals]
+            self._intervals[key] = intervals
+
+        self._base = {}
+        for team, color in (HISTORICAL_COLORS if base is None else base).items():
+            self._base.setdefault(team.casefold(), color)
+
+    def era(self, team, year):
+        """Color of the era interval containing `year`, or None."""
+        key = team.casefold()
+        starts = self._starts.get(key)
+        if not starts:
+            return None
+        i = bisect.bisect_right(starts, year) - 1
+        if i < 0:
+            return None
+        _, last, color = self._intervals[key][i]
+        return color if year <= last else None
+
+    def lookup(self, team, year):
+        """Era color for `year`, else the flat base color, else None."""
+        return self.era(team, year) or self._base.get(team.casefold())
+
+# Alias rules: (substring of the lowercased name, canonical team). Earlier rules win.
+TEAM_ALIASES = [
+    ("red bull", "Red Bull"),
+    ("toro rosso", "Toro Rosso"),
+    ("aston martin", "Aston Martin"),
+    ("alpha tauri", "AlphaTauri"),
+    ("alphatauri", "AlphaTauri"),
+    ("racing point", "Racing Point"),
+    ("force india", "Force India"),
+    ("super aguri", "Super Aguri"),
+    ("brawn", "Brawn"),
+    ("manor", "Manor"),
+    ("virgin", "Virgin"),
+    ("lotus", "Lotus"),
+    ("alfa romeo", "Alfa Romeo"),
+]
+
+_ALIAS_PRIORITY = {sub: i for i, (sub, _) in enumerate(TEAM_ALIASES)}
+_ALIAS_RE = re.compile("|".join(re.escape(sub) for sub, _ in TEAM_ALIASES))
+
+def normalize_team_name(name):
+    """
+    Simplifies team names by removing engine suppliers and common suffixes.
+    e.g. "Lotus-Climax" -> "Lotus"
+         "Cooper-Maserati" -> "Cooper"
+    """
+    # Special cases (first rule in TEAM_ALIASES that appears anywhere in the name)
+    matches = _ALIAS_RE.findall(name.lower())
+    if matches:
+        best = min(matches, key=_ALIAS_PRIORITY.__getitem__)
+        return TEAM_ALIASES[_ALIAS_PRIORITY[best]][1]
+
+    # Aggressive dash splitting for chassis-engine combos (common in old data)
+    # e.g. "Brabham-Repco" -> "Brabham"
+    if "-" in name:
+        # usually first part is chassis
+        return name.split("-")[0].strip()
+
+    return name
+
+class TeamColorResolver:
+    """
+    Resolves team names to colors with precompiled indexes and memoization.
+
+    Lookup order:
+    1. Exact match in the fallback map (`fallback_teams.json`).
+    2. Case-insensitive match in the fallback map.
+    3. `HISTORICAL_COLORS`: exact, then alias-normalized name, case-insensitive.
+    When a year is given, an `ERA_COLORS` interval for the team (exact, then
+    alias-normalized) takes precedence over all of the above.
+    Returns None when nothing matches so callers choose their own default.
+    """
+    def __init__(self, fallbacks=None, eras=None):
+        self.fallbacks = dict(fallbacks or {})
+        self._folded = {}
+        for team, color in self.fallbacks.items():
+            self._folded.setdefault(team.casefold(), color)
+        self._historical_folded = {}
+        for team, color in HISTORICAL_COLORS.items():
+            self._historical_folded.setdefault(team.casefold(), color)
+        self.eras = eras if eras is not None else EraColorIndex()
+        self._cache = {}
+        self._guess_cache = {}
+
+    def guess(self, team):
+        """
+        Resolves `team` against `HISTORICAL_COLORS` only.
+        Returns (color, matched); unknown teams get a generic silver with matched=False.
+        """
+        cached = self._guess_cache.get(team)
+        if cached is not None:
+            return cached
+
+        color = HISTORICAL_COLORS.get(team)
+        if color is None:
+            normalized = normalize_team_name(team)
+            color = HISTORICAL_COLORS.get(normalized) or self._historical_folded.get(normalized.casefold())
+
+        # Unknown privateers default to Silver/Grey rather than empty
+        result = (color, True) if color else ("#C0C0C0", False)
+        self._guess_cache[team] = result
+        return result
+
+    def resolve(self, team, year=None):
+        """Returns the color for `team` (in season `year`, if given), or None if unknown."""
+        if not team:
+            return None
+        key = (team, year)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        color = None
+        if year is not None:
+            color = self.eras.era(team, year) or self.eras.era(normalize_team_name(team), year)
+        if not color:
+            color = self.fallbacks.get(team) or self._folded.get(team.casefold())
+        if not color:
+            color, matched = self.guess(team)
+            if not matched:
+                color = None
+
+        self._cache[key] = color
+        return color
+
+    def is_fallback(self, team, color):
+        """
+        True if `color` is the year-independent fallback for `team`, i.e. it was most
+        likely filled in by a patcher rather than reported by the API.
+        """
+        fallback = self.resolve(team)
+        return bool(color and fallback) and color.casefold() == fallback.casefold()
+
+    def apply_fallback(self, driver, color, year=None):
+        """
+        Writes the fallback `color` into a standings entry of season `year` when its
+        current color may be replaced, tagging it `colorSource: "fallback"`.
+        Replaceable: no color, an earlier fallback fill, or (untagged) any color of a
+        season before `API_COLOR_FIRST_YEAR` or one equal to the flat fallback.
+        API colors are never touched. Returns True if the entry changed.
+        """
+        current = driver.get('color')
+        source = driver.get('colorSource')
+        pre_api = year is not None and year < API_COLOR_FIRST_YEAR
+        replaceable = (not current or source == 'fallback'
+                       or (source is None and (pre_api or self.is_fallback(driver.get('team'), current))))
+        # Pre-API entries are tagged once so later map edits reach them too
+        if not color or not replaceable:
+            return False
+        if (current or '').casefold() == color.casefold() and not (pre_api and source != 'fallback'):
+            return False
+        driver['color'] = color
+        driver['colorSource'] = 'fallback'
+        return True
+
+_DEFAULT_RESOLVER = None
+
+def get_resolver():
+    """Process-wide resolver backed by `fallback_teams.json` (loaded once)."""
+    global _DEFAULT_RESOLVER
+    if _DEFAULT_RESOLVER is None:
+        fallbacks = {}
+        if os.path.exists('fallback_teams.json'):
+            with open('fallback_teams.json', 'r') as f:
+                fallbacks = json.load(f)
+        else:
+            print("fallback_teams.json not found. Using empty fallback.")
+        _DEFAULT_RESOLVER = TeamColorResolver(fallbacks)
+    return _DEFAULT_RESOLVER
+
+def resolve_team_color(team, year=None):
+    """Shortcut for `get_resolver().resolve(team, year)`."""
+    return get_resolver().resolve(team, year)
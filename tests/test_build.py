@@ -0,0 +1,41 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import build
+
+def fake_run_node(kind, year, payload=None):
+    if kind == 'patch' and year == 2020:
+        raise RuntimeError("corrupt color")
+    return 0.0
+
+@pytest.fixture
+def scratch_build(tmp_path, monkeypatch):
+    """Runs the scheduler in an empty directory with in-process, instant actions."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(build, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    monkeypatch.setattr(build, 'run_node', fake_run_node)
+    monkeypatch.setattr(build, 'node_inputs', lambda node, cache: {})
+
+    def run(**kwargs):
+        results = {}
+        thread = threading.Thread(target=lambda: results.update(build.build(**kwargs)), daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+        assert not thread.is_alive(), "build() did not finish"
+        return results
+    return run
+
+def test_failure_skips_dependents(scratch_build):
+    results = scratch_build(years=[2020, 2021], targets=['series', 'keyframes'], workers=2)
+    assert results['patch:2020'] == 'failed'
+    for node_id in ['constructors:2020', 'series:2020', 'keyframes:2020']:
+        assert results[node_id] == 'skipped'
+    for node_id in ['patch:2021', 'constructors:2021', 'series:2021', 'keyframes:2021']:
+        assert results[node_id] == 'built'
+
+def test_every_node_gets_a_result(scratch_build):
+    results = scratch_build(years=[2020], targets=['series'], workers=1)
+    assert set(results) == set(build.build_graph([2020], {'series'}))
+    assert 'stale' not in results.values()
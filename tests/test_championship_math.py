@@ -0,0 +1,69 @@
+import championship_math
+
+def step(round_num, points, session='Race', dsq=()):
+    """A step with drivers A, B, C, ... on `points`, in that (rank) order."""
+    standings = []
+    for rank, (name, value) in enumerate(zip('ABCDEFGH', points), 1):
+        standings.append({'name': name, 'lookupKey': name.lower(), 'points': value, 'rank': rank,
+                          'rankDisplay': 'DSQ' if name in dsq else str(rank)})
+    return {'round': round_num, 'session': session, 'eventName': f'Round {round_num}', 'standings': standings}
+
+def statuses(history_step):
+    return {d['name']: d.get('titleStatus') for d in history_step['standings']}
+
+def test_session_max_points_follow_the_season_rules():
+    assert championship_math.session_max_points(2010, 1, 'Race') == 25
+    assert championship_math.session_max_points(2005, 1, 'Race') == 10
+    assert championship_math.session_max_points(2019, 1, 'Race') == 26 # Fastest lap
+    assert championship_math.session_max_points(2014, 19, 'Race') == 50 # Double points
+    assert championship_math.session_max_points(2021, 1, 'Sprint') == 3
+    assert championship_math.session_max_points(2023, 1, 'Sprint') == 8
+
+def test_remaining_points_counts_later_and_upcoming_sessions():
+    history = [step(1, [25, 18]), step(2, [33, 43], 'Sprint'), step(2, [58, 61])]
+    assert list(championship_math.remaining_points(history, 2025)) == [33, 25, 0]
+    assert list(championship_math.remaining_points(history, 2025, [(3, 'Race')])) == [58, 50, 25]
+
+def test_remaining_points_with_other_tables():
+    history = [step(1, [10, 6]), step(2, [20, 12])]
+    remaining = championship_math.remaining_points(history, None, max_points=lambda r, s: 9)
+    assert list(remaining) == [9, 0]
+
+def test_clinched_once_nobody_can_catch_the_leader():
+    history = [step(1, [25, 18, 15]), step(2, [50, 18, 20]), step(3, [75, 36, 45])]
+    clinched_at = championship_math.annotate(history, 2010)
+    assert clinched_at == 1
+    assert statuses(history[0]) == {'A': None, 'B': None, 'C': None}
+    # 50 > 20 + 25 left: A is champion, everyone else is out
+    assert statuses(history[1]) == {'A': 'clinched', 'B': 'eliminated', 'C': 'eliminated'}
+    assert [s['remainingPoints'] for s in history] == [50, 25, 0]
+
+def test_tie_on_the_maximum_stays_in_contention():
+    history = [step(1, [50, 25]), step(2, [50, 43])]
+    championship_math.annotate(history, 2010, upcoming=[(3, 'Race')])
+    # 43 + 25 > 50: B can still win
+    assert statuses(history[1]) == {'A': None, 'B': None}
+    history = [step(1, [50, 25])]
+    championship_math.annotate(history, 2010, upcoming=[(2, 'Race')])
+    # 25 + 25 == 50: tied on the maximum, still in contention
+    assert statuses(history[0]) == {'A': None, 'B': None}
+
+def test_tie_after_the_last_session_goes_to_the_countback():
+    history = [step(1, [25, 25, 10])]
+    championship_math.annotate(history, 2010)
+    assert statuses(history[0]) == {'A': 'clinched', 'B': 'eliminated', 'C': 'eliminated'}
+
+def test_disqualified_driver_is_eliminated_and_not_the_leader():
+    history = [step(1, [78, 81], dsq=('B',))]
+    championship_math.annotate(history, 1997)
+    assert statuses(history[0]) == {'A': 'clinched', 'B': 'eliminated'}
+
+def test_annotate_replaces_stale_statuses():
+    history = [step(1, [25, 18])]
+    history[0]['standings'][1]['titleStatus'] = 'clinched'
+    championship_math.annotate(history, 2010, upcoming=[(2, 'Race')])
+    assert statuses(history[0]) == {'A': None, 'B': None}
+
+def test_undecided_season():
+    assert championship_math.annotate([step(1, [25, 18])], 2010, upcoming=[(2, 'Race')]) is None
+    assert championship_math.annotate([], 2010) is None
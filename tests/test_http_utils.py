@@ -0,0 +1,33 @@
+import pytest
+
+import http_utils
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('bytes=0-99', (0, 99)),
+    ('bytes=100-', (100, 999)),
+    ('bytes=900-2000', (900, 999)), # End clamped to the last byte
+    ('bytes=-100', (900, 999)),     # Suffix: the last 100 bytes
+    ('bytes=-5000', (0, 999)),
+    ('bytes=1000-', 'unsatisfiable'),
+    ('bytes=-0', 'unsatisfiable'),
+    ('bytes=0-1,5-9', None),        # Multi-range: the whole body
+    ('items=0-9', None),
+    ('bytes=-', None),
+])
+def test_parse_range(header, expected):
+    assert http_utils.parse_range(header, 1000) == expected
+
+@pytest.mark.parametrize('header, expected', [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),       # Weak comparison
+    ('"x", "abc"', True),
+    ('"abcd"', False),
+    ('*', True),
+])
+def test_etag_matches(header, expected):
+    assert http_utils.etag_matches(header, '"abc"') is expected
+
+def test_weak_etag_matches_strong_header():
+    assert http_utils.etag_matches('"abc"', 'W/"abc"')
@@ -0,0 +1,98 @@
+import numpy as np
+
+import rescore
+
+DRIVERS = ['a', 'b', 'c']
+
+def step(round_num, results, session='Race', dsq=(), fastest=None):
+    """A step where every driver is listed and `results` maps lookupKey -> result string."""
+    standings = [{'name': key.upper(), 'firstName': '', 'lookupKey': key, 'points': 0.0, 'rank': rank,
+                  'rankDisplay': 'DSQ' if key in dsq else str(rank)} for rank, key in enumerate(DRIVERS, 1)]
+    result = {'round': round_num, 'session': session, 'standings': standings, 'raceResults': results}
+    if fastest:
+        result['fastestLap'] = fastest
+    return result
+
+def totals(history, race=(10, 6, 4), sprint=(3, 2, 1), best=None, fastest_lap=0):
+    classif = rescore.load_classifications(history)
+    return classif, rescore.score(classif, list(race), list(sprint), best, fastest_lap)
+
+def column(classif, key):
+    return classif['keys'].index(key)
+
+def test_score_applies_race_and_sprint_tables():
+    history = [step(1, {'a': '1', 'b': '2', 'c': 'DNF'}),
+               step(2, {'a': '3', 'b': '1', 'c': '2'}, 'Sprint'),
+               step(2, {'a': '2', 'b': '3', 'c': '1'})]
+    classif, points = totals(history)
+    assert points.shape == (3, 3)
+    a, b, c = (column(classif, k) for k in 'abc')
+    assert list(points[:, a]) == [10, 11, 17]
+    assert list(points[:, b]) == [6, 9, 13]
+    assert list(points[:, c]) == [0, 2, 12]
+
+def test_positions_beyond_the_table_score_nothing():
+    classif, points = totals([step(1, {'a': '4', 'b': '5', 'c': '1'})])
+    assert points[0, column(classif, 'a')] == 0 and points[0, column(classif, 'c')] == 10
+
+def test_best_results_drop_the_worst_races_but_keep_sprints():
+    history = [step(1, {'a': '1'}), step(2, {'a': '3'}, 'Sprint'), step(2, {'a': '3'}), step(3, {'a': '2'})]
+    classif, points = totals(history, best=2)
+    # Races 10, 4, 6: best two = 16, plus the sprint's 1
+    assert list(points[:, column(classif, 'a')]) == [10, 11, 15, 17]
+
+def test_fastest_lap_needs_a_top_ten_race_finish():
+    history = [step(1, {'a': '1', 'b': '2'}, fastest='b'), step(2, {'a': '1', 'b': '11'}, fastest='b')]
+    classif, points = totals(history, race=range(10, 0, -1), fastest_lap=1)
+    assert list(points[:, column(classif, 'b')]) == [10, 10]
+
+def test_rank_steps_breaks_ties_on_countback():
+    # Level on 10 points (a: 6 + 4, b: 10 + 0); b's win decides
+    history = [step(1, {'a': '2', 'b': '1', 'c': '3'}), step(2, {'a': '3', 'b': 'DNF', 'c': '1'})]
+    classif, points = totals(history)
+    ranks = rescore.rank_steps(points, classif)
+    a, b, c = (column(classif, k) for k in 'abc')
+    assert points[1, a] == points[1, b] == 10
+    assert ranks[1, b] < ranks[1, a]
+    assert ranks[1, c] == 1
+
+def test_rank_steps_puts_dsq_last_and_absent_drivers_at_zero():
+    history = [step(1, {'a': '1', 'b': '2', 'c': '3'}, dsq=('a',))]
+    history[0]['standings'] = history[0]['standings'][:2] # c is not listed
+    classif, points = totals(history)
+    ranks = rescore.rank_steps(points, classif)
+    assert ranks[0, column(classif, 'a')] == 2
+    assert ranks[0, column(classif, 'b')] == 1
+
+def test_result_keys_from_other_spellings_are_matched():
+    history = [step(1, {'a': '1', 'b': '2'})]
+    history[0]['standings'][2].update(name='Kimi Antonelli', firstName='Andrea Kimi', lookupKey='antonelli_andrea kimi')
+    history[0]['raceResults']['antonelli_kimi'] = '3'
+    classif = rescore.load_classifications(history)
+    assert classif['unmatched'] == []
+    assert classif['positions'][0, classif['keys'].index('antonelli_andrea kimi')] == 3
+
+def test_rescored_history_recomputes_the_title_status():
+    history = [step(1, {'a': '1', 'b': '2', 'c': '3'}), step(2, {'a': '3', 'b': '1', 'c': '2'})]
+    history[-1]['remainingPoints'] = 0.0
+    for entry in history[-1]['standings']:
+        entry['titleStatus'] = 'clinched' if entry['lookupKey'] == 'c' else 'eliminated'
+    steps, _ = rescore.rescore_history(history, [10, 6, 4], [])
+    final = {d['lookupKey']: d.get('titleStatus') for d in steps[-1]['standings']}
+    assert steps[-1]['standings'][0]['lookupKey'] == 'b' # 16 vs a's 14
+    assert final == {'a': 'eliminated', 'b': 'clinched', 'c': 'eliminated'}
+    assert steps[-1]['remainingPoints'] == 0
+
+def test_rescored_season_in_progress_drops_the_title_status():
+    history = [step(1, {'a': '1', 'b': '2', 'c': '3'})]
+    history[0]['remainingPoints'] = 25.0
+    history[0]['standings'][1]['titleStatus'] = 'eliminated'
+    steps, _ = rescore.rescore_history(history, [10, 6, 4], [])
+    assert 'remainingPoints' not in steps[0]
+    assert not any('titleStatus' in d for d in steps[0]['standings'])
+    assert history[0]['standings'][1]['titleStatus'] == 'eliminated' # Input untouched
+
+def test_parse_table():
+    assert rescore.parse_table('1991', rescore.POINTS_SYSTEMS) == [10, 6, 4, 3, 2, 1]
+    assert rescore.parse_table('5, 3,1', rescore.POINTS_SYSTEMS) == [5.0, 3.0, 1.0]
+    assert np.array_equal(rescore.lookup_table([5, 3], 4), [0, 5, 3, 0, 0])
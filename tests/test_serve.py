@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+import serve
+
+@pytest.fixture
+def root(tmp_path):
+    for relative in ['index.html', 'script.js', 'fallback_teams.json', 'state.sqlite', 'build.py',
+                     'data/standings_history_2024.json', 'fonts/Outfit-Bold.ttf', '.git/config', 'data/.hidden']:
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('x')
+    return str(tmp_path)
+
+@pytest.mark.parametrize('url, relative', [
+    ('/', 'index.html'),
+    ('/script.js', 'script.js'),
+    ('/fallback_teams.json', 'fallback_teams.json'),
+    ('/data/standings_history_2024.json', 'data/standings_history_2024.json'),
+    ('/fonts/Outfit-Bold.ttf', 'fonts/Outfit-Bold.ttf'),
+])
+def test_public_path_serves_the_dashboard(root, url, relative):
+    assert serve.public_path(root, url) == (os.path.join(root, *relative.split('/')), relative)
+
+@pytest.mark.parametrize('url', [
+    '/state.sqlite', '/build.py', '/.git/config', '/data/.hidden', '/data/../build.py',
+    '/data/%2e%2e/build.py', '/%2e%2e/etc/passwd', '/logs/report.json', '/data//x.json', '/data/',
+])
+def test_public_path_refuses_everything_else(root, url):
+    assert serve.public_path(root, url) is None
+
+def test_public_path_refuses_symlinks_out_of_the_tree(root, tmp_path_factory):
+    outside = tmp_path_factory.mktemp('outside') / 'secret.json'
+    outside.write_text('x')
+    os.symlink(outside, os.path.join(root, 'data', 'secret.json'))
+    assert serve.public_path(root, '/data/secret.json') is None
@@ -0,0 +1,47 @@
+import verify_integrity
+
+def step(round_num, points, session='Race', remaining=None):
+    """A step with drivers A, B, ... on `points`, in that (rank) order, each classified in it."""
+    standings = []
+    results = {}
+    for rank, (name, value) in enumerate(zip('ABCD', points), 1):
+        standings.append({'name': name, 'lookupKey': name.lower(), 'points': value, 'rank': rank,
+                          'rankDisplay': str(rank), 'color': '#000000'})
+        results[name.lower()] = str(rank)
+    result = {'round': round_num, 'session': session, 'standings': standings, 'raceResults': results}
+    if remaining is not None:
+        result['remainingPoints'] = remaining
+    return result
+
+def failed(issues):
+    return {name for name, entries in issues.items() if entries}
+
+def test_complete_season_is_clean():
+    history = [step(1, [25, 18], remaining=25), step(2, [43, 43], remaining=0)]
+    assert failed(verify_integrity.check_season(history, 2010)) == set()
+
+def test_truncated_past_season_is_incomplete():
+    # Stopped after round 2 of a longer season: points were still left to award
+    history = [step(1, [25, 18], remaining=50), step(2, [43, 43], remaining=25)]
+    issues = verify_integrity.check_season(history, 2010)
+    assert failed(issues) == {'incomplete'}
+    assert issues['incomplete'] == [{'step': 1, 'round': 2, 'session': 'Race', 'remainingPoints': 25}]
+
+def test_unannotated_past_season_is_incomplete():
+    history = [step(1, [25, 18]), step(2, [43, 43])]
+    assert verify_integrity.check_season(history, 2010)['incomplete'][0]['remainingPoints'] is None
+
+def test_season_in_progress_may_have_points_left():
+    history = [step(1, [25, 18], remaining=50)]
+    assert failed(verify_integrity.check_season(history, 9999)) == set()
+    assert failed(verify_integrity.check_season(history)) == set()
+
+def test_missing_rounds_are_incomplete():
+    history = [step(1, [25, 18]), step(2, [43, 43]), step(4, [68, 61])]
+    issues = verify_integrity.check_season(history)
+    assert issues['incomplete'] == [{'step': None, 'missing_rounds': [3]}]
+
+def test_points_decrease_is_reported():
+    history = [step(1, [25, 18]), step(2, [20, 43])]
+    issues = verify_integrity.check_season(history)
+    assert [(e['step'], e['lookupKey']) for e in issues['points_decrease']] == [(1, 'a')]
@@ -0,0 +1,164 @@
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+"""
+update_colors.py
+
+Single-pass team color refresh (replaces running `build_fallbacks.py` and then
+`patch_colors.py`, which read every season file twice).
+- Each season file is read and parsed exactly once, in parallel workers.
+- While scanning, every team missing from `fallback_teams.json` is resolved with
+  the shared `team_colors.TeamColorResolver` (same rules as `build_fallbacks.py`),
+  and drivers without a color are patched in the same pass.
+- Colors are resolved for the season's year (`team_colors.ERA_COLORS`). Entries
+  filled by a patcher are tagged `colorSource: "fallback"` and re-resolved on later
+  runs. Untagged entries are treated the same when the season predates API colors
+  (`API_COLOR_FIRST_YEAR`) or the color equals the flat fallback; API colors are
+  never touched (`TeamColorResolver.apply_fallback`, shared with `patch_colors.py`).
+- A file is only rewritten when its serialized content actually changed.
+- `fallback_teams.json` is only rewritten when new teams were added.
+- Reports per-file timing.
+"""
+
+from build_fallbacks import load_fallbacks, base_fallbacks, resolve_new_team, save_fallbacks
+from perf_utils import add_profile_args, profiled, record
+from team_colors import TeamColorResolver
+
+# Resolver over the fallback map, built once per worker process
+_RESOLVER = None
+
+def init_worker(fallbacks):
+    global _RESOLVER
+    _RESOLVER = TeamColorResolver(fallbacks)
+
+def process_season(filepath):
+    """
+    Reads one season file, resolves colors for unseen teams and patches drivers
+    without a color. Returns a per-file report dict.
+    """
+    start = time.perf_counter()
+    resolver = _RESOLVER
+    fallbacks = resolver.fallbacks
+    match = re.search(r'(\d{4})', os.path.basename(filepath))
+    year = int(match.group(1)) if match else None
+    new_teams = {} # Team -> (color, matched) for teams not in the fallback map
+    patched = 0
+
+    try:
+        with open(filepath, 'r') as f:
+            raw = f.read()
+        history = json.loads(raw)
+
+        for step in history:
+            for driver in step.get('standings', []):
+                team = driver.get('team')
+                if not team:
+                    continue
+
+                if team in fallbacks:
+                    color = resolver.resolve(team, year) or fallbacks[team]
+                else:
+                    if team not in new_teams:
+                        new_teams[team] = resolve_new_team(team, resolver)
+                    color = resolver.eras.era(team, year) if year else None
+                    color = color or new_teams[team][0]
+
+                # logic: if color is missing or a stale fallback, take it from the fallbacks
+                if resolver.apply_fallback(driver, color, year):
+                    patched += 1
+
+        changed = False
+        if patched:
+            write_start = time.perf_counter()
+            output = json.dumps(history, indent=2)
+            if output != raw:
+                with open(filepath, 'w') as f:
+                    f.write(output)
+                changed = True
+            record('json write', write_start)
+    except Exception as e:
+        return {'file': filepath, 'error': str(e), 'new_teams': {}, 'patched': 0,
+                'changed': False, 'seconds': time.perf_counter() - start}
+
+    return {
+        'file': filepath,
+        'new_teams': new_teams,
+        'patched': patched,
+        'changed': changed,
+        'seconds': time.perf_counter() - start,
+    }
+
+def merge_new_teams(fallbacks, new_team_maps):
+    """
+    Adds resolved teams ({team: (color, matched)} per season) to `fallbacks` in place.
+    Returns (mapped, unknown) counts of teams added.
+    """
+    count_added = 0
+    count_unknown = 0
+    for new_teams in new_team_maps:
+        for team, (color, matched) in new_teams.items():
+            if team in fallbacks:
+                continue
+            fallbacks[team] = color
+            if matched:
+                count_added += 1
+            else:
+                count_unknown += 1
+    return count_added, count_unknown
+
+def update_colors(workers=None, verbose=True):
+    start = time.perf_counter()
+
+    # 1. Fallback map: existing file + enforced source of truth
+    current_fallbacks = load_fallbacks()
+    fallbacks = base_fallbacks(current_fallbacks)
+
+    # 2. Scan + patch every season once
+    files = sorted(glob.glob('data/standings_history_*.json'))
+    print(f"Processing {len(files)} data files...")
+
+    if workers == 1:
+        init_worker(fallbacks)
+        reports = [process_season(path) for path in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(fallbacks,)) as pool:
+            reports = list(pool.map(process_season, files))
+
+    # 3. Merge newly resolved teams into the fallback map
+    count_added, count_unknown = merge_new_teams(fallbacks, (r['new_teams'] for r in reports))
+
+    if fallbacks != current_fallbacks:
+        save_fallbacks(fallbacks)
+        print(f"Updated fallback_teams.json ({count_added} mapped, {count_unknown} unknown -> grey)")
+    else:
+        print("fallback_teams.json unchanged.")
+
+    # 4. Report
+    if verbose:
+        print(f"\n{'File':<40} | {'Patched':>7} | {'Written':>7} | {'Time':>8}")
+        print("-" * 72)
+        for r in reports:
+            status = 'ERROR' if 'error' in r else ('yes' if r['changed'] else 'no')
+            print(f"{os.path.basename(r['file']):<40} | {r['patched']:>7} | {status:>7} | {r['seconds'] * 1000:>6.1f}ms")
+            if 'error' in r:
+                print(f"  Error processing {r['file']}: {r['error']}")
+
+    total_patched = sum(r['patched'] for r in reports)
+    files_changed = sum(1 for r in reports if r['changed'])
+    print(f"\nDone. Patched {total_patched} driver entries across {files_changed} files in {time.perf_counter() - start:.2f}s.")
+    return reports
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh fallback team colors and patch data files in one pass")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count; 1 = in-process)")
+    parser.add_argument("--quiet", action="store_true", help="Skip the per-file timing table")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'update_colors'):
+        update_colors(args.workers, verbose=not args.quiet)
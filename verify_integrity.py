@@ -0,0 +1,259 @@
+import argparse
+import datetime
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+"""
+verify_integrity.py
+
+Offline consistency checks over every downloaded season (no network).
+- Loads each `data/standings_history_{year}.json` into step x driver NumPy
+  matrices (points, ranks, DSQ flags, classified results) keyed by `lookupKey`.
+- Vectorized checks per season:
+  - points never decrease between steps (except DSQ entries such as 1997),
+  - ranks are ordered by points and tied ranks have equal points,
+  - sprint steps only add points within the sprint maximum, to drivers who
+    were classified in that sprint,
+  - drivers who score on a race step appear in its `raceResults` (result keys
+    from other name spellings are matched through `DriverNameIndex`),
+  - `lookupKey`s are unique within a step,
+  - every driver has a color,
+  - the season is complete: no gaps in its round numbers (from round 1), and a
+    past season's last step has no points left to award (`remainingPoints`
+    from `championship_math.py`; a past season without it fails too).
+- Writes the failing years to `logs/mismatched_years.json` (read by
+  `finalize_downloads.py`) and the details to `logs/integrity_report.json`.
+- Exits with status 1 when any season fails, so it can gate a publish.
+"""
+
+from driver_names import DriverNameIndex
+from perf_utils import add_profile_args, profiled, timed
+
+MISMATCHED_FILE = 'logs/mismatched_years.json'
+REPORT_FILE = 'logs/integrity_report.json'
+
+# Most points a single sprint has awarded (2022+: 8-7-6-5-4-3-2-1)
+MAX_SPRINT_POINTS = 8.0
+EPSILON = 1e-6
+
+def season_files():
+    files = {}
+    for path in glob.glob('data/standings_history_*.json'):
+        match = re.search(r'(\d{4})', os.path.basename(path))
+        if match:
+            files[int(match.group(1))] = path
+    return dict(sorted(files.items()))
+
+def load_season_arrays(history):
+    """
+    Converts a season history into step x driver matrices.
+    Missing entries are NaN (points), 0 (ranks) or False (flags).
+    """
+    keys = {}
+    entries = []
+    for step in history:
+        for driver in step.get('standings', []):
+            key = driver.get('lookupKey') or driver.get('name')
+            if key not in keys:
+                keys[key] = len(keys)
+                entries.append({'name': driver.get('name', ''), 'firstName': driver.get('firstName', ''),
+                                'lookupKey': key})
+    index = DriverNameIndex(entries)
+
+    shape = (len(history), len(keys))
+    points = np.full(shape, np.nan)
+    ranks = np.zeros(shape, dtype=np.int32)
+    dsq = np.zeros(shape, dtype=bool)
+    classified = np.zeros(shape, dtype=bool) # numeric result in this step's raceResults
+    has_results = np.zeros(len(history), dtype=bool)
+    is_sprint = np.zeros(len(history), dtype=bool)
+    duplicates = []
+    missing_colors = []
+
+    for i, step in enumerate(history):
+        is_sprint[i] = step.get('session') == 'Sprint'
+        results = step.get('raceResults') or {}
+        has_results[i] = bool(results)
+        seen = set()
+        for driver in step.get('standings', []):
+            key = driver.get('lookupKey') or driver.get('name')
+            if key in seen:
+                duplicates.append({'step': i, 'lookupKey': key})
+            seen.add(key)
+            j = keys[key]
+            points[i, j] = float(driver.get('points', 0))
+            ranks[i, j] = int(driver.get('rank') or 0)
+            dsq[i, j] = driver.get('rankDisplay') == 'DSQ'
+            if not driver.get('color'):
+                missing_colors.append({'step': i, 'lookupKey': key, 'team': driver.get('team')})
+        for key, result in results.items():
+            # Result keys built from other name spellings ("antonelli_kimi"), as in rescore.py
+            j = keys.get(key)
+            if j is None:
+                j = keys.get(index.match_key(key)[0])
+            if j is not None and str(result).isdigit():
+                classified[i, j] = True
+
+    return {
+        'keys': list(keys),
+        'points': points,
+        'ranks': ranks,
+        'dsq': dsq,
+        'classified': classified,
+        'has_results': has_results,
+        'is_sprint': is_sprint,
+        'duplicates': duplicates,
+        'missing_colors': missing_colors,
+    }
+
+def _cells(mask, keys, history, **values):
+    """Expands a boolean step x driver mask into report entries."""
+    steps, cols = np.nonzero(mask)
+    entries = []
+    for i, j in zip(steps.tolist(), cols.tolist()):
+        entry = {'step': i, 'round': history[i].get('round'), 'session': history[i].get('session'),
+                 'lookupKey': keys[j]}
+        for name, matrix in values.items():
+            entry[name] = float(matrix[i, j])
+        entries.append(entry)
+    return entries
+
+def check_complete(history, year=None):
+    """
+    Missing rounds, and a past season (`year`) whose last step still has points to
+    award or was never annotated with them.
+    """
+    issues = []
+    rounds = {step.get('round') for step in history if isinstance(step.get('round'), int)}
+    if rounds:
+        missing = sorted(set(range(1, max(rounds) + 1)) - rounds)
+        if missing:
+            issues.append({'step': None, 'missing_rounds': missing})
+    remaining = history[-1].get('remainingPoints')
+    # Not annotated: championship_math.py could not show the file is complete
+    if year is not None and year < datetime.datetime.now().year and remaining != 0:
+        issues.append({'step': len(history) - 1, 'round': history[-1].get('round'),
+                       'session': history[-1].get('session'), 'remainingPoints': remaining})
+    return issues
+
+@timed('integrity checks')
+def check_season(history, year=None):
+    """
+    Runs every check on one season. Returns {check name: [issues]} (empty lists when clean).
+    `year` enables the past-season completeness check.
+    """
+    arrays = load_season_arrays(history)
+    keys = arrays['keys']
+    points, ranks, dsq = arrays['points'], arrays['ranks'], arrays['dsq']
+    issues = {}
+
+    if len(history) == 0 or not keys:
+        return {'empty': [{'step': None}]}
+
+    # 1. Points never decrease (DSQ entries exempt); NaN = driver absent in one of the steps
+    delta = np.diff(points, axis=0)
+    exempt = dsq[1:] | dsq[:-1]
+    decreasing = np.zeros_like(dsq)
+    decreasing[1:] = (delta < -EPSILON) & ~exempt
+    issues['points_decrease'] = _cells(decreasing, keys, history, delta=np.vstack([points[:1], delta]))
+
+    # 2. Rank order matches points: walk each step in rank order (DSQ / unranked last)
+    ranked = (ranks > 0) & ~dsq & ~np.isnan(points)
+    sort_ranks = np.where(ranked, ranks, np.iinfo(np.int32).max)
+    order = np.argsort(sort_ranks, axis=1, kind='stable')
+    sorted_points = np.take_along_axis(points, order, axis=1)
+    sorted_ranks = np.take_along_axis(sort_ranks, order, axis=1)
+    sorted_valid = np.take_along_axis(ranked, order, axis=1)
+    pair_valid = sorted_valid[:, 1:] & sorted_valid[:, :-1]
+    point_step = np.diff(sorted_points, axis=1)
+    same_rank = np.diff(sorted_ranks, axis=1) == 0
+    bad_pair = pair_valid & ((point_step > EPSILON) | (same_rank & (np.abs(point_step) > EPSILON)))
+    bad = np.zeros_like(dsq)
+    rows, cols = np.nonzero(bad_pair)
+    bad[rows, order[rows, cols + 1]] = True
+    issues['rank_order'] = _cells(bad, keys, history, points=points, rank=ranks)
+    first_rank = sort_ranks.min(axis=1)
+    issues['rank_start'] = [{'step': int(i), 'round': history[i].get('round'), 'first_rank': int(first_rank[i])}
+                            for i in np.nonzero(ranked.any(axis=1) & (first_rank != 1))[0]]
+
+    # 3. Sprint steps: gains bounded by the sprint maximum and only for classified drivers
+    # Step 0 gains are measured from zero
+    gain = np.vstack([points[:1], delta])
+    gained = gain > EPSILON
+    sprint_rows = arrays['is_sprint'][:, None]
+    issues['sprint_delta'] = _cells(sprint_rows & gained & (gain > MAX_SPRINT_POINTS + EPSILON),
+                                    keys, history, delta=gain)
+
+    # 4. Anyone scoring on a step with results must be classified in it
+    with_results = arrays['has_results'][:, None]
+    issues['scored_unclassified'] = _cells(with_results & gained & ~arrays['classified'] & ~dsq,
+                                           keys, history, delta=gain)
+
+    # 5. Unique lookup keys, 6. colors
+    issues['duplicate_keys'] = arrays['duplicates']
+    issues['missing_colors'] = arrays['missing_colors']
+
+    # 7. Truncated season (missing rounds, or points still to award after the season)
+    issues['incomplete'] = check_complete(history, year)
+    return issues
+
+def verify_integrity(years=None, verbose=True):
+    start = time.perf_counter()
+    files = season_files()
+    if years:
+        files = {y: p for y, p in files.items() if y in years}
+
+    report = {}
+    mismatched = []
+    for year, path in files.items():
+        try:
+            with open(path, 'r') as f:
+                history = json.load(f)
+            issues = check_season(history, year)
+        except Exception as e:
+            issues = {'load_error': [{'error': str(e)}]}
+
+        failed = {name: entries for name, entries in issues.items() if entries}
+        report[year] = failed
+        if failed:
+            mismatched.append(year)
+
+    elapsed = time.perf_counter() - start
+
+    print(f"{'Year':<6} | {'Status':<6} | Issues")
+    print("-" * 65)
+    for year, failed in report.items():
+        summary = ", ".join(f"{name} x{len(entries)}" for name, entries in failed.items())
+        print(f"{year:<6} | {'FAIL' if failed else 'OK':<6} | {summary}")
+        if verbose:
+            for name, entries in failed.items():
+                for entry in entries[:3]:
+                    print(f"         {name}: {entry}")
+    print("-" * 65)
+    print(f"Checked {len(report)} seasons in {elapsed * 1000:.0f}ms. {len(mismatched)} with issues.")
+
+    if not os.path.exists('logs'):
+        os.makedirs('logs')
+    with open(MISMATCHED_FILE, 'w') as f:
+        json.dump(mismatched, f)
+    with open(REPORT_FILE, 'w') as f:
+        json.dump({str(y): failed for y, failed in report.items() if failed}, f, indent=2)
+    print(f"Mismatched years saved to {MISMATCHED_FILE}")
+    return mismatched
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline consistency checks for all downloaded seasons")
+    parser.add_argument("--years", type=int, nargs='+', help="Seasons to check (default: all)")
+    parser.add_argument("--quiet", action="store_true", help="Only print the per-season summary")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'verify_integrity'):
+        mismatched = verify_integrity(args.years, verbose=not args.quiet)
+    sys.exit(1 if mismatched else 0)
@@ -1,217 +1,319 @@
+import argparse
+import datetime
 import pandas as pd
 import json
 import glob
 import os
-import requests
 import re
 import io
-from difflib import SequenceMatcher
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import lxml.html
+
+from driver_names import DriverNameIndex
+from perf_utils import add_profile_args, profiled
 
 """
 verify_points.py
 
-Verifies the final point totals of the Top 3 drivers for each season against Wikipedia data.
-- Scrapes Wikipedia for the season's final standings table.
-- Compares points with local `data/standings_history_{year}.json`.
+Verifies the final point totals of the Top 3 drivers (or, with `--full`, the whole
+classification) for each season against Wikipedia data.
+- Fetches the Wikipedia season pages concurrently (bounded thread pool) through a
+  persistent HTML cache (`wiki_http_cache.sqlite`; historical seasons never expire,
+  the current season expires after 4h).
+- `--fixtures DIR` runs fully offline against saved pages (`DIR/{year}.html`);
+  `--save-fixtures DIR` writes the fetched pages there.
+- Parses the page once and hands only the drivers' standings table to pandas.
+- Matches Wikipedia names to local drivers through a `driver_names.DriverNameIndex`
+  keyed by `lookupKey` (independent of table order, so ties and full-grid
+  checks work), then compares points with `data/standings_history_{year}.json`.
 - Reports mismatches.
 """
 
-def normalize_name(name):
-    """Normalize driver names for comparison (remove accents, etc)"""
-    # Simple normalization: lowercase and remove special chars
-    # This might need to be more robust
-    import unicodedata
-    n = unicodedata.normalize('NFKD', str(name)).encode('ASCII', 'ignore').decode('utf-8')
-    return n.lower().strip()
+WIKI_URL = "https://en.wikipedia.org/wiki/{year}_Formula_One_season"
+WIKI_CACHE = 'wiki_http_cache'
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'}
+DEFAULT_WORKERS = 4
+
+# One cached HTTP session per fetch thread
+_SESSIONS = threading.local()
+
+def get_session():
+    session = getattr(_SESSIONS, 'session', None)
+    if session is None:
+        import requests_cache
+        session = requests_cache.CachedSession(WIKI_CACHE, backend='sqlite')
+        session.headers.update(HEADERS)
+        _SESSIONS.session = session
+    return session
+
+def fetch_season_page(year, fixtures=None, refresh=False):
+    """
+    Returns the Wikipedia season page HTML for `year`.
+    With `fixtures`, reads `{fixtures}/{year}.html` and never touches the network.
+    """
+    if fixtures:
+        path = os.path.join(fixtures, f'{year}.html')
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No fixture {path}")
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    # Historical seasons: cache forever. Current season: 4 hours.
+    current_year = datetime.datetime.now().year
+    expire_time = -1 if year < current_year else 14400
+
+    session = get_session()
+    if refresh:
+        session.cache.delete(urls=[WIKI_URL.format(year=year)])
+    r = session.get(WIKI_URL.format(year=year), expire_after=expire_time)
+    r.raise_for_status()
+    return r.text
 
-def similar(a, b):
-    return SequenceMatcher(None, a, b).ratio()
+def _header_cells(table):
+    """Lowercased header texts of the first row of an lxml table (footnotes stripped)."""
+    row = table.xpath('.//tr[1]')
+    if not row:
+        return []
+    return [re.sub(r'\[.*?\]', '', cell.text_content()).lower().replace('.', '').strip()
+            for cell in row[0].xpath('./th|./td')]
 
-def get_wiki_standings(year):
-    url = f"https://en.wikipedia.org/wiki/{year}_Formula_One_season"
-    
+def _is_standings_header(cells):
+    return 'driver' in cells and any(c in cells for c in ('points', 'pts', 'total'))
+
+def find_standings_table(html):
+    """
+    Locates the World Drivers' Championship standings table in the page and returns
+    it as a DataFrame, or None. Only that one table is parsed with pandas.
+    """
+    doc = lxml.html.fromstring(html)
+
+    # Preferred: first matching wikitable after the drivers' standings heading
+    candidates = []
+    heading = doc.xpath('//*[starts-with(@id, "World_Drivers")]')
+    if heading:
+        candidates = heading[0].xpath('following::table[contains(@class, "wikitable")]')[:3]
+    # Fallback: any wikitable on the page, in document order
+    candidates += doc.xpath('//table[contains(@class, "wikitable")]')
+
+    target = next((t for t in candidates if _is_standings_header(_header_cells(t))), None)
+    if target is None:
+        # Older pages: "Pos" + "Driver" without a points column header we recognise
+        target = next((t for t in candidates
+                       if 'driver' in (cells := _header_cells(t)) and 'pos' in cells), None)
+    if target is None:
+        return None
+
+    return pd.read_html(io.StringIO(lxml.html.tostring(target, encoding='unicode')))[0]
+
+def get_wiki_standings(year, limit=3, fixtures=None, refresh=False, html=None):
+    """
+    Returns the Wikipedia classification for `year` as a list of {'driver', 'points'}
+    in table order: the first `limit` drivers, or all of them when `limit` is None.
+    `html` is a page already fetched (nothing is fetched then).
+    """
     try:
-        # Use requests with User-Agent to avoid 403
-        headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'}
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        
-        tables = pd.read_html(io.StringIO(r.text), match="Driver") 
+        if html is None:
+            html = fetch_season_page(year, fixtures, refresh)
+        target_table = find_standings_table(html)
     except Exception as e:
         print(f"  Error fetching/parsing Wiki for {year}: {e}")
         return None
 
-    # Find the right table. Usually "World Drivers' Championship standings"
-    # It often has columns "Pos", "Driver", "Points"
-    target_table = None
-    for df in tables:
-        cols = [str(c).lower() for c in df.columns]
-        # Check for typical columns in standings table
-        if 'driver' in cols and ('points' in cols or 'pts' in cols or 'total' in cols):
-             # Some older tables might use "Total" for points
-             target_table = df
-             break
-            
-    if target_table is None:
-        # Fallback: Try match="Pos"
-        try:
-             tables = pd.read_html(io.StringIO(r.text), match="Pos")
-             for df in tables:
-                cols = [str(c).lower() for c in df.columns]
-                if 'driver' in cols:
-                    target_table = df
-                    break
-        except:
-            pass
-            
     if target_table is None:
         print(f"  Could not find standings table for {year}")
         return None
-        
-    # Process top 3
+
     # Rename columns for consistency: lowercase, remove punctuation, remove brackets
     target_table.columns = [
-        re.sub(r'\[.*?\]', '', str(c)).lower().replace('.', '').strip() 
+        re.sub(r'\[.*?\]', '', str(c)).lower().replace('.', '').strip()
         for c in target_table.columns
     ]
-    
-    # print(f"DEBUG: Found table with cols: {target_table.columns}")
-    
-    wiki_top3 = []
-    
-    count = 0
+
+    wiki_standings = []
+
     for idx, row in target_table.iterrows():
         try:
             driver = row.get('driver', '')
             driver = re.sub(r'\[.*?\]', '', str(driver)).strip()
 
+            # Repeated header/footer rows and empty cells
+            if not driver or driver.lower() in ('driver', 'nan'):
+                continue
+
             # 1997 Exception: Michael Schumacher was disqualified
             if year == 1997 and 'michael' in driver.lower() and 'schumacher' in driver.lower():
                 continue
-            
+
             # Points might be in 'points', 'pts', or 'total'
             points = row.get('points', row.get('pts', row.get('total', 0)))
-            
-            # print(f"DEBUG: Raw driver: {driver}, Raw points: {points}")
-
-            # Ensure points is numeric
-            try:
-                pt_str = str(points).split('[')[0] 
-                match = re.search(r'([\d\.]+)', pt_str)
-                if match:
-                    points = float(match.group(1))
-                else:
-                    points = 0.0
-            except:
-                continue 
-                
-            wiki_top3.append({'driver': driver, 'points': points})
-            count += 1
-            if count >= 3:
+
+            # Ensure points is numeric (footer rows like "Source:" are skipped)
+            pt_str = str(points).split('[')[0]
+            match = re.search(r'([\d\.]+)', pt_str)
+            if not match:
+                continue
+            points = float(match.group(1))
+
+            wiki_standings.append({'driver': driver, 'points': points})
+            if limit and len(wiki_standings) >= limit:
                 break
-        except:
+        except Exception:
             continue
-            
-    return wiki_top3
 
-def get_local_top3(year):
+    return wiki_standings
+
+def get_local_standings(year, limit=3):
+    """Final local standings for `year`, sorted by points; all drivers when `limit` is None."""
     filename = f"data/standings_history_{year}.json"
     if not os.path.exists(filename):
         return None
-        
+
     with open(filename, 'r') as f:
         history = json.load(f)
-        
+
     if not history:
         return None
-        
+
     # Get the last round
     last_round = history[-1]
     standings = last_round.get('standings', [])
-    
-    # Sort by points descending 
+
+    # Sort by points descending
     sorted_standings = sorted(standings, key=lambda x: float(x['points']), reverse=True)
-    
-    local_top3 = []
-    
+
+    local_standings = []
+
     for s in sorted_standings:
-        if len(local_top3) >= 3:
+        if limit and len(local_standings) >= limit:
             break
-            
-        # Flattened structure: name (Last), firstName
+
+        # Flattened structure: name (Full), firstName, lookupKey
         first = s.get('firstName', '')
-        last = s.get('name', '')
-        name = f"{first} {last}".strip()
-        
+        name = s.get('name', '')
+
         # 1997 Exception: Michael Schumacher was disqualified
-        if year == 1997 and 'michael' in first.lower() and 'schumacher' in last.lower():
+        if year == 1997 and 'michael' in first.lower() and 'schumacher' in name.lower():
             continue
-            
-        local_top3.append({
+
+        local_standings.append({
             'driver': name,
+            'firstName': first,
+            'lookupKey': s.get('lookupKey'),
             'points': float(s['points'])
         })
-        
-    return local_top3
 
-def verify_points():
-    years = sorted([int(f.replace('data/standings_history_', '').replace('.json', '')) 
-                    for f in glob.glob('data/standings_history_*.json')])
-    
+    return local_standings
+
+def load_season(year, limit, fixtures=None, save_fixtures=None, refresh=False):
+    """Fetch + parse worker: returns (year, wiki standings)."""
+    html = None
+    if save_fixtures and not fixtures:
+        try:
+            html = fetch_season_page(year, refresh=refresh)
+            with open(os.path.join(save_fixtures, f'{year}.html'), 'w', encoding='utf-8') as f:
+                f.write(html)
+        except Exception as e:
+            print(f"  Could not save fixture for {year}: {e}")
+    # The page saved as a fixture is parsed as is (not fetched a second time)
+    return year, get_wiki_standings(year, limit, fixtures, refresh, html)
+
+def verify_points(years=None, full=False, workers=DEFAULT_WORKERS, fixtures=None, save_fixtures=None, refresh=False):
+    if years is None:
+        years = sorted([int(f.replace('data/standings_history_', '').replace('.json', ''))
+                        for f in glob.glob('data/standings_history_*.json')])
+    years = [y for y in years if 1950 <= y <= 2025] # Full history check
+    limit = None if full else 3
+
+    if save_fixtures and not os.path.exists(save_fixtures):
+        os.makedirs(save_fixtures)
+
+    # Fetch and parse every season page up front (network bound, so threads)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        wiki = dict(pool.map(lambda y: load_season(y, limit, fixtures, save_fixtures, refresh), years))
+    print(f"Loaded {len(years)} Wikipedia pages in {time.perf_counter() - start:.1f}s "
+          f"({'fixtures' if fixtures else 'cache/network'}, {workers} workers)\n")
+
     issues = []
-    
+
     print(f"{'Year':<6} | {'Driver':<20} | {'Wiki':<8} | {'Local':<8} | {'Status'}")
     print("-" * 65)
 
     for year in years:
-        if year < 1950 or year > 2025: continue # Full history check
-        
-        # print(f"Checking {year}...")
-        wiki_data = get_wiki_standings(year)
-        local_data = get_local_top3(year)
-        
+        wiki_data = wiki.get(year)
+        # Every local driver is indexed, so a top-3 Wikipedia driver tied or
+        # ordered differently locally still resolves
+        local_data = get_local_standings(year, None)
+
         if not wiki_data or not local_data:
             print(f"{year:<6} | {'SKIP (No Data)':<45}")
             continue
-            
-        # Compare Top 3
-        # Match by name first
-        
+
+        # Compare Top 3 (or the full classification)
+        # Match by name first (indexed by lookupKey)
+        index = DriverNameIndex({'name': l['driver'], 'firstName': l['firstName'], 'lookupKey': l['lookupKey']}
+                                for l in local_data)
+        local_by_key = {l['lookupKey'] or index.match(l['driver'])[0]: l for l in local_data}
+        matched = set()
+
         year_status = "OK"
-        
-        for i in range(min(len(wiki_data), len(local_data))):
-            w = wiki_data[i]
-            l = local_data[i]
-            
-            # Fuzzy match names
-            name_score = similar(normalize_name(w['driver']), normalize_name(l['driver']))
-            
-            # Points match?
-            # Float comparison with tolerance
-            points_match = abs(w['points'] - l['points']) < 0.1
-            
+
+        for w in wiki_data:
+            key, _ = index.match(w['driver'])
+            l = local_by_key.get(key)
+
             status = "OK"
-            if name_score < 0.6:
+            if l is None:
                 status = "NAME MISMATCH"
                 year_status = "FAIL"
-            elif not points_match:
+                print(f"{year:<6} | {w['driver']:<20} | {w['points']:<8} | {'-':<8} | {status}")
+                issues.append({'year': year, 'driver': w['driver'], 'wiki': w['points'], 'local': None})
+                continue
+            matched.add(key)
+
+            # Points match?
+            # Float comparison with tolerance
+            if abs(w['points'] - l['points']) >= 0.1:
                 status = "POINTS MISMATCH"
                 year_status = "FAIL"
-            
-            if status != "OK":
                 print(f"{year:<6} | {l['driver']:<20} | {w['points']:<8} | {l['points']:<8} | {status}")
                 issues.append({'year': year, 'driver': l['driver'], 'wiki': w['points'], 'local': l['points']})
-                
+
+        if full:
+            # Local scorers Wikipedia does not list at all
+            for key, l in local_by_key.items():
+                if key not in matched and l['points'] > 0:
+                    year_status = "FAIL"
+                    print(f"{year:<6} | {l['driver']:<20} | {'-':<8} | {l['points']:<8} | NOT ON WIKI")
+                    issues.append({'year': year, 'driver': l['driver'], 'wiki': None, 'local': l['points']})
+
         if year_status == "OK":
              print(f"{year:<6} | {'All Match':<20} | {'-':<8} | {'-':<8} | OK")
 
     print("-" * 65)
     print(f"Verification complete. Found {len(issues)} issues.")
-    
+
     if issues:
+        if not os.path.exists('logs'):
+            os.makedirs('logs')
         with open('logs/points_mismatches.json', 'w') as f:
             json.dump(issues, f, indent=2)
         print("Mismatches saved to logs/points_mismatches.json")
+    return issues
 
 if __name__ == "__main__":
-    verify_points()
+    parser = argparse.ArgumentParser(description="Verify final standings against Wikipedia")
+    parser.add_argument("--years", type=int, nargs='+', help="Seasons to verify (default: every local season)")
+    parser.add_argument("--full", action="store_true", help="Compare the full classification instead of the top 3")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Concurrent page fetches (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--fixtures", help="Offline mode: read season pages from DIR/{year}.html")
+    parser.add_argument("--save-fixtures", help="Save fetched season pages to DIR/{year}.html")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached pages and re-fetch")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'verify_points'):
+        verify_points(args.years, args.full, args.workers, args.fixtures, args.save_fixtures, args.refresh)
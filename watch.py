@@ -0,0 +1,187 @@
+import argparse
+import datetime
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+"""
+watch.py
+
+Long-running refresh of the live season.
+- Reads the season's event schedule and finds every Sprint and Race that is not
+  in `data/standings_history_{year}.json` yet.
+- Sleeps until each session is expected to be final (start + duration + a
+  settle time for the results API), then polls a single cheap endpoint with the
+  HTTP and FastF1 caches bypassed until the results appear.
+- Then evicts that round's cached responses (so the 4h cache in `prepare_data`
+  cannot serve the pre-session state) and updates only that season: re-downloads
+  its data and rebuilds its colors, keyframes, animation and the manifest through
+  `build.py`, holding the shared download lock. Rounds already saved in the
+  season's file never expire in `prepare_data`'s HTTP cache
+  (`completed_round_urls`), so the re-download only fetches the schedule and
+  the new round (a round first cached while it was the newest is fetched once
+  more after its 4h expiry).
+- The rebuild runs as its own process group under a wall-clock limit
+  (`--refresh-timeout`); a stuck build is killed, the lock released and the
+  session retried on the next cycle.
+"""
+
+from perf_utils import add_profile_args, profiled
+
+# Expected session length before results can be final (red flags included)
+SESSION_DURATION = {
+    'Sprint': datetime.timedelta(hours=1),
+    'Race': datetime.timedelta(hours=2, minutes=30),
+}
+# Lag between the chequered flag and the results API publishing it
+SETTLE_TIME = datetime.timedelta(minutes=30)
+POLL_INTERVAL = 600 # Seconds between polls once a session is due
+# HTTP caches used by prepare_data (requests_cache) and FastF1
+HTTP_CACHES = ['f1_http_cache.sqlite', 'f1_cache/fastf1_http_cache.sqlite']
+MAX_POLL_TIME = datetime.timedelta(hours=24) # Give up on a session after this long
+REFRESH_TIMEOUT = 3600 # Seconds a season rebuild may take before it is killed
+BUILD_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'build.py')
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+def season_sessions(year):
+    """Every (round, session name, start time UTC) for the Sprints and Races of `year`."""
+    import fastf1
+    schedule = fastf1.get_event_schedule(year, include_testing=False)
+    sessions = []
+    for _, event in schedule.iterrows():
+        for i in range(1, 6):
+            name = event.get(f'Session{i}')
+            start = event.get(f'Session{i}DateUtc')
+            if name in SESSION_DURATION and start is not None and str(start) != 'NaT':
+                sessions.append((int(event['RoundNumber']), name, start.to_pydatetime()))
+    return sorted(sessions, key=lambda s: s[2])
+
+def recorded_sessions(year):
+    """(round, session) pairs already in the local data file."""
+    path = f'data/standings_history_{year}.json'
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r') as f:
+        return {(step['round'], step['session']) for step in json.load(f)}
+
+def results_available(year, round_num, session):
+    """One uncached request: are the results of this session published?"""
+    import fastf1
+    import requests_cache
+    from fastf1.ergast import Ergast
+
+    ergast = Ergast()
+    with requests_cache.disabled(), fastf1.Cache.disabled():
+        if session == 'Sprint':
+            resp = ergast.get_sprint_results(season=year, round=round_num)
+        else:
+            # Standings after the round are what prepare_data records
+            resp = ergast.get_driver_standings(season=year, round=round_num)
+    return bool(resp.content) and not resp.content[0].empty
+
+def evict_round(year, round_num):
+    """Deletes cached responses for one round of `year` from the HTTP caches."""
+    import requests_cache
+
+    marker = f"/{year}/{round_num}/"
+    for path in HTTP_CACHES:
+        if not os.path.exists(path):
+            continue
+        cache = requests_cache.CachedSession(path[:-len('.sqlite')], backend='sqlite').cache
+        keys = [r.cache_key for r in cache.filter(expired=True) if marker in r.url]
+        if keys:
+            cache.delete(*keys)
+            print(f"  Evicted {len(keys)} cached responses for {year} round {round_num} from {path}")
+
+def sleep_until(when, label):
+    remaining = (when - utc_now()).total_seconds()
+    if remaining > 0:
+        print(f"Sleeping {remaining / 3600:.1f}h until {when:%Y-%m-%d %H:%M} UTC ({label})")
+    while remaining > 0:
+        # Wake up at least hourly so clock changes / suspends do not overshoot
+        time.sleep(min(remaining, 3600))
+        remaining = (when - utc_now()).total_seconds()
+
+def update_season(year, timeout=REFRESH_TIMEOUT):
+    """
+    Re-downloads `year` and rebuilds only its artifacts (plus the manifest) in a
+    `build.py` process. Returns False when the build failed or ran past `timeout`.
+    """
+    from download_all_seasons import download_lock
+
+    command = [sys.executable, BUILD_SCRIPT, '--years', str(year), '--refresh', str(year)]
+    with download_lock():
+        # Own process group, so a timeout also takes down the build's workers
+        proc = subprocess.Popen(command, start_new_session=True)
+        try:
+            return proc.wait(timeout=timeout) == 0
+        except subprocess.TimeoutExpired:
+            print(f"  Rebuild of {year} still running after {timeout}s. Killing it.")
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+            return False
+
+def watch(year, once=False, poll_interval=POLL_INTERVAL, refresh_timeout=REFRESH_TIMEOUT):
+    print(f"--- Watching the {year} season ---")
+    skipped = set()
+    while True:
+        done = recorded_sessions(year) | skipped
+        pending = [s for s in season_sessions(year) if (s[0], s[1]) not in done]
+        if not pending:
+            print(f"All {year} sessions are recorded. Nothing left to watch.")
+            return
+
+        round_num, session, start = pending[0]
+        label = f"Round {round_num} {session}"
+        final_at = start + SESSION_DURATION[session] + SETTLE_TIME
+        if once and final_at > utc_now():
+            print(f"Next session {label} is final at {final_at:%Y-%m-%d %H:%M} UTC. Exiting (--once).")
+            return
+        sleep_until(final_at, label)
+
+        # Poll cheaply until the results API has the session
+        deadline = utc_now() + MAX_POLL_TIME
+        available = False
+        while utc_now() < deadline:
+            try:
+                available = results_available(year, round_num, session)
+            except Exception as e:
+                print(f"  Poll failed for {label}: {e}")
+            if available or once:
+                break
+            print(f"  {label} results not published yet. Next poll in {poll_interval}s.")
+            time.sleep(poll_interval)
+
+        if not available:
+            print(f"Skipping {label}: results not published.")
+            skipped.add((round_num, session))
+            continue
+
+        print(f"{label} results are published. Updating {year}...")
+        evict_round(year, round_num)
+        if not update_season(year, refresh_timeout) or (round_num, session) not in recorded_sessions(year):
+            # Failed, or published but not picked up yet (API replicas lag): next cycle
+            print(f"{label} is not in the data yet.")
+            if once:
+                skipped.add((round_num, session))
+            else:
+                time.sleep(poll_interval)
+
+if __name__ == "__main__":
+    current_year = datetime.datetime.now().year
+
+    parser = argparse.ArgumentParser(description="Refresh the live season right after each Sprint and Race")
+    parser.add_argument("--year", type=int, default=current_year, help=f"Season to watch (default: {current_year})")
+    parser.add_argument("--once", action="store_true", help="Process sessions that are already final, then exit")
+    parser.add_argument("--poll-interval", type=int, default=POLL_INTERVAL, help=f"Seconds between polls (default: {POLL_INTERVAL})")
+    parser.add_argument("--refresh-timeout", type=int, default=REFRESH_TIMEOUT, help=f"Seconds a season rebuild may take (default: {REFRESH_TIMEOUT})")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    with profiled(args, 'watch'):
+        watch(args.year, args.once, args.poll_interval, args.refresh_timeout)